@@ -0,0 +1,142 @@
+"""
+Aho-Corasick Matcher
+Find every occurrence of many keywords in one pass over a text
+
+The chatbot checks a text against dozens of expanded keywords (translations,
+synonyms, media words, tree names). Testing each with `in` rescans the text once per
+keyword; an Aho-Corasick automaton compiles the keywords into a trie with failure
+links and reports every occurrence of every keyword, with positions, in a single
+left-to-right scan. Matching is exact, case-sensitive substring matching, the same
+semantics as `keyword in text`, so callers lowercase both sides as before.
+
+    matcher = AhoCorasick(['neem', 'వేప', 'tree'])
+    matcher.found("neem tree")           -> {'neem', 'tree'}
+    matcher.positions("neem tree")       -> {'neem': [0], 'tree': [5]}
+    matcher.spans("a neem tree")         -> [(2, 6), (7, 11)]
+    highlight("A Neem tree", matcher)    -> "A **Neem** **tree**"
+
+In pure Python the scan costs more per character than the C loop behind `in`, so
+for a few dozen keywords over short texts (what the search and response code does
+today) the `in` tests remain faster; the matcher earns its keep where positions
+are needed, such as highlighting the query's words in an answer.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher compiled once from a keyword list"""
+
+    def __init__(self, patterns: Iterable[str]):
+        # Distinct, non-empty patterns in first-seen order
+        self.patterns: List[str] = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        # State 0 is the root; per state: goto edges, failure link, patterns ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(self.patterns):
+            self._insert(pattern_id, pattern)
+        self._link()
+        # From the root, jump straight to the next character that can start a match
+        self._starts = re.compile("[" + "".join(re.escape(char) for char in self._goto[0]) + "]") \
+            if self._goto[0] else None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _insert(self, pattern_id: int, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] += (pattern_id,)
+
+    def _link(self):
+        """Failure links breadth-first; each state also inherits its failure state's outputs.
+
+        The goto edges are then completed into a DFA over the patterns' alphabet, so a
+        scan follows exactly one transition per character (no failure-link loops).
+        """
+        order = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+        # Breadth-first order means a state's failure state is complete before it is
+        for state in order:
+            for char, target in self._goto[self._fail[state]].items():
+                self._goto[state].setdefault(char, target)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """(start, end, pattern) for every occurrence, in order of end position"""
+        if self._starts is None:
+            return
+        goto, output, patterns, starts = self._goto, self._output, self.patterns, self._starts.search
+        state, position, length = 0, 0, len(text)
+        while position < length:
+            if not state:
+                jump = starts(text, position)
+                if jump is None:
+                    return
+                position = jump.start()
+            state = goto[state].get(text[position], 0)
+            position += 1
+            for pattern_id in output[state]:
+                pattern = patterns[pattern_id]
+                yield position - len(pattern), position, pattern
+
+    def found(self, text: str) -> Set[str]:
+        """The patterns occurring in text"""
+        return {pattern for _, _, pattern in self.iter(text)}
+
+    def contains_any(self, text: str) -> bool:
+        return next(self.iter(text), None) is not None
+
+    def positions(self, text: str) -> Dict[str, List[int]]:
+        """pattern -> start offsets of its occurrences in text"""
+        found: Dict[str, List[int]] = {}
+        for start, _, pattern in self.iter(text):
+            found.setdefault(pattern, []).append(start)
+        return found
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """Non-overlapping (start, end) spans to highlight, leftmost-longest first"""
+        matches = sorted(self.iter(text), key=lambda match: (match[0], -match[1]))
+        spans: List[Tuple[int, int]] = []
+        for start, end, _ in matches:
+            if not spans or start >= spans[-1][1]:
+                spans.append((start, end))
+        return spans
+
+
+def highlight(text: str, matcher: AhoCorasick, before: str = "**", after: str = "**",
+              ignore_case: bool = True) -> str:
+    """text with every matched span wrapped in markdown bold (or the given markers)
+
+    With ignore_case the patterns are expected in lowercase and matched against the
+    lowercased text (when lowercasing keeps offsets intact).
+    """
+    folded = text.lower() if ignore_case else text
+    if len(folded) != len(text):
+        folded = text
+    out, last = [], 0
+    for start, end in matcher.spans(folded):
+        out.extend((text[last:start], before, text[start:end], after))
+        last = end
+    out.append(text[last:])
+    return "".join(out)
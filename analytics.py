@@ -1,8 +1,8 @@
 import streamlit as st
 import os
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
+
+# pandas and matplotlib are imported when the dashboard is drawn; they dominate this module's import time
 
 def load_metadata():
     """Load metadata from JSON file"""
@@ -14,6 +14,9 @@ def load_metadata():
 
 def create_analytics_dashboard():
     """Create analytics dashboard for collected data"""
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    
     st.title("📊 Data Collection Analytics")
     
     metadata = load_metadata()
@@ -1,9 +1,14 @@
 import streamlit as st
 import os
 import datetime
-import pandas as pd
 import time
-import requests
+import uuid
+
+from upload_stream import memory_budget, write_upload
+from image_similarity import decoded_size, image_hashes
+
+# pandas, requests and the chatbot are imported by the pages that use them,
+# so the sidebar and the upload pages don't pay for them on a cold start
 
 # Configure page - MUST be first Streamlit command
 st.set_page_config(
@@ -16,18 +21,14 @@ st.set_page_config(
 # Cloud database imports (after page config)
 try:
     from supabase_db import supabase_manager
+    from save_outbox import generate_idempotency_key
+    from readiness import publish_cache_stats
+    from query_cache import query_cache
     CLOUD_DB_AVAILABLE = True
 except ImportError:
     CLOUD_DB_AVAILABLE = False
     st.error("❌ Cloud database modules not available")
 
-# AI Chatbot imports (Stage 2)
-try:
-    from chatbot import render_chatbot_interface
-    CHATBOT_AVAILABLE = True
-except ImportError:
-    CHATBOT_AVAILABLE = False
-
 # Main title
 st.title("🌿 Flora and Fauna Data Collection")
 st.markdown("*Document and preserve biodiversity through multi-media data collection*")
@@ -48,6 +49,14 @@ if CLOUD_DB_AVAILABLE:
     if supabase_manager.is_available():
         st.sidebar.success("✅ Supabase Connected")
         st.sidebar.info("☁️ Cloud Storage Active")
+        schema_version = supabase_manager.schema_version
+        latest_schema = supabase_manager.latest_schema_version
+        if schema_version is not None and schema_version < latest_schema:
+            st.sidebar.warning(f"🗄️ Schema v{schema_version} (latest v{latest_schema}) - run `python schema_migrations.py --backend postgres`")
+        elif schema_version is not None:
+            st.sidebar.caption(f"🗄️ Schema v{schema_version}")
+        # Lets the readiness probe (readiness.py) report whether this instance's cache is warm
+        publish_cache_stats({**supabase_manager.get_read_stats(), 'query_cache': query_cache.stats()})
     else:
         st.sidebar.error("❌ Supabase Not Connected")
         st.sidebar.warning("Check credentials in secrets.toml")
@@ -58,9 +67,17 @@ st.sidebar.markdown("---")
 
 def display_file_preview(row, idx):
     """Display a preview of the file based on its type"""
+    import pandas as pd
+    import requests
+    
     data_type = row['entry_type']  # Fixed column name
     filename = row['title']        # Fixed column name
     
+    # Count the access and bring cold-tier files back before showing them
+    if CLOUD_DB_AVAILABLE and pd.notna(row.get('file_url')):
+        row = row.copy()
+        row['file_url'] = supabase_manager.prepare_preview(row)
+    
     with st.expander(f"🔍 Preview: {filename}", expanded=True):
         
         # Check if file is stored in Supabase Storage (has URL)
@@ -210,6 +227,8 @@ def display_file_preview(row, idx):
 def get_auto_location():
     """Get location automatically using IP geolocation or manual coordinates entry"""
     
+    import requests
+    
     st.markdown("### 📍 Location Setting")
     
     # Location method selection
@@ -539,6 +558,12 @@ def get_auto_location():
         
         return None
 
+def get_idempotency_key(data_type, payload, additional_info):
+    """Stable key for one logical save, so double clicks and reruns don't duplicate it"""
+    if 'save_session_nonce' not in st.session_state:
+        st.session_state['save_session_nonce'] = uuid.uuid4().hex
+    return generate_idempotency_key(st.session_state['save_session_nonce'], data_type, payload, additional_info)
+
 def validate_location_before_upload():
     """Validate that location is set before allowing any data upload"""
     location_data = st.session_state.get('auto_location')
@@ -616,7 +641,8 @@ if data_type == "📝 Text Data":
                 }
                 
                 if CLOUD_DB_AVAILABLE:
-                    data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data)
+                    data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data,
+                                                         idempotency_key=get_idempotency_key("text", file_data, additional_info))
                     st.success(f"✅ Text saved successfully as {filename}")
                     st.info(f"💾 Stored in: Supabase (ID: {data_id})")
                     st.info(f"📍 Location: {location_data['city']}, {location_data['country']}")
@@ -655,7 +681,8 @@ if data_type == "📝 Text Data":
                 }
                 
                 if CLOUD_DB_AVAILABLE:
-                    data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data)
+                    data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data,
+                                                         idempotency_key=get_idempotency_key("text", file_data, additional_info))
                     st.success(f"✅ Multi-line text saved successfully as {filename}")
                     st.info(f"💾 Stored in: Supabase (ID: {data_id})")
                     st.info(f"📍 Location: {location_data['city']}, {location_data['country']}")
@@ -665,6 +692,7 @@ if data_type == "📝 Text Data":
         else:  # CSV Upload
             uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
             if uploaded_file is not None:
+                import pandas as pd
                 df = pd.read_csv(uploaded_file)
                 st.write("Preview of uploaded data:")
                 st.dataframe(df.head())
@@ -694,7 +722,8 @@ if data_type == "📝 Text Data":
                     }
                     
                     if CLOUD_DB_AVAILABLE:
-                        data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data)
+                        data_id = supabase_manager.save_data("text", filename, file_data, additional_info, location_data,
+                                                             idempotency_key=get_idempotency_key("text", file_data, additional_info))
                         st.success(f"✅ CSV data saved successfully as {filename}")
                         st.info(f"💾 Stored in: Supabase (ID: {data_id})")
                         st.info(f"📍 Location: {location_data['city']}, {location_data['country']}")
@@ -754,13 +783,9 @@ elif data_type == "🎵 Audio Data":
                 os.makedirs("data/audio", exist_ok=True)
                 filepath = f"data/audio/{filename}"
                 
-                # Get file data
-                file_data = uploaded_audio.getbuffer()
-                file_bytes = bytes(file_data)  # Convert memoryview to bytes
-                
-                # Save to file system (for backward compatibility)
-                with open(filepath, 'wb') as f:
-                    f.write(file_bytes)
+                # Save to file system (for backward compatibility), hashing on the way;
+                # the cloud upload streams from this file instead of copying the buffer
+                stored_file = write_upload(uploaded_audio, filepath)
                 
                 # Save to unified database (cloud or local)
                 additional_info = {
@@ -768,11 +793,12 @@ elif data_type == "🎵 Audio Data":
                     "duration": duration,
                     "description": description,
                     "original_name": uploaded_audio.name,
-                    "file_size": len(file_bytes)
+                    "file_size": stored_file.size
                 }
-                
+            
                 if CLOUD_DB_AVAILABLE:
-                    data_id = supabase_manager.save_data("audio", filename, file_bytes, additional_info, location_data)
+                    data_id = supabase_manager.save_data("audio", filename, stored_file, additional_info, location_data,
+                                                         idempotency_key=get_idempotency_key("audio", stored_file.sha256, additional_info))
                     st.success(f"✅ Audio saved successfully as {filename}")
                     st.info(f"💾 Stored in: Supabase (ID: {data_id})")
                     st.info(f"📍 Location: {location_data['city']}, {location_data['country']}")
@@ -837,13 +863,9 @@ elif data_type == "🎥 Video Data":
                 os.makedirs("data/video", exist_ok=True)
                 filepath = f"data/video/{filename}"
                 
-                # Get file data
-                file_data = uploaded_video.getbuffer()
-                file_bytes = bytes(file_data)  # Convert memoryview to bytes
-                
-                # Save to file system (for backward compatibility)
-                with open(filepath, 'wb') as f:
-                    f.write(file_bytes)
+                # Save to file system (for backward compatibility), hashing on the way;
+                # the cloud upload streams from this file instead of copying the buffer
+                stored_file = write_upload(uploaded_video, filepath)
                 
                 # Save to unified database (cloud or local)
                 additional_info = {
@@ -853,11 +875,12 @@ elif data_type == "🎥 Video Data":
                     "description": description,
                     "tags": tags,
                     "original_name": uploaded_video.name,
-                    "file_size": len(file_bytes)
+                    "file_size": stored_file.size
                 }
-                
+            
                 if CLOUD_DB_AVAILABLE:
-                    data_id = supabase_manager.save_data("video", filename, file_bytes, additional_info, location_data)
+                    data_id = supabase_manager.save_data("video", filename, stored_file, additional_info, location_data,
+                                                         idempotency_key=get_idempotency_key("video", stored_file.sha256, additional_info))
                     st.success(f"✅ Video saved successfully as {filename}")
                     st.info(f"💾 Stored in: Supabase (ID: {data_id})")
                     st.info(f"📍 Location: {location_data['city']}, {location_data['country']}")
@@ -900,6 +923,7 @@ elif data_type == "🖼️ Image Data":
             image_category = st.selectbox("Image Category:", ["Photos", "Screenshots", "Diagrams", "Charts", "Other"])
             description = st.text_area("Description:", placeholder="Describe the images...")
             tags = st.text_input("Tags (comma-separated):", placeholder="tag1, tag2, tag3")
+            allow_duplicates = st.checkbox("Save near-duplicates of existing photos anyway", value=False)
             
             # Display images
             cols = st.columns(3)
@@ -922,13 +946,13 @@ elif data_type == "🖼️ Image Data":
                     os.makedirs("data/image", exist_ok=True)
                     filepath = f"data/image/{filename}"
                     
-                    # Get file data
-                    file_data = uploaded_image.getbuffer()
-                    file_bytes = bytes(file_data)  # Convert memoryview to bytes
+                    # Save to file system (for backward compatibility), hashing on the way;
+                    # the cloud upload streams from this file instead of copying the buffer
+                    stored_file = write_upload(uploaded_image, filepath)
                     
-                    # Save to file system (for backward compatibility)
-                    with open(filepath, 'wb') as f:
-                        f.write(file_bytes)
+                    # Hashing decodes the whole bitmap, so that's what takes from the budget
+                    with memory_budget.reserve(decoded_size(stored_file)):
+                        image_hash = image_hashes(stored_file)
                     
                     # Save to unified database (cloud or local)
                     additional_info = {
@@ -936,11 +960,24 @@ elif data_type == "🖼️ Image Data":
                         "description": description,
                         "tags": tags,
                         "original_name": uploaded_image.name,
-                        "file_size": len(file_bytes)
+                        "file_size": stored_file.size
                     }
                     
+                    # Perceptual hashes: stored with the entry, and checked against saved photos
+                    # so a duplicate is caught before it takes up storage
+                    if image_hash:
+                        additional_info["image_hash"] = image_hash
+                        duplicates = supabase_manager.find_duplicate_images(image_hash) \
+                            if CLOUD_DB_AVAILABLE and not allow_duplicates else []
+                        if duplicates:
+                            match = duplicates[0]
+                            st.warning(f"⚠️ {uploaded_image.name} looks like a duplicate of '{match['title']}' "
+                                       f"(ID: {match['id']}) - not saved. Tick 'Save near-duplicates' to keep it.")
+                            continue
+                    
                     if CLOUD_DB_AVAILABLE:
-                        data_id = supabase_manager.save_data("image", filename, file_bytes, additional_info, location_data)
+                        data_id = supabase_manager.save_data("image", filename, stored_file, additional_info, location_data,
+                                                             idempotency_key=get_idempotency_key("image", stored_file.sha256, additional_info))
                         saved_files.append((filename, data_id))
                     else:
                         st.error(f"❌ Failed to save {uploaded_image.name} to cloud storage.")
@@ -965,6 +1002,13 @@ elif data_type == "🖼️ Image Data":
 
 # AI Chatbot - Stage 2
 elif data_type == "🤖 AI Chatbot":
+    # Imported on first visit to this page (it brings in pandas and the search code)
+    try:
+        from chatbot import render_chatbot_interface
+        CHATBOT_AVAILABLE = True
+    except ImportError:
+        CHATBOT_AVAILABLE = False
+    
     if CHATBOT_AVAILABLE and CLOUD_DB_AVAILABLE:
         render_chatbot_interface()
     elif not CLOUD_DB_AVAILABLE:
@@ -1011,6 +1055,8 @@ elif data_type == "🤖 AI Chatbot":
 
 # View Collected Data
 elif data_type == "📈 View Collected Data":
+    import pandas as pd
+    
     st.header("🌿 Flora and Fauna Data Overview")
     
     # Show current database provider
@@ -1035,16 +1081,16 @@ elif data_type == "📈 View Collected Data":
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("📝 Text Files", db_stats.get('text', 0))
+            st.metric("📝 Text Files", db_stats['type_counts'].get('text', 0))
         
         with col2:
-            st.metric("🎵 Audio Files", db_stats.get('audio', 0))
+            st.metric("🎵 Audio Files", db_stats['type_counts'].get('audio', 0))
         
         with col3:
-            st.metric("🎥 Video Files", db_stats.get('video', 0))
+            st.metric("🎥 Video Files", db_stats['type_counts'].get('video', 0))
         
         with col4:
-            st.metric("🖼️ Image Files", db_stats.get('image', 0))
+            st.metric("🖼️ Image Files", db_stats['type_counts'].get('image', 0))
         
         st.markdown("---")
         
@@ -0,0 +1,239 @@
+"""
+BM25F Ranking
+Field-weighted BM25 over the chatbot's SearchIndex records
+
+Each record's searchable columns are grouped into five fields (title, description,
+content, tags, location). A term's frequency in each field is length-normalized
+against that field's average length, weighted by the field's boost and summed into
+one pseudo-frequency before BM25 saturation (BM25F), so a match in a short title
+counts for more than the same match buried in a long content field.
+
+Query terms come from FloraFaunaChatbot.extract_keywords. Words the user actually
+typed get full weight; bilingual synonym expansions (జమ్మి -> prosopis, shami...) and
+generic expansions (tree/plant, media and action words) get the lower, tunable
+weights in EXPANSION_WEIGHTS so they can widen recall without outranking the
+user's own words. Each term is also expanded with vocabulary terms of similar
+spelling: terms sharing its phonetic key (transliterate.phonetic_key, computed once
+per vocabulary term) are a dictionary lookup away in either script, and a character
+trigram index that includes Latin transliterations of Telugu words catches near
+spellings, so "jammi" or "jami" reaches records that only say జమ్మి.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ngram_index import TrigramIndex
+from ranked_results import Materialize, RankedResults
+from search_index import MEDIA_REQUEST_KEYWORDS, SearchIndex, SEARCH_FIELDS
+from token_cache import CLEANUP_PATTERN, TokenCache, normalize_tokens
+from transliterate import phonetic_key
+
+# BM25F fields and the SEARCH_FIELDS columns each one covers
+FIELD_GROUPS = {
+    'title': ['title'],
+    'description': ['description'],
+    'content': ['content'],
+    'tags': ['tags', 'category'],
+    'location': ['city', 'country'],
+}
+FIELD_NAMES = list(FIELD_GROUPS)
+DEFAULT_FIELD_WEIGHTS = {'title': 2.0, 'description': 1.5, 'content': 1.0, 'tags': 1.5, 'location': 0.8}
+# Length normalization per field: short, label-like fields are normalized less
+DEFAULT_FIELD_B = {'title': 0.5, 'description': 0.75, 'content': 0.75, 'tags': 0.5, 'location': 0.3}
+DEFAULT_K1 = 1.2
+
+# Query-term weight by where the keyword came from
+ORIGINAL = 'original'
+SYNONYM = 'synonym'
+GENERIC = 'generic'
+EXPANSION_WEIGHTS = {ORIGINAL: 1.0, SYNONYM: 0.6, GENERIC: 0.2}
+# Expansions extract_keywords adds for whole classes of queries (tree/plant, media, actions)
+GENERIC_TERMS = set(MEDIA_REQUEST_KEYWORDS) | {
+    'చెట్టు', 'tree', 'plant', 'వృక్షం', 'మొక్క',
+    'show', 'display', 'చూపించు', 'తెలియజేయి', 'tell', 'చెప్పు',
+}
+# Added to every media record when the query asks for images, videos or audio
+MEDIA_BOOST = 1.0
+# Vocabulary terms with the same phonetic key as a query term (the same word in the
+# other script or another transliteration) join the query at this fraction of its weight
+PHONETIC_WEIGHT = 0.9
+# Near-spellings and other-script forms of a query term (trigram similarity above the
+# threshold) join the query at this fraction of the term's weight, scaled by similarity
+FUZZY_WEIGHT = 0.5
+FUZZY_THRESHOLD = 0.5
+FUZZY_MIN_LENGTH = 3
+
+_COLUMN_FIELD = {SEARCH_FIELDS.index(column): group_id
+                 for group_id, columns in enumerate(FIELD_GROUPS.values()) for column in columns}
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize_tokens(text)
+
+
+def keyword_weights(query: str, keywords: List[str],
+                    expansion_weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """term -> query weight for extract_keywords output, by whether the user typed it"""
+    weights = {**EXPANSION_WEIGHTS, **(expansion_weights or {})}
+    query_lower = query.lower().strip()
+    typed = set(CLEANUP_PATTERN.sub(' ', query_lower).split())
+
+    terms: Dict[str, float] = {}
+    for keyword in keywords:
+        keyword_lower = keyword.lower().strip()
+        if keyword_lower == query_lower and len(typed) > 1:
+            # The whole query is also in the list for substring matching; its words are already here
+            continue
+        if keyword_lower in typed:
+            weight = weights[ORIGINAL]
+        elif keyword_lower in GENERIC_TERMS:
+            weight = weights[GENERIC]
+        else:
+            weight = weights[SYNONYM]
+        for term in tokenize(keyword_lower):
+            terms[term] = max(terms.get(term, 0.0), weight)
+    return {term: weight for term, weight in terms.items() if weight > 0}
+
+
+def is_media_request(query: str) -> bool:
+    query_lower = query.lower()
+    return any(media_keyword in query_lower for media_keyword in MEDIA_REQUEST_KEYWORDS)
+
+
+class BM25Ranker:
+    """BM25F scoring and top-k retrieval over a SearchIndex"""
+
+    def __init__(self, index: SearchIndex, field_weights: Optional[Dict[str, float]] = None,
+                 field_b: Optional[Dict[str, float]] = None, k1: float = DEFAULT_K1,
+                 media_boost: float = MEDIA_BOOST, expansion_weights: Optional[Dict[str, float]] = None,
+                 token_cache: Optional[TokenCache] = None, fuzzy_weight: float = FUZZY_WEIGHT,
+                 fuzzy_threshold: float = FUZZY_THRESHOLD, phonetic_weight: float = PHONETIC_WEIGHT):
+        self.index = index
+        self.k1 = k1
+        self.fuzzy_weight = fuzzy_weight
+        self.fuzzy_threshold = fuzzy_threshold
+        self.phonetic_weight = phonetic_weight
+        self.media_boost = media_boost
+        self.expansion_weights = expansion_weights
+        field_weights = {**DEFAULT_FIELD_WEIGHTS, **(field_weights or {})}
+        field_b = {**DEFAULT_FIELD_B, **(field_b or {})}
+        self.field_weights = [field_weights[name] for name in FIELD_NAMES]
+        self.field_b = [field_b[name] for name in FIELD_NAMES]
+
+        # term -> record_id -> term frequency per field
+        self.postings: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        lengths: List[List[int]] = []
+        for record in index.records:
+            record_lengths = [0] * len(FIELD_NAMES)
+            if token_cache is not None:
+                # Rows of the cache follow the same snapshot as the index
+                field_terms = token_cache.field_terms(record.record_id)
+            else:
+                field_terms = ((column_id, tokenize(text)) for column_id, text in record.fields.items())
+            for column_id, terms in field_terms:
+                group_id = _COLUMN_FIELD[column_id]
+                for term in terms:
+                    tfs = self.postings[term].setdefault(record.record_id, [0] * len(FIELD_NAMES))
+                    tfs[group_id] += 1
+                    record_lengths[group_id] += 1
+            lengths.append(record_lengths)
+
+        count = len(lengths)
+        averages = [sum(record_lengths[g] for record_lengths in lengths) / count if count else 0.0
+                    for g in range(len(FIELD_NAMES))]
+        # Per-record, per-field weight / length-normalization factor, so scoring is one multiply per field
+        self._field_factor = [
+            [self._factor(g, record_lengths[g], averages[g]) for g in range(len(FIELD_NAMES))]
+            for record_lengths in lengths
+        ]
+        self.trigrams = TrigramIndex(self.postings)
+        # phonetic key -> vocabulary terms
+        key_of = token_cache.key_of if token_cache is not None else phonetic_key
+        self.phonetic: Dict[str, List[str]] = defaultdict(list)
+        for term in self.postings:
+            self.phonetic[key_of(term)].append(term)
+
+    def _factor(self, group_id: int, length: int, average: float) -> float:
+        b = self.field_b[group_id]
+        norm = 1 - b + b * (length / average) if average else 1.0
+        return self.field_weights[group_id] / norm
+
+    def __len__(self) -> int:
+        return len(self._field_factor)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def variants(self, term: str) -> Dict[str, float]:
+        """Vocabulary terms standing for the same word: phonetic matches and near spellings"""
+        found: Dict[str, float] = {}
+        if self.phonetic_weight:
+            for other in self.phonetic.get(phonetic_key(term), ()):
+                found[other] = self.phonetic_weight
+        if self.fuzzy_weight and len(term) >= FUZZY_MIN_LENGTH:
+            for other, similarity in self.trigrams.similar(term, self.fuzzy_threshold):
+                found[other] = max(found.get(other, 0.0), self.fuzzy_weight * similarity)
+        found.pop(term, None)
+        return found
+
+    def query_terms(self, query: str, keywords: List[str]) -> Dict[str, float]:
+        """Weighted keyword terms plus their variants at a fraction of the term's weight"""
+        terms = keyword_weights(query, keywords, self.expansion_weights)
+        expanded = dict(terms)
+        for term, query_weight in terms.items():
+            for other, fraction in self.variants(term).items():
+                if query_weight * fraction > expanded.get(other, 0.0):
+                    expanded[other] = query_weight * fraction
+        return expanded
+
+    def score_terms(self, terms: Dict[str, float], media_request: bool = False) -> Dict[int, float]:
+        """record_id -> BM25F score for weighted query terms"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, query_weight in terms.items():
+            rows = self.postings.get(term)
+            if not rows:
+                continue
+            idf = self.idf(term)
+            for record_id, tfs in rows.items():
+                factors = self._field_factor[record_id]
+                pseudo_tf = sum(tf * factor for tf, factor in zip(tfs, factors) if tf)
+                scores[record_id] += query_weight * idf * pseudo_tf / (self.k1 + pseudo_tf)
+        if media_request and self.media_boost:
+            for record_id in self.index.media_record_ids:
+                scores[record_id] += self.media_boost
+        return scores
+
+    def score(self, query: str, keywords: List[str]) -> Dict[int, float]:
+        return self.score_terms(self.query_terms(query, keywords), is_media_request(query))
+
+    def top_k(self, query: str, keywords: List[str], k: int = 10) -> List[Tuple[int, float]]:
+        """The k best (record_id, score) pairs, best first; ties keep record order"""
+        scores = self.score(query, keywords)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def materializer(self, query: str, keywords: List[str]) -> Materialize:
+        """Builds the result items of a ranking of this query from this snapshot's index"""
+        terms = self.query_terms(query, keywords)
+
+        def materialize(record_id: int, relevance: float) -> Dict[str, Any]:
+            matched = [term for term in terms if record_id in self.postings.get(term, ())]
+            fields = {SEARCH_FIELDS[column_id] for column_id, text in self.index.records[record_id].fields.items()
+                      if any(term in tokenize(text) for term in matched)}
+            return self.index._result_item(record_id, {
+                'relevance': round(relevance, 4),
+                'matched_fields': [column for column in SEARCH_FIELDS if column in fields],
+                'matched_content': [f"Found '{term}' in record" for term in matched],
+            })
+        return materialize
+
+    def rank(self, query: str, keywords: List[str]) -> RankedResults:
+        """Every match ranked by score; result items are only built for the pages asked for"""
+        scores = self.score_terms(self.query_terms(query, keywords), is_media_request(query))
+        return RankedResults(scores, self.materializer(query, keywords), len(self.index), keywords)
+
+    def search(self, query: str, keywords: List[str], limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """Ranked results in the shape FloraFaunaChatbot.search_database returns"""
+        return self.rank(query, keywords).page(offset, limit)
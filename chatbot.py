@@ -12,9 +12,12 @@ except ImportError:
     import warnings
     warnings.warn("pandas not available - chatbot functionality will be limited")
 
+from collections import OrderedDict
 from datetime import datetime
+import itertools
 import re
-from typing import List, Dict, Optional
+import uuid
+from typing import List, Dict, Iterable, Iterator, Optional, Union
 
 try:
     from supabase_db import supabase_manager
@@ -22,30 +25,105 @@ try:
 except ImportError:
     SUPABASE_AVAILABLE = False
 
+from aho_corasick import AhoCorasick, highlight
+from chatbot_corpus import shared_corpus
+from query_cache import query_cache, query_key
+
+# "photos similar to #12", "images that look like this one", "ఈ ఫోటో లాంటి చిత్రాలు"
+SIMILAR_PHOTO_PATTERN = re.compile(r'\b(similar|resembl\w*|duplicates?|look(?:s|ing)? like|like (?:this|that|the one))\b'
+                                   r'|పోలిన|లాంటి|వంటి')
+PHOTO_WORDS = {'photo', 'photos', 'image', 'images', 'picture', 'pictures', 'చిత్రం', 'చిత్రాలు', 'ఫోటో', 'ఫోటోలు'}
+# A saved entry referenced by ID: "#12" or "id 12"
+RECORD_REFERENCE_PATTERN = re.compile(r'(?:#|\bid\s*)(\d+)')
+# Media mentioning any of these is shown even outside the top 5 results
+TREE_KEYWORDS = [
+    'jammi', 'జమ్మి', 'prosopis', 'shami',
+    'neem', 'వేప', 'vepa', 'azadirachta',
+    'banyan', 'మర్రి', 'marri', 'ficus',
+    'mango', 'మామిడి', 'mamidi',
+    'coconut', 'కొబ్బరి', 'kobbari',
+    'tree', 'చెట్టు', 'plant', 'వృక్షం', 'మొక్క'
+]
+# Results per answer and per "more results" page, and the scored sets a session keeps to page through
+PAGE_SIZE = 10
+MAX_RESULT_SETS = 5
+# Streamed answers are sent a sentence or line at a time
+SENTENCE_CHUNK_PATTERN = re.compile(r'[^.!?\n]*(?:[.!?]+\s*|\n+|$)')
+
+
+def response_chunks(text: str) -> List[str]:
+    """text split after each sentence or line break; the chunks join back to text"""
+    return [chunk for chunk in SENTENCE_CHUNK_PATTERN.findall(text) if chunk]
+
+
+class ResponseStream:
+    """Iterator over a streamed answer: text chunks (str) first, then media files (dict)
+    
+    text() and media() iterate the two parts separately (text() stops at the first
+    media file without losing it); response holds the complete response_data once
+    the stream has been consumed.
+    """
+    
+    def __init__(self, events):
+        self._events = events
+        self._pending = None
+        self.response: Optional[Dict] = None
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Union[str, Dict]:
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        try:
+            return next(self._events)
+        except StopIteration as finished:
+            if finished.value is not None:
+                self.response = finished.value
+            raise
+    
+    def text(self) -> Iterator[str]:
+        for item in self:
+            if not isinstance(item, str):
+                self._pending = item
+                return
+            yield item
+    
+    def media(self) -> Iterator[Dict]:
+        for item in self:
+            if isinstance(item, dict):
+                yield item
+
+
 class FloraFaunaChatbot:
     """AI Chatbot for Flora & Fauna database queries"""
     
-    def __init__(self):
+    # 'bm25' (field-weighted BM25F), 'legacy' (the original additive scoring),
+    # 'vectorized' (the legacy scores computed with NumPy/pandas column operations) or
+    # 'semantic' (TF-IDF + LSA cosine similarity, for paraphrased questions)
+    ranking = 'bm25'
+    
+    def __init__(self, corpus=None, cache=None):
+        # Sessions keep only their conversation (and result pages); the data, its index and answers are shared
         self.conversation_history = []
-        self.db_cache = None
-        self.last_cache_update = None
+        # Scored result sets behind "more results" cursors, most recently used last
+        self.result_sets: "OrderedDict[str, Dict]" = OrderedDict()
+        self.corpus = corpus if corpus is not None else shared_corpus
+        self.cache = cache if cache is not None else query_cache
+        
+    @property
+    def db_cache(self):
+        snapshot = self.corpus.get()
+        return snapshot.df if snapshot is not None else None
         
     def load_database_content(self) -> Optional[object]:
         """Load and cache database content for faster queries"""
         try:
             if not SUPABASE_AVAILABLE or not PANDAS_AVAILABLE:
                 return None
-                
-            current_time = datetime.now()
             
-            # Cache data for 5 minutes to improve performance
-            if (self.db_cache is None or 
-                self.last_cache_update is None or 
-                (current_time - self.last_cache_update).seconds > 300):
-                
-                self.db_cache = supabase_manager.get_all_data()
-                self.last_cache_update = current_time
-                
+            # The process-wide snapshot refreshes itself every 5 minutes
             return self.db_cache
             
         except Exception:
@@ -161,124 +239,106 @@ class FloraFaunaChatbot:
         
         return list(set(keywords))  # Remove duplicates
     
+    def _snapshot(self):
+        return self.corpus.get() if SUPABASE_AVAILABLE and PANDAS_AVAILABLE else None
+    
     def search_database(self, query: str, keywords: List[str]) -> Dict:
         """Search database for relevant content with improved matching"""
-        df = self.load_database_content()
-        
-        if df is None or len(df) == 0:
+        return self._search_snapshot(self._snapshot(), query, keywords)
+    
+    def _ranker(self, snapshot):
+        """The snapshot's search structure for the configured ranking"""
+        if self.ranking == 'legacy':
+            return snapshot.search_index
+        if self.ranking == 'vectorized':
+            return snapshot.vector_search
+        if self.ranking == 'semantic':
+            return snapshot.semantic_search
+        return snapshot.ranker
+    
+    def _rank_snapshot(self, snapshot, query: str, keywords: List[str]):
+        """RankedResults of the query on one snapshot, or None when there's no data"""
+        if snapshot is None or len(snapshot) == 0:
+            return None
+        return self._ranker(snapshot).rank(query, keywords)
+    
+    def _search_snapshot(self, snapshot, query: str, keywords: List[str]) -> Dict:
+        # One snapshot for the whole query, even if a refresh swaps it meanwhile
+        ranked = self._rank_snapshot(snapshot, query, keywords)
+        if ranked is None:
             return {
                 'found_items': 0,
                 'results': [],
                 'message': "No data available in the database."
             }
         
-        results = []
-        search_columns = ['title', 'description', 'content', 'category', 'tags', 'city', 'country']
-        
-        # Search for each keyword across relevant columns
-        for idx, row in df.iterrows():
-            relevance_score = 0
-            matched_fields = []
-            matched_content = []
-            
-            # Create searchable text from all fields
-            all_text_fields = []
-            for col in search_columns:
-                if col in row and pd.notna(row[col]) and str(row[col]).strip():
-                    all_text_fields.append(str(row[col]))
-            
-            combined_text = " ".join(all_text_fields).lower()
-            
-            # Check each keyword with enhanced matching
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                
-                # Exact match gets highest score
-                if keyword_lower in combined_text:
-                    relevance_score += 5
-                    matched_content.append(f"Found '{keyword}' in record")
-                
-                # Check individual columns for more specific matches
-                for col in search_columns:
-                    if col in row and pd.notna(row[col]):
-                        content = str(row[col]).lower()
-                        if keyword_lower in content:
-                            relevance_score += 2
-                            if col not in matched_fields:
-                                matched_fields.append(col)
-                
-                # Enhanced partial matching for bilingual content
-                if len(keyword_lower) > 2:
-                    # Word boundary matching
-                    for text_chunk in combined_text.split():
-                        # Exact word match
-                        if keyword_lower == text_chunk:
-                            relevance_score += 4
-                        # Partial match (contains)
-                        elif keyword_lower in text_chunk or text_chunk in keyword_lower:
-                            relevance_score += 1
-                    
-                    # Fuzzy matching for transliterations (e.g., jammi/జమ్మి)
-                    # Check if any word in the text sounds similar or is a transliteration
-                    for text_word in combined_text.split():
-                        if len(text_word) > 2:
-                            # Simple similarity check based on common characters
-                            common_chars = set(keyword_lower) & set(text_word)
-                            if len(common_chars) >= min(3, len(keyword_lower) - 1):
-                                relevance_score += 1
-            
-            # Boost score if multiple keywords match
-            if len([k for k in keywords if k.lower() in combined_text]) > 1:
-                relevance_score += 2
-            
-            # Give extra boost to media files if user is asking for images/videos/audio (bilingual)
-            entry_type = row.get('entry_type', '')
-            if entry_type in ['image', 'video', 'audio']:
-                # Check if user is asking for media in English or Telugu
-                media_request_keywords = [
-                    'image', 'images', 'photo', 'picture', 'చిత్రం', 'చిత్రాలు', 'ఫోటో', 'ఫోటోలు',
-                    'video', 'videos', 'వీడియో', 'వీడియోలు',
-                    'audio', 'sound', 'recording', 'ఆడియో', 'శబ్దం'
-                ]
-                for media_keyword in media_request_keywords:
-                    if media_keyword in query.lower():
-                        relevance_score += 10  # Big boost for media files when user asks for media
-                        break
-            
-            # If relevant, add to results
-            if relevance_score > 0:
-                result_item = {
-                    'relevance': relevance_score,
-                    'data': row.to_dict(),
-                    'matched_fields': matched_fields,
-                    'matched_content': matched_content,
-                    'type': row.get('entry_type', 'unknown'),
-                    'title': row.get('title', 'Unknown'),
-                    'description': row.get('description', 'No description'),
-                    'content': row.get('content', 'No content'),
-                    'location': f"{row.get('city', 'Unknown')}, {row.get('country', 'Unknown')}",
-                    'timestamp': row.get('timestamp', 'Unknown'),
-                    'combined_text': combined_text[:200] + "..." if len(combined_text) > 200 else combined_text
-                }
-                results.append(result_item)
-        
-        # Sort by relevance score
-        results.sort(key=lambda x: x['relevance'], reverse=True)
-        
-        return {
-            'found_items': len(results),
-            'results': results[:10],  # Limit to top 10 results
-            'total_items': len(df),
-            'keywords_used': keywords,
-            'message': f"Found {len(results)} relevant items from {len(df)} total records."
-        }
+        search_results = ranked.page(0, PAGE_SIZE)
+        if search_results['next_offset'] is not None:
+            # Keep the scores so "more results" pages through them instead of searching again
+            search_results['next_cursor'] = self._keep_results(query, keywords, snapshot.version, ranked,
+                                                               search_results['next_offset'])
+        return search_results
+    
+    def _keep_results(self, query: str, keywords: List[str], version: Optional[int], ranked, offset: int) -> str:
+        """Cursor to the page at offset of a scored result set (ranked None: score it when first paged)
+        
+        Only the ids and scores are kept, not the snapshot they were scored on: pages are
+        materialized from the current snapshot, so a session's cursors don't pin old corpora.
+        """
+        token = uuid.uuid4().hex[:12]
+        self.result_sets[token] = {'query': query, 'keywords': keywords, 'version': version,
+                                   'ranked': ranked.detach() if ranked is not None else None}
+        while len(self.result_sets) > MAX_RESULT_SETS:
+            self.result_sets.popitem(last=False)
+        return f"{token}:{offset}"
+    
+    def more_results(self, cursor: str, limit: int = PAGE_SIZE) -> Dict:
+        """The page of an earlier search that cursor points to, with the cursor of the page after it
+        
+        Pages come from the scores kept when the question was asked; only a corpus refresh
+        since then (or a cursor from a cached answer) makes the question be ranked again.
+        """
+        token, _, offset = cursor.partition(':')
+        kept = self.result_sets.get(token)
+        if kept is None or not offset.isdigit():
+            return {
+                'found_items': 0,
+                'results': [],
+                'message': "These results have expired. Please ask the question again.",
+                'next_cursor': None
+            }
+        self.result_sets.move_to_end(token)
+        
+        snapshot = self._snapshot()
+        if kept['ranked'] is None or (snapshot is not None and snapshot.version != kept['version']):
+            ranked = self._rank_snapshot(snapshot, kept['query'], kept['keywords'])
+            kept['ranked'] = ranked.detach() if ranked is not None else None
+            kept['version'] = snapshot.version if snapshot is not None else None
+        if kept['ranked'] is None or snapshot is None:
+            return {'found_items': 0, 'results': [], 'message': "No data available in the database.", 'next_cursor': None}
+        
+        materialize = self._ranker(snapshot).materializer(kept['query'], kept['keywords'])
+        page = kept['ranked'].page(int(offset), limit, materialize)
+        page['next_cursor'] = f"{token}:{page['next_offset']}" if page['next_offset'] is not None else None
+        return page
     
     def generate_response_with_media(self, query: str, search_results: Dict) -> Dict:
         """Generate natural language response with media files based on search results"""
         
         if search_results['found_items'] == 0:
-            return {
-                'text_response': f"""
+            return self.no_results_response(query)
+        
+        results = search_results['results']
+        return {
+            'text_response': self.answer_text(query, results),
+            'media_files': list(self.iter_media_files(query, results)),
+            # Query words the interface highlights in the answer
+            'highlight_terms': self.highlight_terms(query)
+        }
+    
+    def no_results_response(self, query: str) -> Dict:
+        return {
+            'text_response': f"""
 🤖 **Flora & Fauna Assistant**: I couldn't find any information about '{query}' in our database.
 
 💡 **Suggestions:**
@@ -286,11 +346,14 @@ class FloraFaunaChatbot:
 - Ask about specific locations, species, or data types
 - Try English keywords if you used Telugu, or vice versa
 """,
-                'media_files': []
-            }
-
-        results = search_results['results']
-        
+            'media_files': []
+        }
+    
+    def highlight_terms(self, query: str) -> List[str]:
+        return [keyword for keyword in query.lower().strip().split() if len(keyword) > 2]
+    
+    def answer_text(self, query: str, results: List[Dict]) -> str:
+        """The answer drawn from the result that best matches the query's words"""
         # Find the most relevant result that actually matches the query
         best_match = None
         query_lower = query.lower().strip()
@@ -320,54 +383,6 @@ class FloraFaunaChatbot:
         if best_match is None:
             best_match = results[0]
         
-        # Collect media files from relevant results
-        media_files = []
-        
-        for result in results:
-            result_data = result.get('data', {})
-            entry_type = result_data.get('entry_type', '')
-            file_url = result_data.get('file_url', '')
-            title = result_data.get('title', 'Unknown')
-            description = result.get('description', '')
-            
-            if file_url and entry_type in ['image', 'video', 'audio']:
-                is_relevant = False
-                
-                # Check title and description for relevance
-                combined_media_text = f"{title.lower()} {description.lower()}"
-                for keyword in query_lower.split():
-                    if len(keyword) > 2 and keyword in combined_media_text:
-                        is_relevant = True
-                        break
-                
-                # Check for plant/tree specific keywords
-                tree_keywords = [
-                    'jammi', 'జమ్మి', 'prosopis', 'shami',
-                    'neem', 'వేప', 'vepa', 'azadirachta',
-                    'banyan', 'మర్రి', 'marri', 'ficus',
-                    'mango', 'మామిడి', 'mamidi',
-                    'coconut', 'కొబ్బరి', 'kobbari',
-                    'tree', 'చెట్టు', 'plant', 'వృక్షం', 'మొక్క'
-                ]
-                for tree_keyword in tree_keywords:
-                    if tree_keyword in combined_media_text:
-                        is_relevant = True
-                        break
-                
-                # Include if relevant or in top 5 results
-                if is_relevant or results.index(result) < 5:
-                    media_info = {
-                        'type': entry_type,
-                        'url': file_url,
-                        'title': title,
-                        'description': description[:100] + "..." if len(description) > 100 else description,
-                        'relevance': result.get('relevance', 0)
-                    }
-                    media_files.append(media_info)
-        
-        # Sort media files by relevance
-        media_files.sort(key=lambda x: x.get('relevance', 0), reverse=True)
-        
         # Generate response from the best match
         content = best_match.get('content', '')
         description = best_match.get('description', '')
@@ -404,38 +419,187 @@ class FloraFaunaChatbot:
                 text_response = text_response[:1500] + "..."
         else:
             text_response = "🤖 **Flora & Fauna Assistant**: I found records, but no detailed information is available for your query."
+        return text_response
+    
+    def iter_media_files(self, query: str, results: List[Dict]) -> Iterator[Dict]:
+        """Media files of the relevant results, most relevant first, built one at a time"""
+        query_words = [keyword for keyword in query.lower().strip().split() if len(keyword) > 2]
         
-        return {
-            'text_response': text_response,
-            'media_files': media_files
-        }
+        # Pick the relevant media results first; the (stable) sort keeps rank order among ties
+        candidates = []
+        for position, result in enumerate(results):
+            result_data = result.get('data', {})
+            if not result_data.get('file_url', '') or result_data.get('entry_type', '') not in ['image', 'video', 'audio']:
+                continue
+            
+            # Check title and description for relevance, or plant/tree specific keywords
+            combined_media_text = f"{result_data.get('title', 'Unknown').lower()} {result.get('description', '').lower()}"
+            is_relevant = any(keyword in combined_media_text for keyword in query_words) or \
+                any(tree_keyword in combined_media_text for tree_keyword in TREE_KEYWORDS)
+            
+            # Include if relevant or in top 5 results
+            if is_relevant or position < 5:
+                candidates.append(result)
+        candidates.sort(key=lambda x: x.get('relevance', 0), reverse=True)
+        
+        for result in candidates:
+            result_data = result['data']
+            description = result.get('description', '')
+            yield {
+                'type': result_data['entry_type'],
+                'url': result_data['file_url'],
+                'title': result_data.get('title', 'Unknown'),
+                'description': description[:100] + "..." if len(description) > 100 else description,
+                'relevance': result.get('relevance', 0)
+            }
     
     def generate_response(self, query: str, search_results: Dict) -> str:
         """Generate natural language response based on search results (backward compatibility)"""
         response_data = self.generate_response_with_media(query, search_results)
         return response_data['text_response']
     
-    def process_query_with_media(self, user_query: str) -> Dict:
-        """Main method to process user queries and generate responses with media files"""
-        if not user_query or len(user_query.strip()) < 3:
+    def is_similar_photo_request(self, query: str) -> bool:
+        query_lower = query.lower()
+        words = set(re.sub(r'[^\w\s\u0C00-\u0C7F]', ' ', query_lower).split())
+        return bool(words & PHOTO_WORDS) and SIMILAR_PHOTO_PATTERN.search(query_lower) is not None
+    
+    def find_similar_photos(self, snapshot, query: str, keywords: List[str], image=None) -> Dict:
+        """Photos that look like an attached image, an entry referenced as #id, or the best image match for the query"""
+        from image_similarity import DUPLICATE_DISTANCE, SIMILAR_DISTANCE, image_hashes, parse_hashes
+        
+        index = snapshot.image_index if snapshot is not None else None
+        if index is None or len(index) == 0:
             return {
+                'text_response': "🤖 **Flora & Fauna Assistant**: No photos have been indexed for similarity search yet.",
+                'media_files': [],
+                'found_items': 0
+            }
+        
+        target_id, target_title, hashes = None, None, None
+        reference = RECORD_REFERENCE_PATTERN.search(query)
+        if image is not None:
+            hashes = parse_hashes(image_hashes(image))
+            target_title = getattr(image, 'name', None) or "your photo"
+        elif reference and int(reference.group(1)) in index.photos:
+            target_id = int(reference.group(1))
+        else:
+            for result in self._search_snapshot(snapshot, query, keywords).get('results', []):
+                if result['data'].get('id') in index.photos:
+                    target_id = result['data']['id']
+                    break
+        if target_id is not None:
+            photo = index.photos[target_id]
+            hashes, target_title = (photo['phash'], photo['dhash']), photo['title']
+        
+        if hashes is None:
+            return {
+                'text_response': "🤖 **Flora & Fauna Assistant**: I couldn't tell which photo to compare with. "
+                                 "Attach one, or name it (e.g. 'photos similar to #12' or 'images like the neem photo').",
+                'media_files': [],
+                'found_items': 0
+            }
+        
+        matches = index.similar(hashes, SIMILAR_DISTANCE, limit=10, exclude=target_id)
+        if not matches:
+            text_response = f"🤖 **Flora & Fauna Assistant**: I found no photos similar to {target_title}."
+        else:
+            text_response = f"🖼️ **{len(matches)} photo(s) similar to {target_title}**\n\n" + "\n".join(
+                f"- {match['title']} (ID: {match['id']}, {match['distance']} bits apart"
+                f"{', likely a duplicate' if max(match['distance'], match['dhash_distance']) <= DUPLICATE_DISTANCE else ''})"
+                for match in matches)
+        media_files = [{
+            'type': 'image',
+            'url': match['file_url'],
+            'title': match['title'],
+            'description': match['description'][:100] + "..." if len(match['description']) > 100 else match['description'],
+            # Closer hashes rank higher
+            'relevance': 64 - match['distance']
+        } for match in matches if match['file_url']]
+        return {'text_response': text_response, 'media_files': media_files, 'found_items': len(matches)}
+    
+    def process_query_with_media(self, user_query: str, image=None) -> Dict:
+        """Main method to process user queries and generate responses with media files
+        
+        image is an optional photo (upload, bytes or path) that a "photos similar to this one" question refers to.
+        """
+        stream = self.stream_query_with_media(user_query, image)
+        for _ in stream:
+            pass
+        return stream.response
+    
+    def stream_query_with_media(self, user_query: str, image=None) -> "ResponseStream":
+        """process_query_with_media as a stream: answer text chunks, then media files by relevance
+        
+        The text is yielded as soon as the best match is known, before any media file is
+        collected, so the interface can start writing the answer while the rest is built.
+        """
+        return ResponseStream(self._answer_events(user_query, image))
+    
+    def _answer_events(self, user_query: str, image=None):
+        """Yields the text chunks and media files; returns the complete response_data"""
+        if not user_query or len(user_query.strip()) < 3:
+            response_data = {
                 'text_response': "🤖 Please ask me a question about the flora and fauna data!",
                 'media_files': []
             }
+            yield from response_chunks(response_data['text_response'])
+            return response_data
         
-        # Extract keywords and search database
+        # Extract keywords; a repeated question at the same corpus version is answered from cache
         keywords = self.extract_keywords(user_query)
-        search_results = self.search_database(user_query, keywords)
-        
-        # Generate response with media
-        response_data = self.generate_response_with_media(user_query, search_results)
+        snapshot = self._snapshot()
+        key = query_key(keywords, self.ranking)
+        similar_photos = self.is_similar_photo_request(user_query)
+        cached = self.cache.get(key, snapshot.version) if snapshot is not None and not similar_photos else None
+        streamed = False
+        
+        if similar_photos:
+            # Hash lookups are cheap and may depend on the attached photo, so they skip the answer cache
+            response_data = self.find_similar_photos(snapshot, user_query, keywords, image)
+            found_items = response_data.pop('found_items')
+        elif cached is not None:
+            response_data, found_items = cached['response'], cached['found_items']
+            if found_items > PAGE_SIZE:
+                # Ranked again only if more results are asked for
+                response_data['next_cursor'] = self._keep_results(user_query, keywords, None, None, PAGE_SIZE)
+        else:
+            search_results = self._search_snapshot(snapshot, user_query, keywords)
+            found_items = search_results['found_items']
+            
+            if found_items == 0:
+                response_data = self.no_results_response(user_query)
+            else:
+                # Answer first, then each media file as it's built
+                results = search_results['results']
+                text_response = self.answer_text(user_query, results)
+                yield from response_chunks(text_response)
+                media_files = []
+                for media in self.iter_media_files(user_query, results):
+                    media_files.append(media)
+                    yield media
+                response_data = {
+                    'text_response': text_response,
+                    'media_files': media_files,
+                    'highlight_terms': self.highlight_terms(user_query)
+                }
+                streamed = True
+            if snapshot is not None:
+                self.cache.put(key, snapshot.version, {'response': response_data, 'found_items': found_items})
+            # Session-specific, so added after caching
+            if search_results.get('next_cursor'):
+                response_data['next_cursor'] = search_results['next_cursor']
+        
+        if not streamed:
+            # Computed (or cached) whole: stream it now
+            yield from response_chunks(response_data['text_response'])
+            yield from response_data['media_files']
         
         # Store conversation
         self.conversation_history.append({
             'timestamp': datetime.now().isoformat(),
             'query': user_query,
             'keywords': keywords,
-            'results_found': search_results['found_items'],
+            'results_found': found_items,
             'text_response': response_data['text_response'],
             'media_count': len(response_data['media_files'])
         })
@@ -473,66 +637,69 @@ class FloraFaunaChatbot:
         
         return response
 
-def render_media_files(media_files: list):
-    """Render media files in the Streamlit interface"""
+def render_media_files(media_files: Iterable[Dict]):
+    """Render media files in the Streamlit interface
+    
+    media_files may be a stream: each file is shown as soon as it arrives, under its
+    type's heading (images, then videos, then audio, whatever order they come in).
+    """
     import streamlit as st
     
-    if not media_files:
+    media_files = iter(media_files)
+    first = next(media_files, None)
+    if first is None:
         return
     
     st.markdown("### 📁 Related Media Files")
     
-    # Group media by type
-    media_by_type = {
-        'image': [],
-        'video': [],
-        'audio': []
-    }
+    # One section per type, filled in as media arrives; empty sections show nothing
+    sections = {media_type: st.container() for media_type in ('image', 'video', 'audio')}
+    image_columns = []
+    shown = {media_type: 0 for media_type in sections}
     
-    for media in media_files:
+    for media in itertools.chain([first], media_files):
         media_type = media.get('type', 'unknown')
-        if media_type in media_by_type:
-            media_by_type[media_type].append(media)
-    
-    # Display images
-    if media_by_type['image']:
-        st.markdown("#### 🖼️ Images")
-        cols = st.columns(min(3, len(media_by_type['image'])))
-        for i, img in enumerate(media_by_type['image']):
-            with cols[i % 3]:
+        if media_type not in sections:
+            continue
+        with sections[media_type]:
+            if media_type == 'image':
+                # Display images
+                if not image_columns:
+                    st.markdown("#### 🖼️ Images")
+                    image_columns = st.columns(3)
+                with image_columns[shown['image'] % 3]:
+                    try:
+                        st.image(media['url'], caption=media['title'], use_column_width=True)
+                        if media['description']:
+                            st.caption(media['description'])
+                    except Exception:
+                        st.error(f"❌ Could not display image: {media['title']}")
+                        st.markdown(f"🔗 [View directly]({media['url']})")
+            elif media_type == 'video':
+                # Display videos
+                if not shown['video']:
+                    st.markdown("#### 🎥 Videos")
                 try:
-                    st.image(img['url'], caption=img['title'], use_column_width=True)
-                    if img['description']:
-                        st.caption(img['description'])
+                    st.video(media['url'])
+                    st.markdown(f"**{media['title']}**")
+                    if media['description']:
+                        st.caption(media['description'])
                 except Exception:
-                    st.error(f"❌ Could not display image: {img['title']}")
-                    st.markdown(f"🔗 [View directly]({img['url']})")
-    
-    # Display videos
-    if media_by_type['video']:
-        st.markdown("#### 🎥 Videos")
-        for video in media_by_type['video']:
-            try:
-                st.video(video['url'])
-                st.markdown(f"**{video['title']}**")
-                if video['description']:
-                    st.caption(video['description'])
-            except Exception:
-                st.error(f"❌ Could not display video: {video['title']}")
-                st.markdown(f"🔗 [Download video]({video['url']})")
-    
-    # Display audio
-    if media_by_type['audio']:
-        st.markdown("#### 🎵 Audio")
-        for audio in media_by_type['audio']:
-            try:
-                st.audio(audio['url'])
-                st.markdown(f"**{audio['title']}**")
-                if audio['description']:
-                    st.caption(audio['description'])
-            except Exception:
-                st.error(f"❌ Could not play audio: {audio['title']}")
-                st.markdown(f"🔗 [Download audio]({audio['url']})")
+                    st.error(f"❌ Could not display video: {media['title']}")
+                    st.markdown(f"🔗 [Download video]({media['url']})")
+            else:
+                # Display audio
+                if not shown['audio']:
+                    st.markdown("#### 🎵 Audio")
+                try:
+                    st.audio(media['url'])
+                    st.markdown(f"**{media['title']}**")
+                    if media['description']:
+                        st.caption(media['description'])
+                except Exception:
+                    st.error(f"❌ Could not play audio: {media['title']}")
+                    st.markdown(f"🔗 [Download audio]({media['url']})")
+        shown[media_type] += 1
 
 def render_chatbot_interface():
     """Render the chatbot interface in Streamlit"""
@@ -551,6 +718,7 @@ def render_chatbot_interface():
     # Safely initialize session state variables
     try:
         # Initialize chatbot in session state if not already present
+        # (it only holds this session's conversation; the data is in shared_corpus)
         if 'flora_chatbot' not in st.session_state:
             st.session_state.flora_chatbot = FloraFaunaChatbot()
         
@@ -559,6 +727,8 @@ def render_chatbot_interface():
             st.session_state.chatbot_query = ""
         if 'chatbot_response_data' not in st.session_state:
             st.session_state.chatbot_response_data = None
+        if 'chatbot_more_results' not in st.session_state:
+            st.session_state.chatbot_more_results = []
             
         chatbot = st.session_state.flora_chatbot
         
@@ -578,6 +748,8 @@ def render_chatbot_interface():
             placeholder="e.g., 'Show me images from Mumbai' or 'జమ్మి చెట్టు చిత్రాలు'",
             key="chatbot_input"
         )
+        photo = st.file_uploader("📎 Photo to compare (for 'photos similar to this one'):",
+                                 type=['png', 'jpg', 'jpeg', 'gif', 'bmp'], key="chatbot_photo")
         
         col1, col2, col3 = st.columns([1, 1, 2])
         
@@ -587,36 +759,52 @@ def render_chatbot_interface():
         with col2:
             clear_button = st.button("🗑️ Clear")
         
-        # Process query
+        # Process query (streamed below, as the answer is produced)
+        stream = None
         if ask_button and query:
-            with st.spinner("🔍 Searching database..."):
-                try:
-                    response_data = chatbot.process_query_with_media(query)
-                    st.session_state.chatbot_response_data = response_data
-                    st.session_state.chatbot_query = ""
-                except Exception as e:
-                    st.error(f"❌ Error processing query: {str(e)}")
-                    st.session_state.chatbot_response_data = {
-                        'text_response': "Sorry, I encountered an error while processing your query. Please try again or rephrase your question.",
-                        'media_files': []
-                    }
+            stream = chatbot.stream_query_with_media(query, image=photo)
+            st.session_state.chatbot_query = ""
+            st.session_state.chatbot_more_results = []
         
         if clear_button:
             try:
                 st.session_state.chatbot_query = ""
                 st.session_state.chatbot_response_data = None
+                st.session_state.chatbot_more_results = []
                 st.rerun()
             except Exception as e:
                 st.error(f"Error clearing chat: {str(e)}")
     
+    # Stream a new answer: text as soon as the best match is known, then each media file
+    if stream is not None:
+        st.markdown("---")
+        st.markdown("### 🤖 Assistant Response")
+        highlight_terms = chatbot.highlight_terms(query)
+        try:
+            text = stream.text()
+            with st.spinner("🔍 Searching database..."):
+                first_chunk = next(text, "")
+            matcher = AhoCorasick(highlight_terms)
+            st.write_stream(highlight(chunk, matcher) for chunk in itertools.chain([first_chunk], text))
+            render_media_files(stream.media())
+            st.session_state.chatbot_response_data = {'highlight_terms': highlight_terms, **stream.response}
+        except Exception as e:
+            st.error(f"❌ Error processing query: {str(e)}")
+            st.session_state.chatbot_response_data = {
+                'text_response': "Sorry, I encountered an error while processing your query. Please try again or rephrase your question.",
+                'media_files': []
+            }
+            st.markdown(st.session_state.chatbot_response_data['text_response'])
+    
     # Display response with media
     try:
-        if st.session_state.get('chatbot_response_data'):
+        if stream is None and st.session_state.get('chatbot_response_data'):
             response_data = st.session_state.chatbot_response_data
             
             st.markdown("---")
             st.markdown("### 🤖 Assistant Response")
-            st.markdown(response_data['text_response'])
+            highlight_terms = AhoCorasick(response_data.get('highlight_terms', []))
+            st.markdown(highlight(response_data['text_response'], highlight_terms))
             
             # Display related media files
             if response_data.get('media_files'):
@@ -625,6 +813,30 @@ def render_chatbot_interface():
     except Exception as e:
         st.error(f"Error displaying response: {str(e)}")
     
+    # Further matches, a page at a time from the scores kept for this answer
+    try:
+        response_data = st.session_state.get('chatbot_response_data')
+        if response_data:
+            more_results = st.session_state.chatbot_more_results
+            if more_results:
+                st.markdown("### 🔎 More Results")
+            for i, result in enumerate(more_results, PAGE_SIZE + 1):
+                link = result['data'].get('file_url')
+                title = f"[{result['title']}]({link})" if link else result['title']
+                st.markdown(f"**{i}.** {title} · {result['type']} · {result['location']}")
+                description = result.get('description') or ''
+                if description and description != 'No description':
+                    st.caption(description[:100] + "..." if len(description) > 100 else description)
+            
+            cursor = response_data.get('next_cursor')
+            if cursor and st.button("🔽 More results"):
+                page = chatbot.more_results(cursor)
+                more_results.extend(page['results'])
+                response_data['next_cursor'] = page.get('next_cursor')
+                st.rerun()
+    except Exception as e:
+        st.warning(f"Error loading more results: {str(e)}")
+    
     # Conversation history (collapsible)
     try:
         if chatbot.conversation_history:
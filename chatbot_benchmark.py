@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Chatbot Latency Benchmark
+End-to-end question latency of FloraFaunaChatbot on synthetic corpora
+
+For each corpus size a deterministic bilingual corpus (synthetic_corpus) is served
+through a SharedCorpus as in the app, and a fixed mix of English, Telugu and
+transliterated questions is asked through process_query_with_media for a number of
+rounds. Reported per size:
+    build ms         - loading the first snapshot (records, index, ranker)
+    first ms         - the first question, including structures built on first use
+    p50/p95/p99 ms   - latency of every question after that
+    q/s              - questions answered per second of wall time
+    peak MB          - peak traced Python heap (tracemalloc) while loading the corpus
+                       and answering the mix once, in a separate untimed pass
+
+The answer cache is off unless --cache is given, so every question is searched.
+
+Usage:
+    python chatbot_benchmark.py                        # 1k, 10k and 50k records
+    python chatbot_benchmark.py --sizes 100000 --ranking semantic --rounds 3
+"""
+
+import gc
+import sys
+import math
+import time
+import argparse
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from synthetic_corpus import synthetic_records
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+DEFAULT_ROUNDS = 5
+RANKINGS = ['bm25', 'legacy', 'vectorized', 'semantic']
+# English, Telugu, transliterated, media, place, paraphrased and unanswerable questions
+BENCHMARK_QUESTIONS = [
+    "Tell me about the neem tree",
+    "show me neem images",
+    "jammi chettu",
+    "జమ్మి చెట్టు చిత్రాలు",
+    "వేప చెట్టు గురించి చెప్పండి",
+    "peacock videos from Warangal",
+    "banyan tree sounds in mumbai",
+    "medicinal plants near the temple",
+    "నెమలి వీడియోలు",
+    "birds nesting in the branches at dawn",
+    "mamidi",
+    "snow leopard in the himalayas",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """pct-th percentile, interpolating between the closest ranks"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def make_chatbot(df, ranking: str = 'bm25', cache: bool = False):
+    """A chatbot over df (never refreshed), and its corpus"""
+    from chatbot import FloraFaunaChatbot
+    from chatbot_corpus import SharedCorpus
+    from query_cache import QueryResultCache
+
+    corpus = SharedCorpus(lambda: df, ttl=float('inf'))
+    # A zero byte budget caches nothing
+    chatbot = FloraFaunaChatbot(corpus, QueryResultCache() if cache else QueryResultCache(max_bytes=0))
+    chatbot.ranking = ranking
+    return chatbot, corpus
+
+
+def peak_memory_mb(records: List[Dict[str, Any]], questions: List[str], ranking: str = 'bm25',
+                   cache: bool = False) -> float:
+    """Peak traced heap while loading records into a fresh corpus and asking each question once"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        chatbot, corpus = make_chatbot(pd.DataFrame(records), ranking, cache)
+        corpus.get()
+        for question in questions:
+            chatbot.process_query_with_media(question)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def benchmark(size: int, questions: List[str], rounds: int = DEFAULT_ROUNDS, ranking: str = 'bm25',
+              cache: bool = False, seed: int = 0, memory: bool = True) -> Dict[str, Any]:
+    records = synthetic_records(size, seed)
+    chatbot, corpus = make_chatbot(pd.DataFrame(records), ranking, cache)
+
+    start = time.perf_counter()
+    corpus.get()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    chatbot.process_query_with_media(questions[0])
+    first_ms = (time.perf_counter() - start) * 1000
+
+    latencies: List[float] = []
+    answered = 0
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            chatbot.process_query_with_media(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+            answered += chatbot.conversation_history[-1]['results_found'] > 0
+    wall = time.perf_counter() - wall_start
+
+    return {
+        'records': size,
+        'questions': len(latencies),
+        'answered': answered,
+        'build_ms': build_ms,
+        'first_ms': first_ms,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+        'qps': len(latencies) / wall if wall > 0 else 0.0,
+        'peak_mb': peak_memory_mb(records, questions, ranking, cache) if memory else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Benchmark chatbot question latency on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="times the question mix is asked")
+    parser.add_argument("--ranking", choices=RANKINGS, default='bm25')
+    parser.add_argument("--cache", action="store_true", help="answer repeated questions from the answer cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slower) peak memory pass")
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Chatbot Latency Benchmark")
+    print("=" * 50)
+
+    import chatbot
+    if not chatbot.SUPABASE_AVAILABLE or not chatbot.PANDAS_AVAILABLE:
+        print("❌ The chatbot needs supabase_db and pandas importable to serve a corpus")
+        return False
+
+    print(f"{args.ranking} ranking, {len(BENCHMARK_QUESTIONS)} questions x {args.rounds} rounds, "
+          f"answer cache {'on' if args.cache else 'off'}")
+    print(f"\n{'records':>9}{'build ms':>10}{'first ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'q/s':>9}{'peak MB':>9}{'answered':>10}")
+    for size in args.sizes:
+        result = benchmark(size, BENCHMARK_QUESTIONS, args.rounds, args.ranking, args.cache, args.seed,
+                           memory=not args.no_memory)
+        peak = f"{result['peak_mb']:>9.1f}" if result['peak_mb'] is not None else f"{'-':>9}"
+        print(f"{size:>9,}{result['build_ms']:>10.1f}{result['first_ms']:>10.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['qps']:>9.1f}{peak}"
+              f"{result['answered']:>6}/{result['questions']:<3}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
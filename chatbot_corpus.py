@@ -0,0 +1,179 @@
+"""
+Shared Chatbot Corpus
+One process-wide copy of the chatbot's data and search structures
+
+Every Streamlit session used to hold its own FloraFaunaChatbot with its own copy of
+the whole data_entries table and index, so memory grew with the number of users
+and each new session paid a full fetch. The corpus now lives here once per process
+as an immutable CorpusSnapshot (DataFrame, records, SearchIndex, BM25 ranker).
+
+Refresh is copy-on-write: when the snapshot is older than `ttl`, one caller (the
+refresher) builds a new snapshot off to the side while everyone else keeps reading
+the old one, then the reference is swapped. Only the very first load makes callers
+wait. Sessions keep nothing but their conversation. A failed reload (an exception,
+or the empty frame get_all_data returns on a Supabase error) keeps the previous
+snapshot, so one transient error can't empty the corpus for every session.
+
+The semantic (LSA) model is shared across snapshots like the token cache, built on
+first use and refreshed incrementally, and the global corpus keeps it on disk at
+SEMANTIC_INDEX_PATH so a restart doesn't refit it.
+"""
+
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from bm25 import BM25Ranker
+from search_index import SearchIndex
+from token_cache import TokenCache
+
+# Seconds a snapshot is served before a refresh (as the per-session cache did)
+CORPUS_TTL = 300
+SEMANTIC_INDEX_PATH = os.path.join("data", "semantic_index.npz")
+
+
+class CorpusSnapshot:
+    """An immutable view of data_entries and the structures built from it"""
+
+    def __init__(self, df, version: int, token_cache: Optional[TokenCache] = None,
+                 semantic_index: Optional[Callable[[], Any]] = None):
+        self.df = df
+        self.version = version
+        self.loaded_at = time.time()
+        self.records: List[Dict[str, Any]] = df.to_dict('records') if df is not None else []
+        self.search_index = SearchIndex(self.records)
+        if token_cache is not None:
+            # Only rows that are new or changed since the last snapshot are retokenized
+            token_cache.refresh(self.records)
+        self.ranker = BM25Ranker(self.search_index, token_cache=token_cache)
+        self._vector_search = None
+        self._semantic_index = semantic_index
+        self._semantic_search = None
+        self._image_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def vector_search(self):
+        """VectorizedSearch over this snapshot, built on first use"""
+        with self._lock:
+            if self._vector_search is None:
+                from vector_search import VectorizedSearch
+                self._vector_search = VectorizedSearch.from_dataframe(self.df)
+            return self._vector_search
+
+    @property
+    def image_index(self):
+        """SimilarImageIndex of this snapshot's hashed photos, built on first use"""
+        with self._lock:
+            if self._image_index is None:
+                from image_similarity import SimilarImageIndex
+                self._image_index = SimilarImageIndex(self.records)
+            return self._image_index
+
+    @property
+    def semantic_search(self):
+        """SemanticSearch over this snapshot, built on first use from the shared LSA model"""
+        with self._lock:
+            if self._semantic_search is None:
+                if self._semantic_index is not None:
+                    semantic_index = self._semantic_index()
+                else:
+                    from semantic_search import SemanticIndex
+                    semantic_index = SemanticIndex()
+                self._semantic_search = semantic_index.searcher(self.search_index)
+            return self._semantic_search
+
+
+class SharedCorpus:
+    """Process-wide snapshot holder with a single copy-on-write refresher"""
+
+    def __init__(self, loader: Optional[Callable[[], Any]] = None, ttl: float = CORPUS_TTL,
+                 semantic_path: Optional[str] = None):
+        self._loader = loader
+        self.ttl = ttl
+        self.semantic_path = semantic_path
+        self._semantic = None
+        self._semantic_lock = threading.Lock()
+        self._snapshot: Optional[CorpusSnapshot] = None
+        self._refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._token_cache = TokenCache()
+        self._version = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def _load(self):
+        if self._loader is not None:
+            return self._loader()
+        from supabase_db import supabase_manager
+        return supabase_manager.get_all_data()
+
+    def _semantic_index(self):
+        """The shared SemanticIndex, created on first use (NumPy is only imported then)"""
+        with self._semantic_lock:
+            if self._semantic is None:
+                from semantic_search import SemanticIndex
+                self._semantic = SemanticIndex(self.semantic_path)
+            return self._semantic
+
+    def _stale(self, snapshot: Optional[CorpusSnapshot]) -> bool:
+        return snapshot is None or time.time() - self._refreshed_at > self.ttl
+
+    def _refresh(self) -> Optional[CorpusSnapshot]:
+        """Build and publish a new snapshot; the caller holds the refresh lock"""
+        try:
+            df = self._load()
+            if (df is None or len(df) == 0) and self._snapshot is not None and len(self._snapshot):
+                # get_all_data reports errors as an empty frame; don't replace good data with it
+                raise RuntimeError("data_entries came back empty")
+            self._version += 1
+            snapshot = CorpusSnapshot(df, self._version, self._token_cache, self._semantic_index)
+        except Exception:
+            self.failures += 1
+            return self._snapshot
+        # A single reference assignment: readers see the old snapshot or the new one
+        self._snapshot = snapshot
+        self._refreshed_at = time.time()
+        self.refreshes += 1
+        return snapshot
+
+    def get(self) -> Optional[CorpusSnapshot]:
+        """The current snapshot, refreshing it first if it's stale and nobody else is"""
+        snapshot = self._snapshot
+        if not self._stale(snapshot):
+            return snapshot
+        if snapshot is not None:
+            # Stale: one caller refreshes, the rest keep serving the old snapshot meanwhile
+            if not self._refresh_lock.acquire(blocking=False):
+                return snapshot
+        else:
+            # Nothing to serve yet: wait for whoever is loading
+            self._refresh_lock.acquire()
+        try:
+            if self._stale(self._snapshot):
+                return self._refresh()
+            return self._snapshot
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        """Make the next get() refresh (existing readers keep their snapshot)"""
+        self._refreshed_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else 0,
+            'records': len(snapshot) if snapshot else 0,
+            'age_seconds': round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
+
+
+# Global instance shared by all sessions
+shared_corpus = SharedCorpus(semantic_path=SEMANTIC_INDEX_PATH)
@@ -3,6 +3,8 @@ import streamlit as st
 import sys
 import platform
 
+from readiness import check_readiness, STATUS_OK, STATUS_DEGRADED
+
 st.title("🔧 Deployment Compatibility Check")
 
 st.success("✅ Streamlit is working!")
@@ -17,11 +19,24 @@ with col1:
 
 with col2:
     st.subheader("App Status")
-    st.write("**Main App:** ✅ Ready")
-    st.write("**Dependencies:** ✅ Installed")
-    st.write("**Configuration:** ✅ Set")
+    report = check_readiness()
+    icons = {STATUS_OK: "✅", STATUS_DEGRADED: "⚠️"}
+    for name, check in report['checks'].items():
+        detail = ""
+        if 'latency_ms' in check:
+            detail = f" ({check['latency_ms']:.0f} ms)"
+        elif 'depth' in check:
+            detail = f" (depth {check['depth']})"
+        elif 'warm' in check:
+            detail = " (warm)" if check['warm'] else " (cold)"
+        st.write(f"**{name.title()}:** {icons.get(check['status'], '❌')} {check['status']}{detail}")
+        if check.get('error'):
+            st.caption(check['error'])
 
-st.info("🚀 Your app is ready for deployment!")
+if report['status'] == STATUS_OK:
+    st.info("🚀 Your app is ready for deployment!")
+else:
+    st.warning(f"Backend status: {report['status']} - see `python readiness.py` for details")
 
 if st.button("🧪 Test Main App"):
     st.write("Redirecting to main application...")
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Image Similarity
+Perceptual hashes of specimen photos and a BK-tree to find similar ones
+
+Every image gets two 64-bit perceptual hashes, stored as 16-digit hex strings in
+data_entries.metadata under 'image_hash':
+    phash - signs of the lowest 8x8 DCT coefficients of a 32x32 grayscale copy
+            against their median; survives rescaling, recompression and small edits
+    dhash - whether each pixel of a 9x8 grayscale copy is brighter than its right
+            neighbour; cheap, and catches different crops that pHash lets through
+Photos that look alike have hashes a few bits apart. SimilarImageIndex keeps the
+pHashes in a BK-tree (a metric tree over Hamming distance): a lookup within
+distance d only descends into children whose edge distance is within d of the
+query's distance to the node, instead of comparing against every photo.
+
+An upload whose pHash and dHash are both within DUPLICATE_DISTANCE of a saved
+photo is flagged before it is uploaded. Photos saved before hashing existed are
+backfilled by this script.
+
+Usage:
+    python image_similarity.py                # dry run: count photos without hashes
+    python image_similarity.py --apply        # download, hash and store them
+"""
+
+import io
+import sys
+import json
+import math
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+METADATA_KEY = 'image_hash'
+# Hamming distance (of 64 bits) up to which a photo counts as similar / as a duplicate
+SIMILAR_DISTANCE = 12
+DUPLICATE_DISTANCE = 6
+
+_DCT_SIZE = 32
+_HASH_SIZE = 8
+# Rows of the DCT-II basis for the lowest frequencies; pHash only needs those
+_DCT_BASIS = [[math.cos(math.pi * (2 * n + 1) * k / (2 * _DCT_SIZE)) for n in range(_DCT_SIZE)]
+              for k in range(_HASH_SIZE)]
+
+Hashes = Tuple[int, int]
+
+
+def _open_image(source):
+    """PIL image from bytes, a path, a StoredUpload or a file-like upload"""
+    from PIL import Image
+
+    if isinstance(source, (bytes, bytearray)):
+        return Image.open(io.BytesIO(source))
+    if hasattr(source, 'read'):
+        source.seek(0)
+        data = source.read()
+        # Leave Streamlit's UploadedFile readable for the upload that follows
+        source.seek(0)
+        return Image.open(io.BytesIO(data))
+    return Image.open(getattr(source, 'path', source))
+
+
+def _pixels(image, width: int, height: int) -> List[List[int]]:
+    from PIL import Image
+
+    small = image.convert('L').resize((width, height), Image.LANCZOS)
+    values = list(small.tobytes())
+    return [values[row * width:(row + 1) * width] for row in range(height)]
+
+
+def dhash(image) -> int:
+    bits = 0
+    for row in _pixels(image, _HASH_SIZE + 1, _HASH_SIZE):
+        for left, right in zip(row, row[1:]):
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def phash(image) -> int:
+    pixels = _pixels(image, _DCT_SIZE, _DCT_SIZE)
+    # Separable 2-D DCT, keeping only the 8 x 8 lowest frequencies
+    columns = [[sum(basis[n] * row[n] for n in range(_DCT_SIZE)) for basis in _DCT_BASIS] for row in pixels]
+    low = [[sum(basis[m] * columns[m][v] for m in range(_DCT_SIZE)) for v in range(_HASH_SIZE)]
+           for basis in _DCT_BASIS]
+    values = [value for row in low for value in row]
+    median = sorted(values)[len(values) // 2]
+    bits = 0
+    for value in values:
+        bits = (bits << 1) | (value > median)
+    return bits
+
+
+def image_hashes(source) -> Optional[Dict[str, str]]:
+    """{'phash', 'dhash'} as hex for an image, or None without Pillow or for undecodable data"""
+    try:
+        with _open_image(source) as image:
+            return {'phash': f"{phash(image):016x}", 'dhash': f"{dhash(image):016x}"}
+    except Exception:
+        return None
+
+
+def decoded_size(source) -> int:
+    """Bytes a full decode of the image takes (width x height x bands), from its header; 0 if unreadable"""
+    try:
+        with _open_image(source) as image:
+            return image.width * image.height * len(image.getbands())
+    except Exception:
+        return 0
+
+
+def parse_hashes(value) -> Optional[Hashes]:
+    """(phash, dhash) from an image_hash dict or a record's metadata (dict or JSON text)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if not isinstance(value, dict):
+        return None
+    value = value.get(METADATA_KEY, value)
+    try:
+        return int(value['phash'], 16), int(value['dhash'], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree of 64-bit hashes under Hamming distance"""
+
+    def __init__(self):
+        # Node: [hash, items with that hash, {edge distance: child}]
+        self.root: Optional[list] = None
+        self.size = 0
+        self.last_visited = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, value: int, item: Any):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """(distance, item) for every item within max_distance, nearest first"""
+        found: List[Tuple[int, Any]] = []
+        stack = [self.root] if self.root is not None else []
+        visited = 0
+        while stack:
+            node = stack.pop()
+            visited += 1
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children at edge distance within max_distance can hold matches
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        self.last_visited = visited
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class SimilarImageIndex:
+    """BK-tree over the pHashes of saved photos, with their dHashes for duplicate checks"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self.tree = BKTree()
+        # record id -> {'id', 'title', 'file_url', 'description', 'phash', 'dhash'}
+        self.photos: Dict[Any, Dict[str, Any]] = {}
+        # Shared by all sessions: refreshes and lookups don't interleave
+        self._lock = threading.Lock()
+        self.refresh(records)
+
+    def __len__(self) -> int:
+        return len(self.photos)
+
+    def refresh(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Index the hashed photos among records; the tree is rebuilt only if photos changed or went away"""
+        photos = {}
+        for data in records:
+            if data.get('entry_type', 'image') != 'image' or data.get('id') is None:
+                continue
+            hashes = parse_hashes(data.get('metadata'))
+            if hashes is None:
+                continue
+            # The description lives in metadata unless the caller flattened it into a column
+            description = data.get('description') or _metadata(data).get('description')
+            photos[data['id']] = {
+                'id': data['id'],
+                'title': data.get('title') or 'Unknown',
+                'file_url': data.get('file_url'),
+                'description': description if isinstance(description, str) else '',
+                'phash': hashes[0],
+                'dhash': hashes[1],
+            }
+
+        with self._lock:
+            stale = [record_id for record_id, photo in self.photos.items()
+                     if record_id not in photos or photos[record_id]['phash'] != photo['phash']]
+            if stale:
+                self.tree, self.photos = BKTree(), {}
+            added = 0
+            for record_id, photo in photos.items():
+                if record_id not in self.photos:
+                    self.tree.add(photo['phash'], record_id)
+                    added += 1
+            self.photos = photos
+        return {'added': added, 'rebuilt': int(bool(stale)), 'photos': len(photos)}
+
+    def similar(self, hashes: Hashes, max_distance: int = SIMILAR_DISTANCE, limit: Optional[int] = 10,
+                exclude: Any = None) -> List[Dict[str, Any]]:
+        """Saved photos whose pHash is within max_distance of hashes, nearest first"""
+        matches = []
+        with self._lock:
+            for distance, record_id in self.tree.search(hashes[0], max_distance):
+                if record_id == exclude:
+                    continue
+                photo = self.photos[record_id]
+                matches.append(dict(photo, distance=distance, dhash_distance=hamming(hashes[1], photo['dhash'])))
+        return matches[:limit] if limit is not None else matches
+
+    def similar_to(self, record_id: Any, max_distance: int = SIMILAR_DISTANCE,
+                   limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            photo = self.photos.get(record_id)
+        if photo is None:
+            return []
+        return self.similar((photo['phash'], photo['dhash']), max_distance, limit, exclude=record_id)
+
+    def duplicates(self, hashes: Hashes, max_distance: int = DUPLICATE_DISTANCE) -> List[Dict[str, Any]]:
+        """Saved photos that both hashes place within max_distance"""
+        return [match for match in self.similar(hashes, max_distance, limit=None)
+                if match['dhash_distance'] <= max_distance]
+
+
+def _metadata(row: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = row.get('metadata') or {}
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            metadata = {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def iter_unhashed_images(client, batch_size: int = 50) -> Iterator[List[Dict[str, Any]]]:
+    """Batches of image entries with a file_url but no image_hash in their metadata"""
+    last_id = 0
+    while True:
+        # Keyset paging: hashed rows leave the filter, so offsets would skip entries
+        response = (client.table("data_entries")
+                    .select("id, file_url, metadata")
+                    .eq("entry_type", "image")
+                    .not_.is_("file_url", "null")
+                    .is_(f"metadata->{METADATA_KEY}", "null")
+                    .gt("id", last_id)
+                    .order("id")
+                    .limit(batch_size)
+                    .execute())
+        rows = response.data or []
+        if not rows:
+            break
+        yield [row for row in rows if METADATA_KEY not in _metadata(row)]
+        last_id = rows[-1]['id']
+        if len(rows) < batch_size:
+            break
+
+
+def hash_stored_image(client, row: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Download one entry's image and store its hashes in its metadata; returns them"""
+    from supabase_db import parse_storage_url
+    from rate_limiter import rate_limiter, STORAGE_READ
+    from upload_stream import memory_budget
+
+    location = parse_storage_url(row.get('file_url'))
+    if location is None:
+        return None
+    bucket, path = location
+    metadata = _metadata(row)
+    with memory_budget.reserve(int(metadata.get('file_size') or 0)):
+        data = rate_limiter.call(STORAGE_READ, client.storage.from_(bucket).download, path)
+        hashes = image_hashes(data)
+    if hashes is None:
+        return None
+    client.table("data_entries").update({'metadata': dict(metadata, **{METADATA_KEY: hashes})}) \
+        .eq("id", row['id']).execute()
+    return hashes
+
+
+def backfill(client, apply: bool = False, batch_size: int = 50, max_workers: int = 4) -> Dict[str, Any]:
+    """Hash every unhashed image (or only count them on a dry run)"""
+    report = {'candidates': 0, 'hashed': 0, 'failed': 0, 'errors': []}
+
+    def hash_one(row):
+        try:
+            return hash_stored_image(client, row) is not None, None
+        except Exception as e:
+            return False, f"{row['id']}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for rows in iter_unhashed_images(client, batch_size):
+            report['candidates'] += len(rows)
+            if not apply:
+                continue
+            for hashed, error in executor.map(hash_one, rows):
+                report['hashed' if hashed else 'failed'] += 1
+                if error:
+                    report['errors'].append(error)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Backfill perceptual hashes of saved images")
+    parser.add_argument("--apply", action="store_true", help="Hash and store (default is a dry run)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Image Hash Backfill")
+    print("=" * 50)
+
+    from supabase_db import supabase_manager
+    if not supabase_manager.is_available():
+        print("❌ Supabase not available. Check SUPABASE_URL and SUPABASE_ANON_KEY")
+        return False
+
+    try:
+        report = backfill(supabase_manager.supabase, apply=args.apply,
+                          batch_size=args.batch_size, max_workers=args.workers)
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+
+    for error in report['errors']:
+        print(f"   ❌ {error}")
+    print("=" * 50)
+    if args.apply:
+        print(f"✅ Hashed {report['hashed']} of {report['candidates']} images ({report['failed']} failed)")
+    else:
+        print(f"💡 Dry run: {report['candidates']} images without hashes. Re-run with --apply to hash them")
+    return not report['failed']
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,14 @@
+-- Baseline schema for collected flora and fauna entries
+CREATE TABLE IF NOT EXISTS data_entries (
+    id SERIAL PRIMARY KEY,
+    entry_type VARCHAR(20) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    content TEXT,
+    file_path VARCHAR(500),
+    file_url VARCHAR(500),
+    location_lat DECIMAL(10, 8),
+    location_lng DECIMAL(11, 8),
+    location_name VARCHAR(255),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata JSONB
+);
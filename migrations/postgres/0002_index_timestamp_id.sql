@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+-- Serves get_all_data's ORDER BY timestamp DESC (id breaks ties for stable paging)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_data_entries_timestamp_id
+    ON data_entries (timestamp DESC, id);
@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+-- Serves per-type filters and counts
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_data_entries_entry_type
+    ON data_entries (entry_type);
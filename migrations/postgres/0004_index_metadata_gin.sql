@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+-- Serves containment queries on metadata (e.g. metadata @> '{"category": "Photos"}')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_data_entries_metadata
+    ON data_entries USING GIN (metadata);
@@ -0,0 +1,4 @@
+-- SHA-256 of the uploaded bytes (or text content), hex encoded
+ALTER TABLE data_entries ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS idx_data_entries_content_hash
+    ON data_entries (content_hash);
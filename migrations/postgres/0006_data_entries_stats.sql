@@ -0,0 +1,74 @@
+-- Summary tables kept current by triggers so dashboard counters are a small lookup
+CREATE TABLE IF NOT EXISTS data_entries_stats (
+    entry_type VARCHAR(20) PRIMARY KEY,
+    entry_count BIGINT NOT NULL DEFAULT 0,
+    total_bytes BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS data_entries_daily_stats (
+    day DATE NOT NULL,
+    entry_type VARCHAR(20) NOT NULL,
+    entry_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, entry_type)
+);
+
+-- metadata.file_size as bytes (0 when missing or not an integer)
+CREATE OR REPLACE FUNCTION data_entries_size(entry_metadata JSONB) RETURNS BIGINT AS $$
+    SELECT CASE
+        WHEN entry_metadata->>'file_size' ~ '^[0-9]+$' THEN (entry_metadata->>'file_size')::BIGINT
+        ELSE 0
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION data_entries_stats_apply(
+    p_entry_type VARCHAR, p_day DATE, p_count BIGINT, p_bytes BIGINT
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+    VALUES (p_entry_type, p_count, p_bytes)
+    ON CONFLICT (entry_type) DO UPDATE SET
+        entry_count = data_entries_stats.entry_count + EXCLUDED.entry_count,
+        total_bytes = data_entries_stats.total_bytes + EXCLUDED.total_bytes,
+        updated_at = CURRENT_TIMESTAMP;
+
+    INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+    VALUES (COALESCE(p_day, CURRENT_DATE), p_entry_type, p_count)
+    ON CONFLICT (day, entry_type) DO UPDATE SET
+        entry_count = data_entries_daily_stats.entry_count + EXCLUDED.entry_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- SECURITY DEFINER so inserts through the anon key can maintain the summary; the pinned
+-- search_path stops a caller's own schema or temp objects shadowing the tables it writes
+CREATE OR REPLACE FUNCTION data_entries_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM data_entries_stats_apply(
+            OLD.entry_type, OLD.timestamp::DATE, -1, -data_entries_size(OLD.metadata));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM data_entries_stats_apply(
+            NEW.entry_type, NEW.timestamp::DATE, 1, data_entries_size(NEW.metadata));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Block writers while backfilling so no row is counted twice or missed
+LOCK TABLE data_entries IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS data_entries_stats_maintain ON data_entries;
+CREATE TRIGGER data_entries_stats_maintain
+    AFTER INSERT OR UPDATE OR DELETE ON data_entries
+    FOR EACH ROW EXECUTE FUNCTION data_entries_stats_trigger();
+
+DELETE FROM data_entries_stats;
+INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+    SELECT entry_type, COUNT(*), COALESCE(SUM(data_entries_size(metadata)), 0)
+    FROM data_entries GROUP BY entry_type;
+
+DELETE FROM data_entries_daily_stats;
+INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+    SELECT COALESCE(timestamp::DATE, CURRENT_DATE), entry_type, COUNT(*)
+    FROM data_entries GROUP BY 1, 2;
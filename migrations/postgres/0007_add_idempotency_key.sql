@@ -0,0 +1,2 @@
+-- Client-generated key for one logical save; repeated saves resolve to the same row
+ALTER TABLE data_entries ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+-- Unique, so a concurrent duplicate insert fails instead of creating a second row (NULLs allowed)
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_data_entries_idempotency_key
+    ON data_entries (idempotency_key);
@@ -0,0 +1,21 @@
+-- Access tracking for storage tiering: objects not accessed recently move to the cold bucket
+ALTER TABLE data_entries ADD COLUMN IF NOT EXISTS storage_tier VARCHAR(10) NOT NULL DEFAULT 'hot';
+ALTER TABLE data_entries ADD COLUMN IF NOT EXISTS access_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE data_entries ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_data_entries_tier_last_accessed
+    ON data_entries (storage_tier, last_accessed_at);
+
+-- Called with a batch of ids buffered by the app (SupabaseManager.record_access); SECURITY
+-- DEFINER with a pinned search_path, like the stats trigger in 0006
+CREATE OR REPLACE FUNCTION record_entry_access(entry_ids INTEGER[]) RETURNS void AS $$
+    UPDATE data_entries
+    SET access_count = access_count + 1, last_accessed_at = CURRENT_TIMESTAMP
+    WHERE id = ANY(entry_ids);
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Access bumps and tier moves must not rewrite the summary rows from 0006
+DROP TRIGGER IF EXISTS data_entries_stats_maintain ON data_entries;
+CREATE TRIGGER data_entries_stats_maintain
+    AFTER INSERT OR DELETE OR UPDATE OF entry_type, timestamp, metadata ON data_entries
+    FOR EACH ROW EXECUTE FUNCTION data_entries_stats_trigger();
@@ -0,0 +1,3 @@
+-- Serves get_all_data's ORDER BY timestamp DESC (id breaks ties for stable paging)
+CREATE INDEX IF NOT EXISTS idx_data_entries_timestamp_id
+    ON data_entries (timestamp DESC, id);
@@ -0,0 +1,3 @@
+-- Serves per-type filters and counts
+CREATE INDEX IF NOT EXISTS idx_data_entries_entry_type
+    ON data_entries (entry_type);
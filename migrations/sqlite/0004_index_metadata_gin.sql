@@ -0,0 +1,3 @@
+-- SQLite has no GIN indexes; index the metadata key the app filters on instead
+CREATE INDEX IF NOT EXISTS idx_data_entries_metadata_category
+    ON data_entries (json_extract(metadata, '$.category'));
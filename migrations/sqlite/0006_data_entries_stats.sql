@@ -0,0 +1,85 @@
+-- Summary tables kept current by triggers so dashboard counters are a small lookup
+CREATE TABLE IF NOT EXISTS data_entries_stats (
+    entry_type VARCHAR(20) PRIMARY KEY,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS data_entries_daily_stats (
+    day DATE NOT NULL,
+    entry_type VARCHAR(20) NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, entry_type)
+);
+
+-- One place for the triggers to compute (day, bytes) for a row
+CREATE VIEW IF NOT EXISTS data_entries_sized AS
+    SELECT id, entry_type,
+        COALESCE(substr(timestamp, 1, 10), date('now')) AS day,
+        CASE
+            WHEN json_valid(metadata) THEN COALESCE(CAST(json_extract(metadata, '$.file_size') AS INTEGER), 0)
+            ELSE 0
+        END AS bytes
+    FROM data_entries;
+
+CREATE TRIGGER IF NOT EXISTS data_entries_stats_insert AFTER INSERT ON data_entries
+BEGIN
+    INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+        SELECT entry_type, 1, bytes FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (entry_type) DO UPDATE SET
+            entry_count = entry_count + excluded.entry_count,
+            total_bytes = total_bytes + excluded.total_bytes,
+            updated_at = CURRENT_TIMESTAMP;
+    INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+        SELECT day, entry_type, 1 FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (day, entry_type) DO UPDATE SET entry_count = entry_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_entries_stats_delete BEFORE DELETE ON data_entries
+BEGIN
+    UPDATE data_entries_stats SET
+        entry_count = entry_count - 1,
+        total_bytes = total_bytes - (SELECT bytes FROM data_entries_sized WHERE id = OLD.id),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE entry_type = OLD.entry_type;
+    UPDATE data_entries_daily_stats SET entry_count = entry_count - 1
+    WHERE entry_type = OLD.entry_type
+        AND day = (SELECT day FROM data_entries_sized WHERE id = OLD.id);
+END;
+
+-- An update is a delete of the old row followed by an insert of the new one
+CREATE TRIGGER IF NOT EXISTS data_entries_stats_update_old BEFORE UPDATE ON data_entries
+BEGIN
+    UPDATE data_entries_stats SET
+        entry_count = entry_count - 1,
+        total_bytes = total_bytes - (SELECT bytes FROM data_entries_sized WHERE id = OLD.id),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE entry_type = OLD.entry_type;
+    UPDATE data_entries_daily_stats SET entry_count = entry_count - 1
+    WHERE entry_type = OLD.entry_type
+        AND day = (SELECT day FROM data_entries_sized WHERE id = OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_entries_stats_update_new AFTER UPDATE ON data_entries
+BEGIN
+    INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+        SELECT entry_type, 1, bytes FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (entry_type) DO UPDATE SET
+            entry_count = entry_count + excluded.entry_count,
+            total_bytes = total_bytes + excluded.total_bytes,
+            updated_at = CURRENT_TIMESTAMP;
+    INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+        SELECT day, entry_type, 1 FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (day, entry_type) DO UPDATE SET entry_count = entry_count + 1;
+END;
+
+DELETE FROM data_entries_stats;
+INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+    SELECT entry_type, COUNT(*), COALESCE(SUM(bytes), 0)
+    FROM data_entries_sized GROUP BY entry_type;
+
+DELETE FROM data_entries_daily_stats;
+INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+    SELECT day, entry_type, COUNT(*)
+    FROM data_entries_sized GROUP BY day, entry_type;
@@ -0,0 +1,18 @@
+-- Client-generated key for one logical save; repeated saves resolve to the same row
+ALTER TABLE data_entries ADD COLUMN idempotency_key VARCHAR(64);
+
+-- Local journal of in-progress saves, used to skip repeated uploads and repair half-completed saves
+CREATE TABLE IF NOT EXISTS save_outbox (
+    idempotency_key VARCHAR(64) PRIMARY KEY,
+    state VARCHAR(20) NOT NULL,
+    data_type VARCHAR(20) NOT NULL,
+    bucket VARCHAR(50),
+    object_name VARCHAR(500),
+    file_url VARCHAR(500),
+    record TEXT,
+    record_id INTEGER,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_save_outbox_state ON save_outbox (state, updated_at);
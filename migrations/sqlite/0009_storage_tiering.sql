@@ -0,0 +1,36 @@
+-- Access tracking for storage tiering: objects not accessed recently move to the cold bucket
+ALTER TABLE data_entries ADD COLUMN storage_tier VARCHAR(10) NOT NULL DEFAULT 'hot';
+ALTER TABLE data_entries ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE data_entries ADD COLUMN last_accessed_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_data_entries_tier_last_accessed
+    ON data_entries (storage_tier, last_accessed_at);
+
+-- Access bumps and tier moves must not rewrite the summary rows from 0006
+DROP TRIGGER IF EXISTS data_entries_stats_update_old;
+DROP TRIGGER IF EXISTS data_entries_stats_update_new;
+
+CREATE TRIGGER data_entries_stats_update_old BEFORE UPDATE OF entry_type, timestamp, metadata ON data_entries
+BEGIN
+    UPDATE data_entries_stats SET
+        entry_count = entry_count - 1,
+        total_bytes = total_bytes - (SELECT bytes FROM data_entries_sized WHERE id = OLD.id),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE entry_type = OLD.entry_type;
+    UPDATE data_entries_daily_stats SET entry_count = entry_count - 1
+    WHERE entry_type = OLD.entry_type
+        AND day = (SELECT day FROM data_entries_sized WHERE id = OLD.id);
+END;
+
+CREATE TRIGGER data_entries_stats_update_new AFTER UPDATE OF entry_type, timestamp, metadata ON data_entries
+BEGIN
+    INSERT INTO data_entries_stats (entry_type, entry_count, total_bytes)
+        SELECT entry_type, 1, bytes FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (entry_type) DO UPDATE SET
+            entry_count = entry_count + excluded.entry_count,
+            total_bytes = total_bytes + excluded.total_bytes,
+            updated_at = CURRENT_TIMESTAMP;
+    INSERT INTO data_entries_daily_stats (day, entry_type, entry_count)
+        SELECT day, entry_type, 1 FROM data_entries_sized WHERE id = NEW.id
+        ON CONFLICT (day, entry_type) DO UPDATE SET entry_count = entry_count + 1;
+END;
@@ -0,0 +1,101 @@
+"""
+Character Trigram Index
+Fuzzy term lookup for spelling and transliteration variants
+
+Every vocabulary term is indexed under the character trigrams of its padded
+spelling ("  jammi " -> "  j", " ja", "jam", "amm", "mmi", "mi "), and a Telugu
+term is indexed a second time under its Latin transliteration, so "jammi",
+"jami" and "జమ్మి" land close together. A lookup counts shared trigrams through
+the posting lists of the query's own trigrams - only terms sharing at least one
+trigram are ever touched - and keeps those whose Jaccard or Dice similarity
+clears the threshold.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from transliterate import has_telugu, to_latin
+
+JACCARD = 'jaccard'
+DICE = 'dice'
+DEFAULT_THRESHOLD = 0.4
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def spellings(word: str) -> Set[str]:
+    """The word and, for Telugu, its Latin transliteration"""
+    forms = {word}
+    if has_telugu(word):
+        forms.add(to_latin(word))
+    return forms
+
+
+def similarity(shared: int, size_a: int, size_b: int, measure: str = JACCARD) -> float:
+    if measure == DICE:
+        return 2 * shared / (size_a + size_b)
+    return shared / (size_a + size_b - shared)
+
+
+class TrigramIndex:
+    """Trigram -> spelling posting lists over a term vocabulary"""
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        # Per indexed spelling: the vocabulary term it belongs to and its trigram count
+        self.form_terms: List[str] = []
+        self.form_sizes: List[int] = []
+        self._forms: Set[Tuple[str, str]] = set()
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self.form_terms)
+
+    def add(self, term: str):
+        for form in spellings(term):
+            if (term, form) in self._forms:
+                continue
+            self._forms.add((term, form))
+            grams = trigrams(form)
+            form_id = len(self.form_terms)
+            self.form_terms.append(term)
+            self.form_sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(form_id)
+
+    def containing(self, fragment: str) -> Set[str]:
+        """Vocabulary terms with fragment (3+ characters) as a substring"""
+        grams = [fragment[i:i + 3] for i in range(len(fragment) - 2)]
+        if not grams:
+            return set()
+        # Every trigram inside the fragment is a trigram of a term containing it
+        candidates = None
+        for gram in sorted(grams, key=lambda gram: len(self.postings.get(gram, ()))):
+            form_ids = set(self.postings.get(gram, ()))
+            candidates = form_ids if candidates is None else candidates & form_ids
+            if not candidates:
+                return set()
+        return {self.form_terms[form_id] for form_id in candidates if fragment in self.form_terms[form_id]}
+
+    def similar(self, word: str, threshold: float = DEFAULT_THRESHOLD, measure: str = JACCARD,
+                limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Vocabulary terms whose spelling (in either script) is similar to word, best first"""
+        best: Dict[str, float] = {}
+        for form in spellings(word):
+            grams = trigrams(form)
+            shared: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for form_id in self.postings.get(gram, ()):
+                    shared[form_id] += 1
+            for form_id, count in shared.items():
+                score = similarity(count, len(grams), self.form_sizes[form_id], measure)
+                if score >= threshold:
+                    term = self.form_terms[form_id]
+                    if score > best.get(term, 0.0):
+                        best[term] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,122 @@
+"""
+Chatbot Query Cache
+Process-wide LRU of chatbot answers, bounded by bytes
+
+Questions are heavily skewed toward a few dozen species, and answering one means
+keyword expansion, ranking and response generation. Answers are cached under the
+normalized keyword set (which includes the whole lowercased question, so answers
+that quote it stay correct) and the ranking mode, and tagged with the corpus
+snapshot version they were computed from. As soon as a newer version is seen the
+older answers are dropped, so a corpus refresh invalidates the cache.
+
+Entries are sized by their JSON encoding and the least recently used ones are
+evicted once the total passes the byte budget. The budget can be set in
+.streamlit/secrets.toml with QUERY_CACHE_MB.
+"""
+
+import os
+import copy
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+DEFAULT_QUERY_CACHE_BYTES = 16 * 1024 * 1024
+
+
+def query_key(keywords: Iterable[str], ranking: str = '') -> Tuple:
+    """Order- and case-insensitive key for a keyword set"""
+    return (ranking, tuple(sorted({" ".join(keyword.lower().split()) for keyword in keywords})))
+
+
+def estimate_size(value: Any) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+class QueryResultCache:
+    """Thread-safe LRU with a byte budget and corpus-version invalidation"""
+
+    def __init__(self, max_bytes: int = DEFAULT_QUERY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'oversized': 0}
+
+    @classmethod
+    def from_secrets(cls) -> "QueryResultCache":
+        try:
+            import streamlit as st
+            limit_mb = st.secrets.get("QUERY_CACHE_MB")
+        except Exception:
+            limit_mb = None
+        limit_mb = limit_mb or os.environ.get("QUERY_CACHE_MB")
+        return cls(int(float(limit_mb) * 1024 * 1024) if limit_mb else DEFAULT_QUERY_CACHE_BYTES)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _current(self, version: int) -> bool:
+        """Move to a newer corpus version (dropping everything cached for older ones);
+        False for a version older than the current one"""
+        if self.version is None or version > self.version:
+            if self._entries:
+                self._stats['invalidations'] += 1
+            self._entries.clear()
+            self.bytes = 0
+            self.version = version
+        return version == self.version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """A copy of the cached value for key at this corpus version, or None"""
+        with self._lock:
+            entry = self._entries.get(key) if self._current(version) else None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            value = entry[0]
+        # Callers may annotate what they get back; keep the cached copy pristine
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, version: int, value: Any):
+        size = estimate_size(value)
+        with self._lock:
+            if not self._current(version):
+                # Computed from a snapshot that has since been replaced
+                return
+            if size > self.max_bytes:
+                self._stats['oversized'] += 1
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (copy.deepcopy(value), size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'version': self.version,
+            }
+
+
+# Global instance shared by all sessions
+query_cache = QueryResultCache.from_secrets()
@@ -0,0 +1,110 @@
+"""
+Ranked Search Results
+The scored matches of one query, ranked and turned into results a page at a time
+
+Scoring a query leaves one number per matching record. Building a result item
+copies the record, cuts a combined_text preview and explains the match, which is
+wasted on every match past the ones shown. RankedResults keeps only the
+(record_id, score) pairs and selects the best ones when a page is asked for:
+
+    ranked = index.rank(query, keywords)
+    ranked.page(0, 10)       -> results 1-10 (search_database's shape)
+    ranked.page(10, 10)      -> results 11-20, from the same scores
+
+The pairs go into a heap built once (O(n)) and popped as deep as the deepest page
+requested, so a page of k costs O(k log n) and nothing is scored twice. Only the
+records on the page are materialized. Ties keep record order, as the row-by-row
+scan did.
+
+RankedArray does the same for scores held in NumPy arrays (VectorizedSearch,
+SemanticSearch), selecting with argpartition instead of a heap.
+
+A ranking kept for later pages is detach()ed: it holds only ids and scores, not the
+materializer (which refers to the snapshot it was scored on), and each later page is
+materialized by the current snapshot's ranker.materializer(query, keywords).
+"""
+
+import heapq
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# (record_id, score) -> one entry of search_database's 'results' list
+Materialize = Callable[[int, Any], Dict[str, Any]]
+
+
+class RankedResults:
+    """Best-first view over record_id -> score, materialized on demand"""
+
+    def __init__(self, scores: Dict[int, Any], materialize: Materialize, total: int,
+                 keywords: Optional[List[str]] = None):
+        self.scores = scores
+        self.total = total
+        self.keywords = keywords or []
+        self._materialize = materialize
+        self._heap: Optional[List[Tuple[Any, int]]] = None
+        # (record_id, score) popped so far, best first
+        self._ranked: List[Tuple[int, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _extend(self, count: int):
+        if self._heap is None:
+            self._heap = [(-score, record_id) for record_id, score in self.scores.items()]
+            heapq.heapify(self._heap)
+        while len(self._ranked) < count:
+            negative, record_id = heapq.heappop(self._heap)
+            self._ranked.append((record_id, -negative))
+
+    def top(self, count: int) -> List[Tuple[int, Any]]:
+        """The best count (record_id, score) pairs, best first"""
+        count = min(count, len(self))
+        if len(self._ranked) < count:
+            self._extend(count)
+        return self._ranked[:count]
+
+    def detach(self) -> "RankedResults":
+        """Drop the materializer, so keeping the ranking doesn't keep its snapshot alive"""
+        self._materialize = None
+        return self
+
+    def page(self, offset: int = 0, limit: int = 10, materialize: Optional[Materialize] = None) -> Dict[str, Any]:
+        """Results offset+1 .. offset+limit in the shape FloraFaunaChatbot.search_database returns"""
+        found = len(self)
+        materialize = materialize or self._materialize
+        results = [materialize(record_id, score) for record_id, score in self.top(offset + limit)[offset:]]
+        return {
+            'found_items': found,
+            'results': results,
+            'total_items': self.total,
+            'keywords_used': self.keywords,
+            'message': f"Found {found} relevant items from {self.total} total records.",
+            'offset': offset,
+            # Where the next page starts, or None after the last one
+            'next_offset': offset + limit if offset + limit < found else None
+        }
+
+
+class RankedArray(RankedResults):
+    """RankedResults over parallel NumPy arrays of record ids and scores"""
+
+    def __init__(self, record_ids, scores, materialize: Materialize, total: int,
+                 keywords: Optional[List[str]] = None):
+        super().__init__({}, materialize, total, keywords)
+        self.record_ids = record_ids
+        self.array_scores = scores
+
+    def __len__(self) -> int:
+        return len(self.record_ids)
+
+    def _extend(self, count: int):
+        import numpy as np
+
+        # Select at least twice what's ranked so far, so deep paging isn't O(n) per page
+        count = min(len(self), max(count, 2 * len(self._ranked)))
+        negative = -self.array_scores
+        chosen = np.arange(len(self))
+        if count < len(self):
+            # Everything scoring at least the count-th best, so ties at the cut keep record order
+            chosen = np.flatnonzero(negative <= np.partition(negative, count - 1)[count - 1])
+        order = chosen[np.lexsort((self.record_ids[chosen], negative[chosen]))][:count]
+        self._ranked = list(zip(self.record_ids[order].tolist(), self.array_scores[order].tolist()))
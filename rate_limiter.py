@@ -0,0 +1,213 @@
+"""
+Client-side Rate Limiting
+Token buckets per Supabase endpoint class, shared by every session in the process
+
+Each endpoint class (REST, storage upload, storage read) has its own bucket that
+refills at `rate` tokens per second up to `capacity`. Callers wait in FIFO order, so
+a session running a bulk upload can't starve other sessions' requests. A 429 response
+pauses the whole bucket for the server's Retry-After (or an exponential backoff),
+then the call is retried.
+
+Limits can be overridden in .streamlit/secrets.toml:
+    [RATE_LIMITS]
+    storage_upload = { rate = 5, capacity = 10 }
+"""
+
+import time
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+REST = "rest"
+STORAGE_UPLOAD = "storage_upload"
+STORAGE_READ = "storage_read"
+
+# Requests per second and burst size for each endpoint class
+DEFAULT_LIMITS = {
+    REST: {'rate': 20.0, 'capacity': 40},
+    STORAGE_UPLOAD: {'rate': 5.0, 'capacity': 10},
+    STORAGE_READ: {'rate': 20.0, 'capacity': 40},
+}
+# Wait before retrying a 429 that carries no Retry-After header (doubles per retry)
+DEFAULT_RETRY_AFTER = 1.0
+MAX_RETRY_AFTER = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """Still rate limited after the configured number of retries"""
+
+
+class TokenBucket:
+    """Token bucket with first-come first-served waiting"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"token bucket needs rate > 0 and capacity >= 1, got rate={rate}, capacity={capacity}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        self._issued = 0
+        self._serving = 0
+        # Tickets whose callers gave up while waiting; skipped when their turn comes
+        self._abandoned = set()
+        self.waited = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _advance(self):
+        """Hand the turn to the next waiting ticket; the caller holds the condition"""
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+        self._condition.notify_all()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until the tokens are available; returns seconds waited"""
+        if tokens > self.capacity:
+            # The bucket never holds more than capacity, so this would wait forever
+            raise ValueError(f"can't acquire {tokens} tokens from a bucket of capacity {self.capacity:g}")
+        with self._condition:
+            ticket = self._issued
+            self._issued += 1
+            try:
+                start = self._clock()
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    if ticket == self._serving:
+                        delay = max(self._paused_until - now, (tokens - self._tokens) / self.rate, 0.0)
+                        if delay == 0.0:
+                            self._tokens -= tokens
+                            self._advance()
+                            waited = now - start
+                            self.waited += waited
+                            return waited
+                    else:
+                        # Not our turn yet: the caller ahead of us wakes us when it's served
+                        delay = None
+                    self._condition.wait(delay)
+            except BaseException:
+                # Interrupted while waiting: give up the turn so the callers behind aren't stuck
+                if ticket == self._serving:
+                    self._advance()
+                elif ticket > self._serving:
+                    self._abandoned.add(ticket)
+                raise
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds`, e.g. for a server's Retry-After"""
+        with self._condition:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Requests already admitted count against the server's window; start refilling from empty
+            self._refill(now)
+            self._tokens = 0.0
+            self.throttled += 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'queued': self._issued - self._serving - len(self._abandoned),
+                'waited_seconds': round(self.waited, 3),
+                'throttled': self.throttled,
+            }
+
+
+class RateLimiter:
+    """One token bucket per endpoint class"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, max_retries: int = 3):
+        self.max_retries = max_retries
+        self.buckets: Dict[str, TokenBucket] = {}
+        for endpoint, limit in {**DEFAULT_LIMITS, **(limits or {})}.items():
+            limit = {**DEFAULT_LIMITS.get(endpoint, {}), **limit}
+            self.buckets[endpoint] = TokenBucket(limit['rate'], limit['capacity'])
+
+    @classmethod
+    def from_secrets(cls) -> "RateLimiter":
+        """Limiter configured from the optional [RATE_LIMITS] secrets section"""
+        try:
+            import streamlit as st
+            configured = st.secrets.get("RATE_LIMITS", {})
+            limits = {endpoint: dict(limit) for endpoint, limit in dict(configured).items()}
+        except Exception:
+            limits = {}
+        return cls(limits)
+
+    def call(self, endpoint: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) within the endpoint's limit, retrying on 429"""
+        bucket = self.buckets[endpoint]
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    raise
+                if attempt == self.max_retries:
+                    raise RateLimitExceeded(f"{endpoint} still rate limited after {attempt + 1} attempts: {e}") from e
+                delay = retry_after(e)
+                if delay is None:
+                    delay = DEFAULT_RETRY_AFTER * 2 ** attempt
+                bucket.pause(min(delay, MAX_RETRY_AFTER))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: bucket.stats() for endpoint, bucket in self.buckets.items()}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status from httpx, storage3 or postgrest errors"""
+    response = getattr(error, 'response', None)
+    candidates = [getattr(response, 'status_code', None), getattr(error, 'status', None),
+                  getattr(error, 'status_code', None), getattr(error, 'code', None)]
+    if error.args and isinstance(error.args[0], dict):
+        candidates += [error.args[0].get('statusCode'), error.args[0].get('code')]
+    for candidate in candidates:
+        try:
+            return int(candidate)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for HTTP 429 responses"""
+    if isinstance(error, RateLimitExceeded):
+        return True
+    if _status_code(error) == 429:
+        return True
+    message = str(error)
+    return ('429' in message and 'Too Many Requests' in message) or 'rate limit' in message.lower()
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the error's Retry-After header (delta-seconds or HTTP date), if any"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+
+# Global instance shared by all sessions
+rate_limiter = RateLimiter.from_secrets()
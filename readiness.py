@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Readiness Probe
+Measure the app's real backend path so a load balancer can drain slow instances
+
+Checks:
+    database  - time a one-row select from data_entries
+    storage   - time a bucket metadata request
+    outbox    - number of saves waiting between upload and insert; while serving, this
+                process also drains the outbox (reconcile and prune) every
+                OUTBOX_MAINTENANCE_INTERVAL, so stuck saves don't pile up
+    cache     - whether the app's shared read cache is warm, and the chatbot's answer
+                cache hit rate (published by the app)
+
+Each check is ok, degraded or unhealthy against its thresholds; the overall status
+is the worst of them. /ready answers 200 only when everything is ok, so degraded
+instances are drained. /health is liveness only: it answers 200 while this process
+serves requests and runs no checks, so a Supabase outage drains instances instead
+of getting every container restarted.
+
+Usage:
+    python readiness.py                     # one check, exit 1 if unhealthy
+    python readiness.py --serve --port 8502 # serve /ready and /health, drain the outbox
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from single_flight import SingleFlight
+
+STATUS_OK = "ok"
+STATUS_DEGRADED = "degraded"
+STATUS_UNHEALTHY = "unhealthy"
+_SEVERITY = {STATUS_OK: 0, STATUS_DEGRADED: 1, STATUS_UNHEALTHY: 2}
+
+# (degraded, unhealthy) thresholds
+DATABASE_LATENCY_MS = (300.0, 1500.0)
+STORAGE_LATENCY_MS = (500.0, 3000.0)
+OUTBOX_DEPTH = (10, 100)
+
+PROBE_BUCKET = "images"
+# Where the app publishes its read-cache counters for this probe to pick up
+CACHE_STATS_PATH = os.path.join("data", "cache_stats.json")
+# Cache stats older than this mean no session has run recently (cold)
+CACHE_STATS_MAX_AGE = 300
+# Probe results are reused for this long, so frequent polling stays cheap
+PROBE_TTL = 2.0
+# Seconds between outbox reconcile/prune runs, and how idle a save must be to reconcile it
+OUTBOX_MAINTENANCE_INTERVAL = 300.0
+OUTBOX_RECONCILE_AFTER = datetime.timedelta(minutes=5)
+
+
+def _worst(statuses: List[str]) -> str:
+    return max(statuses, key=_SEVERITY.get, default=STATUS_OK)
+
+
+def _by_threshold(value: float, thresholds: Tuple[float, float]) -> str:
+    degraded, unhealthy = thresholds
+    if value >= unhealthy:
+        return STATUS_UNHEALTHY
+    if value >= degraded:
+        return STATUS_DEGRADED
+    return STATUS_OK
+
+
+def timed_check(fn: Callable[[], Any], thresholds: Tuple[float, float]) -> Dict[str, Any]:
+    """Run fn and grade its latency; an exception is unhealthy"""
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        return {'status': STATUS_UNHEALTHY, 'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+                'error': str(e)}
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {'status': _by_threshold(latency_ms, thresholds), 'latency_ms': round(latency_ms, 1)}
+
+
+def check_database(client) -> Dict[str, Any]:
+    # Bypasses the app's rate limiter and read cache: we want the raw round trip
+    return timed_check(lambda: client.table("data_entries").select("id").limit(1).execute(), DATABASE_LATENCY_MS)
+
+
+def check_storage(client, bucket: str = PROBE_BUCKET) -> Dict[str, Any]:
+    return timed_check(lambda: client.storage.get_bucket(bucket), STORAGE_LATENCY_MS)
+
+
+def check_outbox(outbox) -> Dict[str, Any]:
+    try:
+        depth = outbox.depth()
+    except Exception as e:
+        return {'status': STATUS_DEGRADED, 'depth': None, 'error': str(e)}
+    return {'status': _by_threshold(depth, OUTBOX_DEPTH), 'depth': depth}
+
+
+def maintain_outbox(manager) -> Dict[str, int]:
+    """Repair saves that stopped between upload and insert, then forget old finished ones"""
+    report = manager.reconcile_saves(OUTBOX_RECONCILE_AFTER)
+    report['pruned'] = manager.outbox.prune()
+    return report
+
+
+def start_outbox_maintenance(manager=None, interval: float = OUTBOX_MAINTENANCE_INTERVAL,
+                             stop: Optional[threading.Event] = None) -> threading.Thread:
+    """Run maintain_outbox now and then every interval seconds on a daemon thread"""
+    stop = stop or threading.Event()
+
+    def run():
+        nonlocal manager
+        if manager is None:
+            from supabase_db import supabase_manager as manager
+        while True:
+            try:
+                maintain_outbox(manager)
+            except Exception:
+                # Retried on the next run; the outbox check reports what's left meanwhile
+                pass
+            if stop.wait(interval):
+                return
+
+    thread = threading.Thread(target=run, name="outbox-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+def publish_cache_stats(stats: Dict[str, Any], path: str = CACHE_STATS_PATH, min_interval: float = 10.0):
+    """Write the app's read-cache counters for the probe (at most every min_interval seconds)"""
+    try:
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < min_interval:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Telemetry only - never let it break a page
+        pass
+
+
+def check_cache(path: str = CACHE_STATS_PATH, max_age: float = CACHE_STATS_MAX_AGE) -> Dict[str, Any]:
+    """Cache warmness is informational: a cold cache never fails the probe"""
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with open(path) as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return {'status': STATUS_OK, 'warm': False, 'age_seconds': None}
+    warm = age <= max_age and stats.get('executions', 0) > 0
+    return {'status': STATUS_OK, 'warm': warm, 'age_seconds': round(age, 1),
+            'shared_ratio': stats.get('shared_ratio'),
+            'query_hit_rate': stats.get('query_cache', {}).get('hit_rate')}
+
+
+def check_readiness(manager=None, cache_stats_path: str = CACHE_STATS_PATH) -> Dict[str, Any]:
+    """Run every check and combine them into one report"""
+    if manager is None:
+        from supabase_db import supabase_manager as manager
+
+    checks: Dict[str, Dict[str, Any]] = {}
+    if manager.is_available():
+        checks['database'] = check_database(manager.supabase)
+        checks['storage'] = check_storage(manager.supabase)
+    else:
+        checks['database'] = {'status': STATUS_UNHEALTHY, 'error': "Supabase not configured"}
+    checks['outbox'] = check_outbox(manager.outbox)
+    checks['cache'] = check_cache(cache_stats_path)
+
+    return {
+        'status': _worst([check['status'] for check in checks.values()]),
+        'checks': checks,
+        'checked_at': datetime.datetime.now().isoformat(),
+    }
+
+
+class ReadinessServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, probe: Callable[[], Dict[str, Any]]):
+        super().__init__(address, ReadinessHandler)
+        # Concurrent and back-to-back polls share one probe run
+        self.probes = SingleFlight(ttl=PROBE_TTL)
+        self.probe = probe
+
+    def report(self) -> Dict[str, Any]:
+        return self.probes.do("readiness", self.probe)
+
+
+class ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/ready":
+            report = self.server.report()
+            healthy = report['status'] == STATUS_OK
+        elif self.path == "/health":
+            # Liveness must not depend on the database or storage being reachable
+            report = {'status': STATUS_OK}
+            healthy = True
+        else:
+            self.send_error(404)
+            return
+        body = json.dumps(report).encode('utf-8')
+        self.send_response(200 if healthy else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Load balancers poll constantly; keep the container log quiet
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Check or serve backend readiness")
+    parser.add_argument("--serve", action="store_true", help="Serve /ready and /health over HTTP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        server = ReadinessServer((args.host, args.port), check_readiness)
+        start_outbox_maintenance()
+        print(f"🩺 Readiness probe on http://{args.host}:{args.port}/ready")
+        server.serve_forever()
+        return True
+
+    report = check_readiness()
+    print(json.dumps(report, indent=2))
+    return report['status'] != STATUS_UNHEALTHY
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
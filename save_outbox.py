@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Save Outbox
+Local journal of in-progress saves for idempotent uploads and reconciliation
+
+Each save_data call with an idempotency key moves through:
+    started  -> object name chosen, record prepared
+    uploaded -> object is in storage, file_url known
+    inserted -> row exists in data_entries (record_id set)
+A repeated save resumes from the recorded state instead of uploading again.
+
+Saves that stop half-way are drained by the readiness probe process (readiness.py
+--serve, run alongside the app in the Docker image), which reconciles and prunes
+the outbox on startup and every few minutes. Elsewhere, schedule --reconcile.
+
+Usage:
+    python save_outbox.py              # show outbox depth
+    python save_outbox.py --reconcile  # repair half-completed saves
+"""
+
+import sys
+import json
+import sqlite3
+import contextlib
+import hashlib
+import argparse
+import datetime
+from typing import Dict, Any, List, Optional
+
+from schema_migrations import LOCAL_DB_PATH, LocalBackend, MigrationRunner
+
+STATE_STARTED = "started"
+STATE_UPLOADED = "uploaded"
+STATE_INSERTED = "inserted"
+STATE_ABANDONED = "abandoned"
+
+
+def generate_idempotency_key(*parts) -> str:
+    """Stable SHA-256 key over the parts of one logical save (bytes, strings or JSON-able values)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        elif isinstance(part, str):
+            digest.update(part.encode('utf-8'))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class SaveOutbox:
+    """save_outbox table in the local SQLite database"""
+
+    def __init__(self, path: str = LOCAL_DB_PATH):
+        self.path = path
+        backend = LocalBackend(path)
+        try:
+            MigrationRunner(backend).migrate()
+        finally:
+            backend.close()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One connection per call: Streamlit runs each session on its own thread
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM save_outbox WHERE idempotency_key = ?", (key,)).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def begin(self, key: str, data_type: str, bucket: Optional[str], object_name: Optional[str],
+              record: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a new save, or return the existing entry for this key"""
+        now = datetime.datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO save_outbox"
+                " (idempotency_key, state, data_type, bucket, object_name, record, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, STATE_STARTED, data_type, bucket, object_name, json.dumps(record, default=str), now, now)
+            )
+        return self.get(key)
+
+    def mark_uploaded(self, key: str, file_url: Optional[str]):
+        self._update(key, state=STATE_UPLOADED, file_url=file_url)
+
+    def mark_inserted(self, key: str, record_id: int):
+        self._update(key, state=STATE_INSERTED, record_id=record_id)
+
+    def mark_abandoned(self, key: str):
+        self._update(key, state=STATE_ABANDONED)
+
+    def _update(self, key: str, **fields):
+        fields['updated_at'] = datetime.datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE save_outbox SET {assignments} WHERE idempotency_key = ?",
+                         (*fields.values(), key))
+
+    def pending(self, older_than: Optional[datetime.timedelta] = None) -> List[Dict[str, Any]]:
+        """Saves that never reached the inserted state"""
+        cutoff = (datetime.datetime.now() - (older_than or datetime.timedelta(0))).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM save_outbox WHERE state IN (?, ?) AND updated_at <= ? ORDER BY created_at",
+                (STATE_STARTED, STATE_UPLOADED, cutoff)
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def depth(self) -> int:
+        """Number of saves still in flight or awaiting reconciliation"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM save_outbox WHERE state IN (?, ?)",
+                               (STATE_STARTED, STATE_UPLOADED)).fetchone()
+        return row[0]
+
+    def prune(self, older_than: datetime.timedelta = datetime.timedelta(days=7)) -> int:
+        """Forget finished entries; keys older than this can no longer be deduplicated locally"""
+        cutoff = (datetime.datetime.now() - older_than).isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM save_outbox WHERE state IN (?, ?) AND updated_at <= ?",
+                                  (STATE_INSERTED, STATE_ABANDONED, cutoff))
+        return cursor.rowcount
+
+
+def _row_to_entry(row) -> Dict[str, Any]:
+    entry = dict(row)
+    entry['record'] = json.loads(entry['record']) if entry.get('record') else {}
+    return entry
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Inspect and reconcile in-progress saves")
+    parser.add_argument("--reconcile", action="store_true", help="Repair half-completed saves")
+    parser.add_argument("--older-than-minutes", type=float, default=5,
+                        help="Only reconcile saves idle for at least this long")
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Save Outbox")
+    print("=" * 50)
+
+    outbox = SaveOutbox()
+    print(f"📬 Outbox depth: {outbox.depth()}")
+    if not args.reconcile:
+        return True
+
+    from supabase_db import supabase_manager
+    if not supabase_manager.is_available():
+        print("❌ Supabase not available. Check SUPABASE_URL and SUPABASE_ANON_KEY")
+        return False
+
+    report = supabase_manager.reconcile_saves(datetime.timedelta(minutes=args.older_than_minutes))
+    print(f"✅ Already saved: {report['already_saved']}")
+    print(f"🔧 Repaired: {report['repaired']}")
+    print(f"🗑️ Abandoned (upload never completed): {report['abandoned']}")
+    print(f"⚠️ Still failing: {report['failed']}")
+    print(f"📬 Outbox depth: {outbox.depth()}")
+    return report['failed'] == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+Versioned SQL migrations for the data_entries table on Postgres and the local SQLite backend
+
+Migrations live in migrations/<dialect>/NNNN_name.sql and are applied in order.
+Each applied version is recorded in the schema_migrations table.
+
+Usage:
+    python schema_migrations.py --backend local
+    python schema_migrations.py --backend postgres --dsn postgresql://...
+    python schema_migrations.py --backend postgres --status
+"""
+
+import os
+import re
+import sys
+import sqlite3
+import argparse
+import datetime
+from typing import List, Dict, Optional, Any
+
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+LOCAL_DB_PATH = os.path.join("data", "flora_fauna.db")
+
+# Migrations starting with this marker run outside a transaction
+# (required for CREATE INDEX CONCURRENTLY on Postgres)
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+_MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+
+class Migration:
+    """A single numbered SQL migration"""
+
+    def __init__(self, version: int, name: str, sql: str):
+        self.version = version
+        self.name = name
+        self.sql = sql
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def __repr__(self):
+        return f"Migration({self.version:04d}_{self.name})"
+
+
+def load_migrations(dialect: str, migrations_dir: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Load migrations for a dialect ('postgres' or 'sqlite') sorted by version"""
+    dialect_dir = os.path.join(migrations_dir, dialect)
+    if not os.path.isdir(dialect_dir):
+        return []
+
+    migrations = []
+    for filename in os.listdir(dialect_dir):
+        match = _MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(dialect_dir, filename), 'r', encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append(Migration(int(match.group(1)), match.group(2), sql))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {dialect_dir}")
+    return migrations
+
+
+def latest_version(dialect: str = "postgres") -> int:
+    """Highest migration version shipped with the code"""
+    migrations = load_migrations(dialect)
+    return migrations[-1].version if migrations else 0
+
+
+class LocalBackend:
+    """SQLite database used for local/offline storage"""
+
+    dialect = "sqlite"
+
+    def __init__(self, path: str = LOCAL_DB_PATH):
+        self.path = path
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: transactions are managed explicitly in apply()
+            self.connection = sqlite3.connect(self.path, isolation_level=None)
+        return self.connection
+
+    def ensure_version_table(self):
+        self.connect().execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " name VARCHAR(255) NOT NULL,"
+            " applied_at TIMESTAMP NOT NULL)"
+        )
+
+    def applied_versions(self) -> List[int]:
+        self.ensure_version_table()
+        rows = self.connect().execute("SELECT version FROM schema_migrations ORDER BY version").fetchall()
+        return [row[0] for row in rows]
+
+    def apply(self, migration: Migration):
+        applied_at = datetime.datetime.now().isoformat()
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN")
+            # executescript() would commit our transaction, so run statements one by one
+            for statement in _split_statements(migration.sql):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, applied_at)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class PostgresBackend:
+    """Supabase Postgres accessed through a direct connection string"""
+
+    dialect = "postgres"
+
+    def __init__(self, dsn: str):
+        if not PSYCOPG2_AVAILABLE:
+            raise RuntimeError("psycopg2 is required for Postgres migrations: pip install psycopg2-binary")
+        self.dsn = dsn
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            self.connection = psycopg2.connect(self.dsn)
+        return self.connection
+
+    def ensure_version_table(self):
+        conn = self.connect()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                " version INTEGER PRIMARY KEY,"
+                " name VARCHAR(255) NOT NULL,"
+                " applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        conn.commit()
+
+    def applied_versions(self) -> List[int]:
+        self.ensure_version_table()
+        conn = self.connect()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+            rows = cursor.fetchall()
+        conn.commit()
+        return [row[0] for row in rows]
+
+    def apply(self, migration: Migration):
+        conn = self.connect()
+        record_sql = "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)"
+        if migration.transactional:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(migration.sql)
+                    cursor.execute(record_sql, (migration.version, migration.name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        else:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    for statement in _split_statements(migration.sql):
+                        cursor.execute(statement)
+                    cursor.execute(record_sql, (migration.version, migration.name))
+            finally:
+                conn.autocommit = False
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class MigrationRunner:
+    """Apply pending migrations to a backend"""
+
+    def __init__(self, backend, migrations_dir: str = MIGRATIONS_DIR):
+        self.backend = backend
+        self.migrations = load_migrations(backend.dialect, migrations_dir)
+
+    def current_version(self) -> int:
+        applied = self.backend.applied_versions()
+        return applied[-1] if applied else 0
+
+    def pending(self) -> List[Migration]:
+        applied = set(self.backend.applied_versions())
+        return [m for m in self.migrations if m.version not in applied]
+
+    def migrate(self, target: Optional[int] = None, dry_run: bool = False) -> List[Migration]:
+        """Apply pending migrations up to target (default: latest), returning those applied"""
+        to_apply = [m for m in self.pending() if target is None or m.version <= target]
+        if not dry_run:
+            for migration in to_apply:
+                self.backend.apply(migration)
+        return to_apply
+
+    def status(self) -> Dict[str, Any]:
+        pending = self.pending()
+        return {
+            'dialect': self.backend.dialect,
+            'current_version': self.current_version(),
+            'latest_version': self.migrations[-1].version if self.migrations else 0,
+            'pending': [f"{m.version:04d}_{m.name}" for m in pending],
+        }
+
+
+def _split_statements(sql: str) -> List[str]:
+    """Split a migration script into complete statements (trigger bodies stay intact)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    statements = []
+    buffer = ""
+    for piece in "\n".join(lines).split(';'):
+        buffer += piece + ';'
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(' \n;'):
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip(' \n;'):
+        statements.append(buffer.strip())
+    return statements
+
+
+def _get_postgres_dsn() -> str:
+    """Read the Postgres connection string from the environment or Streamlit secrets"""
+    dsn = os.environ.get("SUPABASE_DB_URL") or os.environ.get("DATABASE_URL", "")
+    if dsn:
+        return dsn
+    try:
+        import streamlit as st
+        return st.secrets.get("SUPABASE_DB_URL", "")
+    except Exception:
+        return ""
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Apply data_entries schema migrations")
+    parser.add_argument("--backend", choices=["local", "postgres"], default="local")
+    parser.add_argument("--dsn", help="Postgres connection string (defaults to SUPABASE_DB_URL)")
+    parser.add_argument("--path", default=LOCAL_DB_PATH, help="SQLite database path for the local backend")
+    parser.add_argument("--target", type=int, help="Migrate up to this version")
+    parser.add_argument("--status", action="store_true", help="Show current and pending versions only")
+    parser.add_argument("--dry-run", action="store_true", help="List migrations that would be applied")
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Schema Migrations")
+    print("=" * 50)
+
+    try:
+        if args.backend == "postgres":
+            dsn = args.dsn or _get_postgres_dsn()
+            if not dsn:
+                print("❌ No Postgres connection string. Set SUPABASE_DB_URL or pass --dsn")
+                return False
+            backend = PostgresBackend(dsn)
+        else:
+            backend = LocalBackend(args.path)
+
+        runner = MigrationRunner(backend)
+        status = runner.status()
+        print(f"🗄️ Backend: {status['dialect']}")
+        print(f"📌 Current version: {status['current_version']} (latest: {status['latest_version']})")
+
+        if args.status:
+            for name in status['pending']:
+                print(f"⏳ Pending: {name}")
+            return True
+
+        applied = runner.migrate(target=args.target, dry_run=args.dry_run)
+        for migration in applied:
+            verb = "Would apply" if args.dry_run else "Applied"
+            print(f"✅ {verb}: {migration.version:04d}_{migration.name}")
+        if not applied:
+            print("✅ Schema is up to date")
+        else:
+            print(f"📌 Now at version: {runner.current_version()}")
+        backend.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
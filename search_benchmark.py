@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Chatbot Search Benchmark
+Time the chatbot's scoring paths on synthetic corpora
+
+Builds a synthetic bilingual corpus of each size, then times building each scorer
+(what a cache refresh pays) and answering a fixed set of queries (what each
+question pays). The scores of every path are checked against the inverted index
+before timing, so a faster path can't be a wrong one.
+
+Usage:
+    python search_benchmark.py                      # 10k and 100k records
+    python search_benchmark.py --sizes 5000 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from search_index import SearchIndex
+from synthetic_corpus import synthetic_records
+from vector_search import VectorizedSearch
+
+DEFAULT_SIZES = [10_000, 100_000]
+BENCHMARK_QUERIES = [
+    "jammi tree",
+    "show me neem images",
+    "జమ్మి చెట్టు చిత్రాలు",
+    "banyan tree sounds in mumbai",
+    "mango",
+]
+
+
+def _time(fn: Callable[[], Any], repeat: int = 1) -> float:
+    """Best-of-repeat wall time in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark(size: int, queries: List[str], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    from chatbot import FloraFaunaChatbot
+
+    df = pd.DataFrame(synthetic_records(size))
+    extract_keywords = FloraFaunaChatbot().extract_keywords
+    keyword_sets = [(query, extract_keywords(query)) for query in queries]
+
+    built: Dict[str, Any] = {}
+    build_ms = {
+        'index': _time(lambda: built.__setitem__('index', SearchIndex.from_dataframe(df))),
+        'vectorized': _time(lambda: built.__setitem__('vectorized', VectorizedSearch.from_dataframe(df))),
+    }
+    index, vectorized = built['index'], built['vectorized']
+
+    for query, keywords in keyword_sets:
+        expected = {record_id: item['relevance'] for record_id, item in index.score(query, keywords).items()}
+        relevance = vectorized.score(query, keywords)['relevance']
+        actual = {row: int(score) for row, score in enumerate(relevance) if score > 0}
+        if actual != expected:
+            raise AssertionError(f"vectorized scores differ from the index for {query!r}")
+
+    paths = {
+        'index': lambda: [index.search(query, keywords) for query, keywords in keyword_sets],
+        'vectorized': lambda: [vectorized.search(query, keywords) for query, keywords in keyword_sets],
+    }
+    return {name: {'build_ms': build_ms[name], 'query_ms': _time(run, repeat) / len(keyword_sets)}
+            for name, run in paths.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Benchmark chatbot search scoring")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Chatbot Search Benchmark")
+    print("=" * 50)
+
+    for size in args.sizes:
+        results = benchmark(size, BENCHMARK_QUERIES, args.repeat)
+        print(f"\n{size:,} records, {len(BENCHMARK_QUERIES)} queries (scores verified)")
+        print(f"  {'path':<12}{'build ms':>12}{'ms/query':>12}")
+        for name, timing in results.items():
+            print(f"  {name:<12}{timing['build_ms']:>12.1f}{timing['query_ms']:>12.1f}")
+        speedup = results['index']['query_ms'] / max(results['vectorized']['query_ms'], 1e-9)
+        print(f"  vectorized speedup: {speedup:.1f}x")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
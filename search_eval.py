@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Chatbot Search Evaluation
+Measure ranking quality on a labeled bilingual query set
+
+The eval set (eval/chatbot_search_eval.json) holds a small English/Telugu corpus and
+queries with graded relevance labels (2 = what the user asked for, 1 = related).
+Each ranker is run on every query with the chatbot's own keyword extraction, and
+the usual ranking metrics are averaged over the queries:
+    MRR       - reciprocal rank of the first relevant record
+    nDCG@k    - graded gain, discounted by rank, against the ideal ordering
+    P@k, R@k  - share of the top k that is relevant / of the relevant found in the top k
+
+Usage:
+    python search_eval.py                       # compare legacy and bm25
+    python search_eval.py --synonym-weight 0.4  # try another expansion weight
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+from search_index import SearchIndex
+from bm25 import BM25Ranker, EXPANSION_WEIGHTS, GENERIC, SYNONYM
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval", "chatbot_search_eval.json")
+DEFAULT_K = 5
+
+# (query, keywords, k) -> record ids, best first
+Ranker = Callable[[str, List[str], int], List[Any]]
+
+
+def load_eval_set(path: str = EVAL_SET_PATH) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        eval_set = json.load(f)
+    for item in eval_set['queries']:
+        # JSON object keys are strings; labels refer to record ids
+        item['relevant'] = {int(record_id): grade for record_id, grade in item['relevant'].items()}
+    return eval_set
+
+
+def legacy_ranker(index: SearchIndex) -> Ranker:
+    def rank(query: str, keywords: List[str], k: int) -> List[Any]:
+        return [result['data']['id'] for result in index.search(query, keywords, limit=k)['results']]
+    return rank
+
+
+def bm25_ranker(ranker: BM25Ranker) -> Ranker:
+    def rank(query: str, keywords: List[str], k: int) -> List[Any]:
+        return [ranker.index.records[record_id].data['id'] for record_id, _ in ranker.top_k(query, keywords, k)]
+    return rank
+
+
+def reciprocal_rank(ranked: List[Any], relevant: Dict[Any, int]) -> float:
+    for position, record_id in enumerate(ranked, 1):
+        if relevant.get(record_id, 0) > 0:
+            return 1.0 / position
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[Any], relevant: Dict[Any, int], k: int) -> float:
+    def dcg(grades: List[int]) -> float:
+        return sum((2 ** grade - 1) / math.log2(position + 1) for position, grade in enumerate(grades, 1))
+
+    ideal = dcg(sorted(relevant.values(), reverse=True)[:k])
+    if ideal == 0:
+        return 0.0
+    return dcg([relevant.get(record_id, 0) for record_id in ranked[:k]]) / ideal
+
+
+def precision_at_k(ranked: List[Any], relevant: Dict[Any, int], k: int) -> float:
+    return sum(1 for record_id in ranked[:k] if relevant.get(record_id, 0) > 0) / k
+
+
+def recall_at_k(ranked: List[Any], relevant: Dict[Any, int], k: int) -> float:
+    wanted = [record_id for record_id, grade in relevant.items() if grade > 0]
+    if not wanted:
+        return 0.0
+    return sum(1 for record_id in ranked[:k] if record_id in wanted) / len(wanted)
+
+
+def evaluate(rank: Ranker, queries: List[Dict[str, Any]], extract_keywords: Callable[[str], List[str]],
+             k: int = DEFAULT_K) -> Dict[str, Any]:
+    """Mean metrics over the queries, plus the per-query breakdown"""
+    per_query = []
+    for item in queries:
+        ranked = rank(item['query'], extract_keywords(item['query']), k)
+        relevant = item['relevant']
+        per_query.append({
+            'query': item['query'],
+            'ranked': ranked,
+            'mrr': reciprocal_rank(ranked, relevant),
+            f'ndcg@{k}': ndcg_at_k(ranked, relevant, k),
+            f'p@{k}': precision_at_k(ranked, relevant, k),
+            f'r@{k}': recall_at_k(ranked, relevant, k),
+        })
+    metrics = ['mrr', f'ndcg@{k}', f'p@{k}', f'r@{k}']
+    summary = {metric: sum(q[metric] for q in per_query) / len(per_query) if per_query else 0.0 for metric in metrics}
+    return {'summary': summary, 'queries': per_query}
+
+
+def compare(eval_set: Dict[str, Any], k: int = DEFAULT_K,
+            expansion_weights: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+    """Evaluate the legacy and BM25 rankers on the same index"""
+    from chatbot import FloraFaunaChatbot
+
+    index = SearchIndex(eval_set['records'])
+    rankers = {
+        'legacy': legacy_ranker(index),
+        'bm25': bm25_ranker(BM25Ranker(index, expansion_weights=expansion_weights)),
+    }
+    extract_keywords = FloraFaunaChatbot().extract_keywords
+    return {name: evaluate(rank, eval_set['queries'], extract_keywords, k) for name, rank in rankers.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Evaluate chatbot search ranking")
+    parser.add_argument("--eval-set", default=EVAL_SET_PATH)
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--synonym-weight", type=float, default=EXPANSION_WEIGHTS[SYNONYM])
+    parser.add_argument("--generic-weight", type=float, default=EXPANSION_WEIGHTS[GENERIC])
+    parser.add_argument("--verbose", action="store_true", help="Show every query's metrics")
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Chatbot Search Evaluation")
+    print("=" * 50)
+
+    eval_set = load_eval_set(args.eval_set)
+    print(f"{len(eval_set['records'])} records, {len(eval_set['queries'])} queries, k={args.k}")
+    reports = compare(eval_set, args.k, {SYNONYM: args.synonym_weight, GENERIC: args.generic_weight})
+
+    metrics = list(next(iter(reports.values()))['summary'])
+    print(f"\n{'ranker':<10}" + "".join(f"{metric:>10}" for metric in metrics))
+    for name, report in reports.items():
+        print(f"{name:<10}" + "".join(f"{report['summary'][metric]:>10.3f}" for metric in metrics))
+
+    if args.verbose:
+        for name, report in reports.items():
+            print(f"\n{name}")
+            for q in report['queries']:
+                print(f"  {q['query']:<32} mrr {q['mrr']:.2f}  ndcg {q[f'ndcg@{args.k}']:.2f}  {q['ranked']}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,284 @@
+"""
+Chatbot Search Index
+Inverted index over the cached data_entries records for FloraFaunaChatbot
+
+Records are tokenized once when the chatbot's cache is refreshed. Each token maps to
+a posting list of (record, field, position) entries, and per-record features (media
+type, combined text) are stored alongside, so a query only touches the postings of
+the terms it matches instead of rescanning every record.
+
+The relevance signals are the ones search_database has always used:
+    +5  keyword appears in the record's combined text
+    +2  per field containing the keyword
+    +4  per token equal to the keyword (keywords longer than 2 characters)
+    +1  per token containing, or contained in, the keyword
+    +1  per token sharing enough characters with the keyword (transliteration fuzz)
+        or, with fuzzy=FUZZY_TRIGRAM, per token whose trigram similarity (in either
+        script) clears TRIGRAM_THRESHOLD
+    +2  record contains more than one keyword
+    +10 media records when the query asks for images, videos or audio
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ngram_index import TrigramIndex
+from ranked_results import Materialize, RankedResults
+
+SEARCH_FIELDS = ['title', 'description', 'content', 'category', 'tags', 'city', 'country']
+MEDIA_TYPES = {'image', 'video', 'audio'}
+MEDIA_REQUEST_KEYWORDS = [
+    'image', 'images', 'photo', 'picture', 'చిత్రం', 'చిత్రాలు', 'ఫోటో', 'ఫోటోలు',
+    'video', 'videos', 'వీడియో', 'వీడియోలు',
+    'audio', 'sound', 'recording', 'ఆడియో', 'శబ్దం'
+]
+COMBINED_TEXT_PREVIEW = 200
+
+# Fuzzy signal: the original shared-character test over every vocabulary term, or
+# trigram lookups that only touch similar terms
+FUZZY_CHARS = 'chars'
+FUZZY_TRIGRAM = 'trigram'
+TRIGRAM_THRESHOLD = 0.4
+
+
+def _is_missing(value: Any) -> bool:
+    """None or NaN (what pd.notna rejects for scalar values)"""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def result_item(data: Dict[str, Any], combined_text: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """One entry of search_database's 'results' list"""
+    return {
+        'relevance': item['relevance'],
+        'data': dict(data),
+        'matched_fields': item['matched_fields'],
+        'matched_content': item['matched_content'],
+        'type': data.get('entry_type', 'unknown'),
+        'title': data.get('title', 'Unknown'),
+        'description': data.get('description', 'No description'),
+        'content': data.get('content', 'No content'),
+        'location': f"{data.get('city', 'Unknown')}, {data.get('country', 'Unknown')}",
+        'timestamp': data.get('timestamp', 'Unknown'),
+        'combined_text': (combined_text[:COMBINED_TEXT_PREVIEW] + "..."
+                          if len(combined_text) > COMBINED_TEXT_PREVIEW else combined_text)
+    }
+
+
+class IndexedRecord:
+    """One record with its index-time features"""
+
+    __slots__ = ('record_id', 'data', 'fields', 'combined_text', 'entry_type', 'is_media')
+
+    def __init__(self, record_id: int, data: Dict[str, Any]):
+        self.record_id = record_id
+        self.data = data
+        # Lowercased text of each searchable field that has a value
+        self.fields: Dict[int, str] = {}
+        combined = []
+        for field_id, column in enumerate(SEARCH_FIELDS):
+            value = data.get(column)
+            if _is_missing(value):
+                continue
+            text = str(value)
+            self.fields[field_id] = text.lower()
+            if text.strip():
+                combined.append(text)
+        self.combined_text = " ".join(combined).lower()
+        self.entry_type = data.get('entry_type', '')
+        self.is_media = self.entry_type in MEDIA_TYPES
+
+
+class SearchIndex:
+    """Token -> posting list index with the chatbot's relevance scoring"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]], fuzzy: str = FUZZY_CHARS):
+        self.fuzzy = fuzzy
+        self.trigrams = TrigramIndex() if fuzzy == FUZZY_TRIGRAM else None
+        self.records: List[IndexedRecord] = []
+        # term -> record_id -> [(field_id, position)]; positions run across fields like combined_text
+        self.postings: Dict[str, Dict[int, List[Tuple[int, int]]]] = defaultdict(dict)
+        self.media_record_ids: List[int] = []
+        # Per-term character sets for the fuzzy signal
+        self.term_chars: Dict[str, frozenset] = {}
+        for data in records:
+            self.add(data)
+
+    @classmethod
+    def from_dataframe(cls, df, fuzzy: str = FUZZY_CHARS) -> "SearchIndex":
+        return cls(df.to_dict('records') if df is not None else [], fuzzy)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, data: Dict[str, Any]):
+        record = IndexedRecord(len(self.records), data)
+        self.records.append(record)
+        if record.is_media:
+            self.media_record_ids.append(record.record_id)
+        position = 0
+        for field_id, text in record.fields.items():
+            for token in text.split():
+                self.postings[token].setdefault(record.record_id, []).append((field_id, position))
+                if token not in self.term_chars:
+                    self.term_chars[token] = frozenset(token)
+                    if self.trigrams is not None:
+                        self.trigrams.add(token)
+                position += 1
+
+    def _containing(self, keyword: str) -> Dict[int, Set[int]]:
+        """record_id -> ids of the fields containing keyword, for records whose text contains it"""
+        found: Dict[int, Set[int]] = {}
+        words = keyword.split()
+        if not words:
+            return found
+
+        if len(words) == 1 and words[0] == keyword:
+            # Without whitespace the keyword can only occur inside a single token
+            for term, rows in self.postings.items():
+                if keyword in term:
+                    for record_id, hits in rows.items():
+                        found.setdefault(record_id, set()).update(field_id for field_id, _ in hits)
+            return found
+
+        # Phrase: narrow to records holding the inner words (or a token ending like the
+        # first word), then confirm on the stored text
+        candidates: Optional[Set[int]] = None
+        for word in words[1:-1]:
+            rows = set(self.postings.get(word, ()))
+            candidates = rows if candidates is None else candidates & rows
+        if candidates is None:
+            candidates = {record_id for term, rows in self.postings.items()
+                          if term.endswith(words[0]) for record_id in rows}
+        for record_id in candidates:
+            record = self.records[record_id]
+            # The combined text can match across a field boundary even if no single field does
+            if keyword in record.combined_text:
+                found[record_id] = {field_id for field_id, text in record.fields.items() if keyword in text}
+        return found
+
+    def _token_weights(self, keyword: str) -> Dict[str, int]:
+        """Per-occurrence score of each vocabulary term for a keyword (exact, partial, fuzzy)"""
+        if self.trigrams is not None:
+            return self._trigram_token_weights(keyword)
+        weights = {}
+        keyword_chars = set(keyword)
+        needed = min(3, len(keyword) - 1)
+        for term, chars in self.term_chars.items():
+            weight = 0
+            if term == keyword:
+                weight += 4
+            elif keyword in term or term in keyword:
+                weight += 1
+            if len(term) > 2 and len(chars & keyword_chars) >= needed:
+                weight += 1
+            if weight:
+                weights[term] = weight
+        return weights
+
+    def _trigram_token_weights(self, keyword: str) -> Dict[str, int]:
+        """_token_weights from vocabulary lookups instead of a pass over every term"""
+        weights: Dict[str, int] = defaultdict(int)
+        if keyword in self.term_chars:
+            weights[keyword] += 4
+        partial = self.trigrams.containing(keyword)
+        partial.update(keyword[i:j] for i in range(len(keyword)) for j in range(i + 1, len(keyword) + 1)
+                       if keyword[i:j] in self.term_chars)
+        for term in partial - {keyword}:
+            weights[term] += 1
+        for term, _ in self.trigrams.similar(keyword, TRIGRAM_THRESHOLD):
+            if len(term) > 2:
+                weights[term] += 1
+        return dict(weights)
+
+    def _relevance(self, query: str, keywords: List[str]) -> Tuple[Dict[int, int], List[Dict[int, Set[int]]]]:
+        """record_id -> relevance for every matching record, and each keyword's containing
+        records (kept to explain the few matches that get materialized)"""
+        relevance: Dict[int, int] = defaultdict(int)
+        keyword_hits: Dict[int, int] = defaultdict(int)
+        containing_by_keyword: List[Dict[int, Set[int]]] = []
+
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+
+            containing = self._containing(keyword_lower)
+            containing_by_keyword.append(containing)
+            for record_id, field_ids in containing.items():
+                relevance[record_id] += 5 + 2 * len(field_ids)
+                keyword_hits[record_id] += 1
+
+            if len(keyword_lower) > 2:
+                for term, weight in self._token_weights(keyword_lower).items():
+                    for record_id, hits in self.postings[term].items():
+                        relevance[record_id] += weight * len(hits)
+
+        for record_id, hits in keyword_hits.items():
+            if hits > 1:
+                relevance[record_id] += 2
+
+        query_lower = query.lower()
+        if any(media_keyword in query_lower for media_keyword in MEDIA_REQUEST_KEYWORDS):
+            for record_id in self.media_record_ids:
+                relevance[record_id] += 10
+
+        return {record_id: score for record_id, score in relevance.items() if score > 0}, containing_by_keyword
+
+    def _explain(self, record_id: int, keywords: List[str],
+                 containing_by_keyword: List[Dict[int, Set[int]]]) -> Tuple[List[str], List[str]]:
+        """(matched_fields, matched_content) of one record"""
+        matched_fields: List[str] = []
+        matched_content: List[str] = []
+        for keyword, containing in zip(keywords, containing_by_keyword):
+            field_ids = containing.get(record_id)
+            if field_ids is None:
+                continue
+            matched_content.append(f"Found '{keyword}' in record")
+            for field_id in sorted(field_ids):
+                if SEARCH_FIELDS[field_id] not in matched_fields:
+                    matched_fields.append(SEARCH_FIELDS[field_id])
+        return matched_fields, matched_content
+
+    def score(self, query: str, keywords: List[str]) -> Dict[int, Dict[str, Any]]:
+        """record_id -> {'relevance', 'matched_fields', 'matched_content'} for every matching record"""
+        relevance, containing_by_keyword = self._relevance(query, keywords)
+        scores = {}
+        for record_id, score in relevance.items():
+            matched_fields, matched_content = self._explain(record_id, keywords, containing_by_keyword)
+            scores[record_id] = {'relevance': score, 'matched_fields': matched_fields,
+                                 'matched_content': matched_content}
+        return scores
+
+    def _explain_record(self, record_id: int, keywords: List[str]) -> Tuple[List[str], List[str]]:
+        """_explain for one record from its own text, without the per-keyword containing sets"""
+        record = self.records[record_id]
+        matched_fields: List[str] = []
+        matched_content: List[str] = []
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            if not keyword_lower.split() or keyword_lower not in record.combined_text:
+                continue
+            matched_content.append(f"Found '{keyword}' in record")
+            for field_id in sorted(record.fields):
+                if keyword_lower in record.fields[field_id] and SEARCH_FIELDS[field_id] not in matched_fields:
+                    matched_fields.append(SEARCH_FIELDS[field_id])
+        return matched_fields, matched_content
+
+    def materializer(self, query: str, keywords: List[str]) -> Materialize:
+        """Builds the result items of a ranking of this query from this index"""
+        def materialize(record_id: int, score: int) -> Dict[str, Any]:
+            matched_fields, matched_content = self._explain_record(record_id, keywords)
+            return self._result_item(record_id, {'relevance': score, 'matched_fields': matched_fields,
+                                                 'matched_content': matched_content})
+        return materialize
+
+    def rank(self, query: str, keywords: List[str]) -> RankedResults:
+        """Every match ranked by relevance; result items are only built for the pages asked for"""
+        relevance, _ = self._relevance(query, keywords)
+        return RankedResults(relevance, self.materializer(query, keywords), len(self.records), keywords)
+
+    def search(self, query: str, keywords: List[str], limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """Ranked results in the shape FloraFaunaChatbot.search_database returns"""
+        return self.rank(query, keywords).page(offset, limit)
+
+    def _result_item(self, record_id: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        record = self.records[record_id]
+        return result_item(record.data, record.combined_text, item)
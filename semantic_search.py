@@ -0,0 +1,344 @@
+"""
+Semantic Chatbot Search
+Offline TF-IDF + LSA retrieval for questions that paraphrase the data
+
+Keyword ranking only finds records sharing words with the question, so "medicinal
+tree with bitter leaves" misses neem entries that never use those words. This mode
+learns latent topics from the corpus itself: every record becomes a sublinear
+TF-IDF vector over its search fields, a truncated SVD of that matrix (latent
+semantic analysis) puts terms that occur in similar records on nearby directions,
+and each record is kept as a unit-length float32 vector in that space. A question
+is projected the same way and ranked by cosine similarity - one matrix-vector
+product and an argpartition - with no network or GPU involved.
+
+The SVD is randomized (Halko, Martinsson & Tropp) and the sparse products run in
+NumPy on CSR arrays, so SciPy isn't needed. The model (vocabulary, idf, term
+loadings) and the record vectors are saved with np.savez. refresh() keeps the
+vectors of unchanged records, projects new or edited ones with the existing model
+("folding in") and only refits once more than REFIT_FRACTION of the records have
+been folded in since the last fit.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bm25 import keyword_weights
+from ranked_results import Materialize, RankedArray
+from search_index import SEARCH_FIELDS, SearchIndex, _is_missing
+from token_cache import normalize_tokens
+
+DEFAULT_COMPONENTS = 128
+OVERSAMPLING = 10
+POWER_ITERATIONS = 2
+# Refit once this fraction of the records were projected with an older model
+REFIT_FRACTION = 0.2
+# Records below this cosine similarity aren't returned
+MIN_SIMILARITY = 0.1
+# Floats materialized per block of a sparse product
+_BLOCK_FLOATS = 1 << 22
+
+
+def record_tokens(data: Dict[str, Any]) -> List[str]:
+    return normalize_tokens(" ".join(str(data[column]) for column in SEARCH_FIELDS
+                                     if not _is_missing(data.get(column))))
+
+
+def record_key(data: Dict[str, Any], position: int) -> Any:
+    """The record's id, or its position when it has none (as TokenCache keys rows)"""
+    record_id = data.get('id')
+    return record_id if not _is_missing(record_id) else ('row', position)
+
+
+def record_signature(data: Dict[str, Any]) -> int:
+    """Hash of the searchable fields that is stable across processes (unlike hash())"""
+    text = "\x1f".join(repr(data.get(column)) for column in SEARCH_FIELDS)
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class SparseRows:
+    """Minimal CSR matrix with the two products the randomized SVD needs"""
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape: Tuple[int, int]):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[int, float]], columns: int) -> "SparseRows":
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        indices = np.fromiter((column for row in rows for column in row), dtype=np.int64, count=indptr[-1])
+        data = np.fromiter((value for row in rows for value in row.values()), dtype=np.float32, count=indptr[-1])
+        return cls(data, indices, indptr, (len(rows), columns))
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """self @ dense, a block of rows at a time"""
+        rows, width = self.shape[0], dense.shape[1]
+        out = np.zeros((rows, width), dtype=np.float32)
+        per_row = max(1, len(self.data) // max(1, rows))
+        step = max(1, _BLOCK_FLOATS // (per_row * max(1, width)))
+        for start in range(0, rows, step):
+            stop = min(rows, start + step)
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            products = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+            offsets = self.indptr[start:stop] - lo
+            sums = np.add.reduceat(products, np.minimum(offsets, hi - lo - 1), axis=0)
+            # reduceat yields a neighbour's element for an empty row
+            sums[np.diff(self.indptr[start:stop + 1]) == 0] = 0
+            out[start:stop] = sums
+        return out
+
+    def transpose(self) -> "SparseRows":
+        order = np.argsort(self.indices, kind='stable')
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        indptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.shape[1]), out=indptr[1:])
+        return SparseRows(self.data[order], rows[order], indptr, (self.shape[1], self.shape[0]))
+
+
+def _orthonormalize(matrix: np.ndarray) -> np.ndarray:
+    """Orthonormal basis of a tall matrix's column space from its small Gram matrix
+
+    Much cheaper than np.linalg.qr for 100k x 138 blocks; directions with negligible
+    energy (rank-deficient input, e.g. tiny corpora) are dropped.
+    """
+    gram = matrix.T.astype(np.float64) @ matrix.astype(np.float64)
+    energy, directions = np.linalg.eigh(gram)
+    keep = energy > energy.max() * 1e-10 if len(energy) and energy.max() > 0 else np.zeros(len(energy), bool)
+    return (matrix @ (directions[:, keep] / np.sqrt(energy[keep])).astype(np.float32)).astype(np.float32)
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class LSAModel:
+    """TF-IDF weighting and the truncated-SVD term loadings learned from a corpus"""
+
+    def __init__(self, terms: List[str], idf: np.ndarray, components: np.ndarray):
+        self.terms = terms
+        self.vocabulary: Dict[str, int] = {term: code for code, term in enumerate(terms)}
+        self.idf = idf
+        # terms x dimensions
+        self.components = components
+
+    @property
+    def dimensions(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, documents: Sequence[List[str]], n_components: int = DEFAULT_COMPONENTS,
+            seed: int = 0) -> "LSAModel":
+        document_frequency: Counter = Counter()
+        for tokens in documents:
+            document_frequency.update(set(tokens))
+        terms = sorted(document_frequency)
+        count = len(documents)
+        idf = np.array([math.log((1 + count) / (1 + document_frequency[term])) + 1 for term in terms],
+                       dtype=np.float32)
+        model = cls(terms, idf, np.zeros((len(terms), 0), dtype=np.float32))
+        if not terms:
+            return model
+
+        matrix = model.tfidf(documents)
+        transposed = matrix.transpose()
+        # About sqrt(n) dimensions at most, so a small corpus is still folded onto topics
+        rank = max(1, min(n_components, int(math.sqrt(count)), len(terms)))
+        width = min(rank + OVERSAMPLING, count, len(terms))
+        rng = np.random.default_rng(seed)
+        basis = _orthonormalize(matrix.dot(rng.standard_normal((len(terms), width)).astype(np.float32)))
+        for _ in range(POWER_ITERATIONS):
+            basis = _orthonormalize(matrix.dot(_orthonormalize(transposed.dot(basis))))
+        # Right singular vectors of the small (width x terms) projection B = basis' X,
+        # from the eigenvectors of B B'
+        projection = transposed.dot(basis)
+        energy, directions = np.linalg.eigh(projection.T.astype(np.float64) @ projection.astype(np.float64))
+        order = np.argsort(energy)[::-1][:rank]
+        order = order[energy[order] > energy.max() * 1e-10] if energy.max() > 0 else order[:0]
+        components = projection @ (directions[:, order] / np.sqrt(energy[order])).astype(np.float32)
+        model.components = np.ascontiguousarray(components, dtype=np.float32)
+        return model
+
+    def tfidf(self, documents: Sequence[List[str]]) -> SparseRows:
+        """Unit-length sublinear TF-IDF rows; terms outside the vocabulary are dropped"""
+        rows = []
+        for tokens in documents:
+            counts = Counter(code for code in map(self.vocabulary.get, tokens) if code is not None)
+            row = {code: (1 + math.log(tf)) * float(self.idf[code]) for code, tf in counts.items()}
+            norm = math.sqrt(sum(value * value for value in row.values())) or 1.0
+            rows.append({code: value / norm for code, value in row.items()})
+        return SparseRows.from_rows(rows, len(self.terms))
+
+    def transform(self, documents: Sequence[List[str]]) -> np.ndarray:
+        """Unit-length float32 vectors of documents (zero when none of their terms are known)"""
+        if not documents:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return _unit_rows(self.tfidf(documents).dot(self.components))
+
+    def query_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        """Unit-length vector of weighted query terms"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term, weight in weights.items():
+            code = self.vocabulary.get(term)
+            if code is not None:
+                vector += weight * self.idf[code] * self.components[code]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+class SemanticIndex:
+    """LSA model plus one vector per record, refreshed incrementally and saved to disk"""
+
+    def __init__(self, path: Optional[str] = None, n_components: int = DEFAULT_COMPONENTS,
+                 refit_fraction: float = REFIT_FRACTION):
+        self.path = path
+        self.n_components = n_components
+        self.refit_fraction = refit_fraction
+        self.model: Optional[LSAModel] = None
+        self.keys: List[Any] = []
+        self.signatures = np.zeros(0, dtype=np.uint64)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        # Records projected with the current model since it was fitted
+        self.folded_in = 0
+        self.last_refresh = {'reused': 0, 'projected': 0, 'removed': 0, 'refit': False}
+        self._loaded = False
+        # Reentrant so searcher() can refresh and read the result under one hold
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def refresh(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Align the vectors with records, reusing unchanged rows; rows follow the new order"""
+        records = list(records)
+        with self._lock:
+            if not self._loaded and self.path and os.path.exists(self.path):
+                self._load()
+            self._loaded = True
+
+            keys = [record_key(data, position) for position, data in enumerate(records)]
+            signatures = np.fromiter((record_signature(data) for data in records), dtype=np.uint64,
+                                     count=len(records))
+            old_rows = {key: row for row, key in enumerate(self.keys)}
+            reuse = [(row, old_rows[key]) for row, key in enumerate(keys)
+                     if key in old_rows and self.signatures[old_rows[key]] == signatures[row]]
+            reused_rows = {row for row, _ in reuse}
+            changed = [row for row in range(len(records)) if row not in reused_rows]
+            removed = len(set(old_rows) - set(keys))
+
+            refit = (self.model is None
+                     or self.folded_in + len(changed) > self.refit_fraction * max(1, len(records)))
+            if refit:
+                documents = [record_tokens(data) for data in records]
+                self.model = LSAModel.fit(documents, self.n_components)
+                vectors = self.model.transform(documents)
+                self.folded_in = 0
+                reused = 0
+            else:
+                # Copy-on-write: searchers built from the previous arrays keep them intact
+                vectors = np.empty((len(records), self.model.dimensions), dtype=np.float32)
+                if reuse:
+                    new_rows, old = map(list, zip(*reuse))
+                    vectors[new_rows] = self.vectors[old]
+                if changed:
+                    vectors[changed] = self.model.transform([record_tokens(records[row]) for row in changed])
+                self.folded_in += len(changed)
+                reused = len(reuse)
+
+            self.keys, self.signatures, self.vectors = keys, signatures, vectors
+            self.last_refresh = {'reused': reused, 'projected': len(records) - reused,
+                                 'removed': removed, 'refit': refit}
+            if self.path and (changed or removed or refit):
+                self._save()
+            return self.last_refresh
+
+    def searcher(self, index: SearchIndex) -> "SemanticSearch":
+        """A SemanticSearch over the records of index, refreshing the vectors first"""
+        with self._lock:
+            self.refresh(record.data for record in index.records)
+            return SemanticSearch(index, self.model, self.vectors)
+
+    def _save(self):
+        """Write the model and vectors to self.path atomically"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     terms=np.array(self.model.terms, dtype=str),
+                     idf=self.model.idf,
+                     components=self.model.components,
+                     vectors=self.vectors,
+                     signatures=self.signatures,
+                     keys=np.array(json.dumps(self.keys, default=str)),
+                     folded_in=np.array(self.folded_in))
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                model = LSAModel(saved['terms'].tolist(), saved['idf'], saved['components'])
+                keys = [tuple(key) if isinstance(key, list) else key for key in json.loads(str(saved['keys']))]
+                vectors, signatures = saved['vectors'], saved['signatures']
+                folded_in = int(saved['folded_in'])
+        except (OSError, KeyError, ValueError):
+            # Unreadable or from an older layout: the next refresh refits
+            return
+        if model.dimensions > self.n_components:
+            # Saved with more dimensions than wanted now; refit
+            return
+        self.model, self.keys, self.vectors = model, keys, vectors
+        self.signatures, self.folded_in = signatures, folded_in
+
+
+class SemanticSearch:
+    """Cosine top-k over one snapshot's record vectors"""
+
+    def __init__(self, index: SearchIndex, model: LSAModel, vectors: np.ndarray,
+                 min_similarity: float = MIN_SIMILARITY):
+        self.index = index
+        self.model = model
+        self.vectors = vectors
+        self.min_similarity = min_similarity
+
+    def similarities(self, query: str, keywords: List[str]) -> np.ndarray:
+        """Cosine similarity of every record to the query"""
+        if not len(self.vectors):
+            return np.zeros(0, dtype=np.float32)
+        return self.vectors @ self.model.query_vector(keyword_weights(query, keywords))
+
+    def top_k(self, query: str, keywords: List[str], k: int = 10) -> List[Tuple[int, float]]:
+        """The k most similar (record_id, similarity) pairs above min_similarity, best first"""
+        return self.rank(query, keywords).top(k)
+
+    def materializer(self, query: str, keywords: List[str]) -> Materialize:
+        """Builds the result items of a ranking of this query from this snapshot's records"""
+        def materialize(record_id: int, similarity: float) -> Dict[str, Any]:
+            return self.index._result_item(record_id, {
+                'relevance': round(similarity, 4),
+                'matched_fields': [],
+                'matched_content': [f"Semantic similarity {similarity:.2f}"],
+            })
+        return materialize
+
+    def rank(self, query: str, keywords: List[str]) -> RankedArray:
+        """Records above min_similarity ranked by similarity; result items are only built for the pages asked for"""
+        similarities = self.similarities(query, keywords)
+        candidates = np.flatnonzero(similarities >= self.min_similarity)
+        # Ties keep record order
+        return RankedArray(candidates, similarities[candidates], self.materializer(query, keywords),
+                           len(self.index), keywords)
+
+    def search(self, query: str, keywords: List[str], limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """Ranked results in the shape FloraFaunaChatbot.search_database returns"""
+        return self.rank(query, keywords).page(offset, limit)
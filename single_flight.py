@@ -0,0 +1,108 @@
+"""
+Single-Flight Request Coalescing
+Process-wide sharing of identical in-flight reads across Streamlit sessions
+
+Streamlit runs each session's script on its own thread. When many sessions ask for
+the same data at once, the first caller (the leader) runs the request and every
+concurrent caller with the same key waits for and shares its result. A finished
+result is reused for `ttl` seconds before the next call fetches again; expired
+results are swept out when new calls start, so keys seen once don't pile up.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def request_key(method: str, filters: Optional[Dict[str, Any]] = None, projection: Any = None) -> Hashable:
+    """Key identifying a read by method, filters and selected columns"""
+    filter_items = tuple(sorted((str(k), repr(v)) for k, v in (filters or {}).items()))
+    return (method, filter_items, repr(projection))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._swept_at = 0.0
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0, 'hits': 0, 'errors': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn()'s result, sharing it with concurrent and recent callers of the same key"""
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                if call.error is None and time.monotonic() - call.finished_at < self.ttl:
+                    self._stats['hits'] += 1
+                    return call.result
+                call = None
+            if call is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                self._evict_expired()
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+                # Failures are not cached: the next caller retries
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+        return call.result
+
+    def _evict_expired(self):
+        """Drop finished results older than ttl, at most once per ttl; the caller holds the lock"""
+        now = time.monotonic()
+        if now - self._swept_at < self.ttl:
+            return
+        self._swept_at = now
+        expired = [key for key, call in self._calls.items()
+                   if call.done.is_set() and now - call.finished_at >= self.ttl]
+        for key in expired:
+            del self._calls[key]
+
+    def forget(self, key: Optional[Hashable] = None):
+        """Drop cached results (all keys by default), e.g. after a write"""
+        # In-flight calls are dropped too: their current waiters still get the result,
+        # but later callers start a fresh read that sees the write
+        with self._lock:
+            if key is None:
+                self._calls.clear()
+            else:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        calls = stats['calls']
+        stats['shared_ratio'] = (stats['coalesced'] + stats['hits']) / calls if calls else 0.0
+        return stats
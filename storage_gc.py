@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Storage Garbage Collector
+Find and delete storage objects that no data_entries row references
+
+Objects become orphaned when a record is deleted (delete_record only removes the row)
+or when the insert fails after a successful upload. Objects younger than the grace
+period are never collected, so uploads whose insert is still in flight are safe.
+
+Usage:
+    python storage_gc.py                  # dry run: report reclaimable bytes
+    python storage_gc.py --delete         # delete orphans
+    python storage_gc.py --bucket images --grace-hours 48
+"""
+
+import sys
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+from dateutil import parser as date_parser
+
+from supabase_db import BUCKET_MAPPING, parse_storage_url
+
+DEFAULT_GRACE_PERIOD = datetime.timedelta(hours=24)
+
+
+class StorageGarbageCollector:
+    """Diff storage buckets against data_entries.file_url and remove unreferenced objects"""
+
+    def __init__(self, client, buckets: Optional[List[str]] = None,
+                 grace_period: datetime.timedelta = DEFAULT_GRACE_PERIOD,
+                 page_size: int = 1000, batch_size: int = 100, max_workers: int = 4):
+        self.client = client
+        self.buckets = buckets or list(BUCKET_MAPPING.values())
+        self.grace_period = grace_period
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def list_bucket(self, bucket: str, prefix: str = "") -> Iterator[Dict[str, Any]]:
+        """Yield every object in a bucket, following pagination and folders"""
+        storage = self.client.storage.from_(bucket)
+        offset = 0
+        while True:
+            page = storage.list(prefix, {"limit": self.page_size, "offset": offset,
+                                         "sortBy": {"column": "name", "order": "asc"}})
+            if not page:
+                break
+            for entry in page:
+                path = f"{prefix}/{entry['name']}" if prefix else entry['name']
+                if entry.get('id') is None:
+                    # Folders are returned without an id
+                    yield from self.list_bucket(bucket, path)
+                else:
+                    yield dict(entry, path=path)
+            # Storage may return fewer than asked for; only an empty page is the end
+            offset += len(page)
+
+    def referenced_objects(self) -> Set[Tuple[str, str]]:
+        """(bucket, path) pairs referenced by data_entries.file_url
+
+        Keyset paging on id: rows deleted during the scan would shift offsets and make
+        later rows (and their files) look unreferenced. PostgREST caps each response at
+        its max-rows setting, which may be below page_size, so a short page doesn't mean
+        the end: paging continues until a page comes back empty. This set decides what
+        --delete removes, so it must be complete.
+        """
+        referenced = set()
+        last_id = 0
+        while True:
+            response = (self.client.table("data_entries").select("id, file_url")
+                        .not_.is_("file_url", "null").gt("id", last_id).order("id")
+                        .limit(self.page_size).execute())
+            rows = response.data or []
+            for row in rows:
+                location = parse_storage_url(row.get('file_url'))
+                if location:
+                    referenced.add(location)
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+        return referenced
+
+    def find_orphans(self, now: Optional[datetime.datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Unreferenced objects older than the grace period, per bucket"""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        cutoff = now - self.grace_period
+
+        # Bucket listings and the file_url scan are independent, so run them together
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            referenced_future = executor.submit(self.referenced_objects)
+            listing_futures = {bucket: executor.submit(lambda b=bucket: list(self.list_bucket(b)))
+                               for bucket in self.buckets}
+            referenced = referenced_future.result()
+            listings = {bucket: future.result() for bucket, future in listing_futures.items()}
+
+        orphans = {}
+        for bucket, objects in listings.items():
+            orphans[bucket] = [
+                obj for obj in objects
+                if (bucket, obj['path']) not in referenced and _created_before(obj, cutoff)
+            ]
+        return orphans
+
+    def collect(self, dry_run: bool = True, now: Optional[datetime.datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Delete orphans in batches (or only report them) and return a per-bucket report"""
+        report = {}
+        for bucket, objects in self.find_orphans(now).items():
+            paths = [obj['path'] for obj in objects]
+            deleted = 0
+            errors = []
+            if not dry_run:
+                storage = self.client.storage.from_(bucket)
+                for start in range(0, len(paths), self.batch_size):
+                    batch = paths[start:start + self.batch_size]
+                    try:
+                        storage.remove(batch)
+                        deleted += len(batch)
+                    except Exception as e:
+                        errors.append(str(e))
+            report[bucket] = {
+                'orphans': len(paths),
+                'reclaimable_bytes': sum(_object_size(obj) for obj in objects),
+                'deleted': deleted,
+                'errors': errors,
+                'paths': paths,
+            }
+        return report
+
+
+def _object_size(obj: Dict[str, Any]) -> int:
+    return int((obj.get('metadata') or {}).get('size') or 0)
+
+
+def _created_before(obj: Dict[str, Any], cutoff: datetime.datetime) -> bool:
+    created_at = obj.get('created_at') or obj.get('updated_at')
+    if not created_at:
+        # Unknown age - keep it rather than risk deleting an in-flight upload
+        return False
+    created = date_parser.isoparse(created_at)
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=datetime.timezone.utc)
+    return created < cutoff
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Delete unreferenced objects from Supabase Storage")
+    parser.add_argument("--delete", action="store_true", help="Delete orphans (default is a dry run)")
+    parser.add_argument("--bucket", action="append", help="Bucket to scan (repeatable, default: all)")
+    parser.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_PERIOD.total_seconds() / 3600)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Storage Garbage Collector")
+    print("=" * 50)
+
+    from supabase_db import supabase_manager
+    if not supabase_manager.is_available():
+        print("❌ Supabase not available. Check SUPABASE_URL and SUPABASE_ANON_KEY")
+        return False
+
+    collector = StorageGarbageCollector(
+        supabase_manager.supabase,
+        buckets=args.bucket,
+        grace_period=datetime.timedelta(hours=args.grace_hours),
+        batch_size=args.batch_size,
+    )
+    try:
+        report = collector.collect(dry_run=not args.delete)
+    except Exception as e:
+        print(f"❌ Garbage collection failed: {e}")
+        return False
+
+    total_bytes = 0
+    for bucket, stats in report.items():
+        total_bytes += stats['reclaimable_bytes']
+        line = f"🪣 {bucket}: {stats['orphans']} orphans, {_format_bytes(stats['reclaimable_bytes'])}"
+        if args.delete:
+            line += f", {stats['deleted']} deleted"
+        print(line)
+        for error in stats['errors']:
+            print(f"   ❌ {error}")
+
+    print("=" * 50)
+    if args.delete:
+        print(f"✅ Reclaimed up to {_format_bytes(total_bytes)}")
+    else:
+        print(f"💡 Dry run: {_format_bytes(total_bytes)} reclaimable. Re-run with --delete to remove")
+    return all(not stats['errors'] for stats in report.values())
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
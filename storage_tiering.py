@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Storage Tiering
+Move media that hasn't been accessed recently to a cold bucket, and bring it back on preview
+
+Objects are copied to the cold bucket first, then file_url is switched with a
+compare-and-set update (only if it still points at the hot copy), and only then is
+the hot copy removed - a failure at any step leaves a working file_url behind.
+Text entries are gzip-compressed in the cold bucket; media formats are already compressed.
+Each transfer reserves the object's size from the process memory budget, and
+(de)compressed copies are spooled to a temp file rather than held in memory.
+
+Usage:
+    python storage_tiering.py                 # dry run: list candidates
+    python storage_tiering.py --apply --days 90 --workers 4
+"""
+
+import sys
+import zlib
+import argparse
+import datetime
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+
+from supabase_db import BUCKET_MAPPING, parse_storage_url
+from rate_limiter import rate_limiter, STORAGE_READ, STORAGE_UPLOAD
+from upload_stream import CHUNK_SIZE, SpooledUpload, memory_budget, open_for_upload, spool_chunks
+
+COLD_BUCKET = "cold-media"
+DEFAULT_COLD_AFTER_DAYS = 90
+TIER_HOT = "hot"
+TIER_COLD = "cold"
+COMPRESSED_TYPES = {'text'}
+
+
+def iter_cold_candidates(client, cold_after: datetime.timedelta, batch_size: int = 50,
+                         now: Optional[datetime.datetime] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Batches of hot entries not accessed (or, if never accessed, not created) within cold_after"""
+    cutoff = ((now or datetime.datetime.now()) - cold_after).isoformat()
+    last_id = 0
+    while True:
+        # Keyset paging: moved rows leave the filter, so offsets would skip entries
+        response = (client.table("data_entries")
+                    .select("id, entry_type, file_url, metadata")
+                    .eq("storage_tier", TIER_HOT)
+                    .not_.is_("file_url", "null")
+                    .or_(f"last_accessed_at.lt.{cutoff},and(last_accessed_at.is.null,timestamp.lt.{cutoff})")
+                    .gt("id", last_id)
+                    .order("id")
+                    .limit(batch_size)
+                    .execute())
+        rows = response.data or []
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1]['id']
+        if len(rows) < batch_size:
+            break
+
+
+def move_to_cold(client, row: Dict[str, Any], cold_bucket: str = COLD_BUCKET) -> str:
+    """Move one entry's object to the cold bucket; returns 'moved', 'skipped' or 'conflict'"""
+    location = parse_storage_url(row.get('file_url'))
+    if location is None or location[0] not in BUCKET_MAPPING.values():
+        return 'skipped'
+    bucket, path = location
+
+    with memory_budget.reserve(_expected_size(row)):
+        data = rate_limiter.call(STORAGE_READ, client.storage.from_(bucket).download, path)
+        cold_path = f"{bucket}/{path}"
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if row.get('entry_type') in COMPRESSED_TYPES:
+            data = spool_chunks(_gzip_chunks(data))
+            cold_path += ".gz"
+            content_type = "application/gzip"
+
+        cold_storage = client.storage.from_(cold_bucket)
+        _upload(cold_storage, cold_path, data, content_type)
+    cold_url = cold_storage.get_public_url(cold_path)
+
+    if not _swap_file_url(client, row['id'], row['file_url'], cold_url, TIER_COLD):
+        # The row changed while we copied - keep the hot object and drop our copy
+        cold_storage.remove([cold_path])
+        return 'conflict'
+
+    client.storage.from_(bucket).remove([path])
+    return 'moved'
+
+
+def rehydrate(client, row: Dict[str, Any]) -> Optional[str]:
+    """Bring a cold entry's object back to its hot bucket and return the new file_url"""
+    location = parse_storage_url(row.get('file_url'))
+    if location is None:
+        return None
+    cold_bucket, cold_path = location
+
+    with memory_budget.reserve(_expected_size(row)):
+        data = rate_limiter.call(STORAGE_READ, client.storage.from_(cold_bucket).download, cold_path)
+        hot_bucket, _, path = cold_path.partition('/')
+        if path.endswith(".gz"):
+            data = spool_chunks(_gunzip_chunks(data))
+            path = path[:-len(".gz")]
+
+        hot_storage = client.storage.from_(hot_bucket)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        _upload(hot_storage, path, data, content_type)
+    hot_url = hot_storage.get_public_url(path)
+
+    if _swap_file_url(client, row['id'], row['file_url'], hot_url, TIER_HOT):
+        client.storage.from_(cold_bucket).remove([cold_path])
+        return hot_url
+
+    # Another session rehydrated it first - use whatever the row points at now
+    response = client.table("data_entries").select("file_url").eq("id", row['id']).limit(1).execute()
+    return response.data[0]['file_url'] if response.data else hot_url
+
+
+def _expected_size(row: Dict[str, Any]) -> int:
+    """Object size recorded at save time (0 if unknown)"""
+    metadata = row.get('metadata')
+    if isinstance(metadata, dict):
+        try:
+            return int(metadata.get('file_size') or 0)
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+def _gzip_chunks(data: bytes) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield compressor.compress(view[start:start + CHUNK_SIZE])
+    yield compressor.flush()
+
+
+def _gunzip_chunks(data: bytes) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(wbits=31)
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield decompressor.decompress(view[start:start + CHUNK_SIZE])
+    yield decompressor.flush()
+
+
+def _upload(storage, path: str, payload, content_type: str):
+    """Upload bytes, or stream a spooled payload, overwriting any existing object"""
+    file_options = {"content-type": content_type, "upsert": "true"}
+    if not isinstance(payload, SpooledUpload):
+        rate_limiter.call(STORAGE_UPLOAD, storage.upload, path, payload, file_options=file_options)
+        return
+    reader = open_for_upload(payload)
+    try:
+        rate_limiter.call(STORAGE_UPLOAD, storage.upload, path, reader, file_options=file_options)
+    finally:
+        reader.detach()
+        payload.file.close()
+
+
+def _swap_file_url(client, record_id: int, expected_url: str, new_url: str, tier: str) -> bool:
+    """Compare-and-set file_url; True if this call made the change"""
+    updates = {"file_url": new_url, "storage_tier": tier}
+    if tier == TIER_HOT:
+        updates["last_accessed_at"] = datetime.datetime.now().isoformat()
+    response = (client.table("data_entries").update(updates)
+                .eq("id", record_id).eq("file_url", expected_url).execute())
+    return bool(response.data)
+
+
+def run_tiering(client, cold_after: datetime.timedelta, apply: bool = False,
+                batch_size: int = 50, max_workers: int = 4,
+                cold_bucket: str = COLD_BUCKET) -> Dict[str, int]:
+    """Move every cold candidate (or only count them when apply is False)"""
+    report = {'candidates': 0, 'moved': 0, 'skipped': 0, 'conflict': 0, 'failed': 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in iter_cold_candidates(client, cold_after, batch_size):
+            report['candidates'] += len(batch)
+            if not apply:
+                continue
+            # Bounded concurrency: one batch in flight at a time, max_workers objects each
+            futures = [executor.submit(move_to_cold, client, row, cold_bucket) for row in batch]
+            for future in futures:
+                try:
+                    report[future.result()] += 1
+                except Exception:
+                    report['failed'] += 1
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    parser = argparse.ArgumentParser(description="Move rarely accessed media to cold storage")
+    parser.add_argument("--apply", action="store_true", help="Move objects (default is a dry run)")
+    parser.add_argument("--days", type=int, default=DEFAULT_COLD_AFTER_DAYS,
+                        help="Move objects not accessed for this many days")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cold-bucket", default=COLD_BUCKET)
+    args = parser.parse_args(argv)
+
+    print("Flora and Fauna - Storage Tiering")
+    print("=" * 50)
+
+    from supabase_db import supabase_manager, TIERING_SCHEMA_VERSION
+    if not supabase_manager.is_available():
+        print("❌ Supabase not available. Check SUPABASE_URL and SUPABASE_ANON_KEY")
+        return False
+    if not supabase_manager.has_schema_version(TIERING_SCHEMA_VERSION):
+        print(f"❌ Storage tiering needs schema v{TIERING_SCHEMA_VERSION}. Run: python schema_migrations.py --backend postgres")
+        return False
+
+    report = run_tiering(supabase_manager.supabase, datetime.timedelta(days=args.days),
+                         apply=args.apply, batch_size=args.batch_size,
+                         max_workers=args.workers, cold_bucket=args.cold_bucket)
+
+    print(f"🧊 Cold candidates (not accessed for {args.days} days): {report['candidates']}")
+    if args.apply:
+        print(f"✅ Moved: {report['moved']}")
+        print(f"⏭️ Skipped (not in a media bucket): {report['skipped']}")
+        print(f"🔁 Changed during move: {report['conflict']}")
+        print(f"❌ Failed: {report['failed']}")
+    else:
+        print("💡 Dry run. Re-run with --apply to move them")
+    return report['failed'] == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -3,23 +3,142 @@ Supabase Database Integration
 Cloud PostgreSQL database for persistent storage
 """
 import streamlit as st
-import pandas as pd
+import atexit
 import datetime
+import hashlib
 import json
-from typing import Optional, Dict, Any, List
+import time
+import threading
+import importlib.util
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+if TYPE_CHECKING:
+    # pandas is only needed by get_all_data; importing it here would slow every page's cold start
+    import pandas as pd
+    from supabase import Client
+
+# The supabase client (and its httpx/postgrest stack) is imported only when connecting
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
+
+from schema_migrations import latest_version
+from save_outbox import SaveOutbox, STATE_INSERTED, STATE_STARTED, STATE_UPLOADED
+from single_flight import SingleFlight, request_key
+from rate_limiter import rate_limiter, is_rate_limited, REST, STORAGE_READ, STORAGE_UPLOAD
+from upload_stream import StoredUpload, open_for_upload, payload_sha256
+
+# Schema version that added data_entries.content_hash (migrations/postgres/0005)
+CONTENT_HASH_SCHEMA_VERSION = 5
+# Schema version that added the trigger-maintained data_entries_stats tables (0006)
+STATS_SCHEMA_VERSION = 6
+# Schema version that added the unique data_entries.idempotency_key column (0007/0008)
+IDEMPOTENCY_SCHEMA_VERSION = 8
+# How long a finished read is shared with later callers (seconds)
+READ_SHARE_TTL = 5.0
+# Schema version that added storage_tier and access tracking (0009)
+TIERING_SCHEMA_VERSION = 9
+# Errors meaning schema_migrations doesn't exist (Postgres undefined_table, PostgREST
+# table not in its schema cache), i.e. the database predates the migration tool
+MISSING_RELATION_CODES = {'42P01', 'PGRST205'}
+# Seconds between retries of a schema version lookup that failed
+SCHEMA_RECHECK_INTERVAL = 30.0
+
+# Storage bucket for each entry type
+BUCKET_MAPPING = {
+    'image': 'images',
+    'audio': 'audios',
+    'video': 'videos',
+    'text': 'texts'
+}
+
+def parse_storage_url(file_url: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Split a Supabase Storage public URL into (bucket, object path)"""
+    if not file_url or not isinstance(file_url, str):
+        return None
+    marker = "/storage/v1/object/public/"
+    path = urlparse(file_url).path
+    if marker not in path:
+        return None
+    bucket, _, object_path = path.split(marker, 1)[1].partition('/')
+    if not bucket or not object_path:
+        return None
+    return bucket, unquote(object_path)
+
+class AccessTracker:
+    """Buffer record accesses in memory and flush them in batches
+    
+    Repeated accesses to a record within one flush window count once, which keeps
+    the counter to one small write per window instead of one per preview. A timer
+    thread (started on the first access) flushes every flush_interval, and pending
+    accesses are flushed at exit, so the last access of a quiet spell isn't lost.
+    """
+    
+    def __init__(self, flush_callback, flush_interval: float = 60.0, max_pending: int = 200):
+        self.flush_callback = flush_callback
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        atexit.register(self.close)
+    
+    def record(self, record_id: int):
+        with self._lock:
+            self._pending.add(int(record_id))
+            due = (len(self._pending) >= self.max_pending or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+            if self._timer is None and not self._stopped.is_set():
+                self._timer = threading.Thread(target=self._flush_periodically, name="access-flush", daemon=True)
+                self._timer.start()
+        if due:
+            self.flush()
+    
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self):
+        with self._lock:
+            ids = sorted(self._pending)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+        if ids:
+            try:
+                self.flush_callback(ids)
+            except Exception:
+                # Access counts are advisory; losing one window only delays tiering decisions
+                pass
+    
+    def close(self):
+        """Stop the timer and write what's pending"""
+        self._stopped.set()
+        self.flush()
+
+def _is_missing_relation(error: Exception) -> bool:
+    """Whether a PostgREST error says the queried table doesn't exist"""
+    code = getattr(error, 'code', None)
+    return code in MISSING_RELATION_CODES or any(code in str(error) for code in MISSING_RELATION_CODES)
 
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
 
 class SupabaseManager:
     """Manage Supabase database operations"""
     
     def __init__(self):
-        self.supabase: Optional[Client] = None
+        self.supabase: Optional["Client"] = None
         self.table_name = "data_entries"
+        self.schema_version: Optional[int] = None
+        self._schema_checked_at = 0.0
+        self.latest_schema_version = latest_version("postgres")
+        self._outbox: Optional[SaveOutbox] = None
+        self.access_tracker = AccessTracker(self._flush_access)
+        # Identical concurrent reads from all sessions share one request
+        self.reads = SingleFlight(ttl=READ_SHARE_TTL)
+        # Process-wide token buckets keep bulk ingest under Supabase's request limits
+        self.limiter = rate_limiter
+        # Perceptual-hash index of saved photos, built on the first similarity lookup
+        self._image_index = None
         self._initialize()
     
     def _initialize(self):
@@ -33,8 +152,10 @@ class SupabaseManager:
             key = st.secrets.get("SUPABASE_ANON_KEY", "")
             
             if url and key:
+                from supabase import create_client
                 self.supabase = create_client(url, key)
                 # Don't try to create tables - they should exist from setup script
+                self.schema_version = self.get_schema_version()
             else:
                 st.warning("🔑 Supabase credentials not found in secrets. Please configure SUPABASE_URL and SUPABASE_ANON_KEY")
         except Exception as e:
@@ -47,16 +168,17 @@ class SupabaseManager:
         
         try:
             # Check if table exists by trying to count rows
-            response = self.supabase.table("data_entries").select("id", count="exact").limit(1).execute()
+            response = self._execute(self.supabase.table("data_entries").select("id", count="exact").limit(1))
             st.success(f"✅ Connected to Supabase! Table 'data_entries' is ready.")
         except Exception as e:
             # Table might not exist, show instructions to create it
             st.warning(f"""
             🏗️ **Table Setup Required**
             
-            Please create the table in your Supabase database by running the SQL script: `setup_new_supabase.sql`
+            Please create the table in your Supabase database by running the migrations:
+            `python schema_migrations.py --backend postgres --dsn <your Supabase connection string>`
             
-            Or manually run this SQL in your Supabase SQL Editor:
+            Or manually run this SQL in your Supabase SQL Editor (then apply `migrations/postgres/` in order):
             ```sql
             CREATE TABLE data_entries (
                 id SERIAL PRIMARY KEY,
@@ -78,6 +200,40 @@ class SupabaseManager:
         """Check if Supabase is available and configured"""
         return SUPABASE_AVAILABLE and self.supabase is not None
     
+    def _execute(self, query):
+        """Execute a PostgREST query within the REST rate limit"""
+        return self.limiter.call(REST, query.execute)
+    
+    def get_schema_version(self) -> Optional[int]:
+        """Get the latest applied migration version (0 if never migrated, None if unknown)"""
+        if not self.supabase:
+            return None
+        
+        self._schema_checked_at = time.monotonic()
+        try:
+            response = self._execute(self.supabase.table("schema_migrations").select("version").order("version", desc=True).limit(1))
+            return response.data[0]['version'] if response.data else 0
+        except Exception as e:
+            if _is_missing_relation(e):
+                # Table doesn't exist yet - database predates the migration tool
+                return 0
+            # Timeout, rate limit, outage: unknown, and looked up again later
+            return None
+    
+    def has_schema_version(self, version: int) -> bool:
+        """Check whether the connected database has at least the given migration applied"""
+        if self.schema_version is None and self.supabase is not None and \
+                time.monotonic() - self._schema_checked_at >= SCHEMA_RECHECK_INTERVAL:
+            self.schema_version = self.get_schema_version()
+        return self.schema_version is not None and self.schema_version >= version
+    
+    @property
+    def outbox(self) -> SaveOutbox:
+        """Local journal of in-progress saves (created on first use)"""
+        if self._outbox is None:
+            self._outbox = SaveOutbox()
+        return self._outbox
+    
     def upload_file_to_storage(self, uploaded_file, bucket: str) -> Optional[str]:
         """Upload file to Supabase Storage and return public URL"""
         if not self.is_available():
@@ -89,12 +245,18 @@ class SupabaseManager:
             file_extension = uploaded_file.name.split('.')[-1] if '.' in uploaded_file.name else ''
             file_name = f"{timestamp}_{uploaded_file.name}"
             
-            # Upload file to Supabase Storage
-            response = self.supabase.storage.from_(bucket).upload(
-                file_name, 
-                uploaded_file.getvalue(),
-                file_options={"content-type": uploaded_file.type}
-            )
+            # Upload file to Supabase Storage, streamed from the uploader's own buffer
+            reader = open_for_upload(uploaded_file)
+            try:
+                response = self.limiter.call(
+                    STORAGE_UPLOAD, self.supabase.storage.from_(bucket).upload,
+                    file_name, 
+                    reader,
+                    file_options={"content-type": uploaded_file.type}
+                )
+            finally:
+                # Detach so closing the reader doesn't close the UploadedFile
+                reader.detach()
             
             if response:
                 # Get public URL
@@ -105,11 +267,19 @@ class SupabaseManager:
                 return None
                 
         except Exception as e:
-            st.error(f"Cloud storage error: {str(e)}")
+            if is_rate_limited(e):
+                st.error("⏳ Cloud storage is rate limiting uploads. Please wait a minute and try again.")
+            else:
+                st.error(f"Cloud storage error: {str(e)}")
             return None
 
-    def upload_bytes_to_storage(self, file_bytes: bytes, filename: str, bucket: str, data_type: str) -> Optional[str]:
-        """Upload file bytes to Supabase Storage and return public URL"""
+    def upload_bytes_to_storage(self, file_bytes: Union[bytes, StoredUpload], filename: str, bucket: str, data_type: str,
+                                object_name: Optional[str] = None) -> Optional[str]:
+        """Upload file bytes to Supabase Storage and return public URL
+        
+        A StoredUpload is streamed from disk instead of being read into memory.
+        A fixed object_name is overwritten on re-upload, so retries don't create duplicates.
+        """
         if not self.is_available():
             return None
         
@@ -117,7 +287,7 @@ class SupabaseManager:
             # Create unique filename with timestamp
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             file_extension = filename.split('.')[-1] if '.' in filename else ''
-            unique_filename = f"{timestamp}_{filename}"
+            unique_filename = object_name or f"{timestamp}_{filename}"
             
             # Determine content type based on data type and extension
             content_type_mapping = {
@@ -126,14 +296,30 @@ class SupabaseManager:
                 'video': {'mp4': 'video/mp4', 'avi': 'video/avi', 'mov': 'video/quicktime'}
             }
             
-            content_type = content_type_mapping.get(data_type, {}).get(file_extension.lower(), 'application/octet-stream')
+            # Fall back to the type sniffed from the file's leading bytes while it was written
+            sniffed_type = getattr(file_bytes, 'mime', None) or 'application/octet-stream'
+            content_type = content_type_mapping.get(data_type, {}).get(file_extension.lower(), sniffed_type)
+            
+            file_options = {"content-type": content_type}
+            if object_name:
+                file_options["upsert"] = "true"
             
             # Upload file to Supabase Storage
-            response = self.supabase.storage.from_(bucket).upload(
-                unique_filename, 
-                file_bytes,
-                file_options={"content-type": content_type}
-            )
+            if isinstance(file_bytes, StoredUpload):
+                with open_for_upload(file_bytes) as reader:
+                    response = self.limiter.call(
+                        STORAGE_UPLOAD, self.supabase.storage.from_(bucket).upload,
+                        unique_filename, 
+                        reader,
+                        file_options=file_options
+                    )
+            else:
+                response = self.limiter.call(
+                    STORAGE_UPLOAD, self.supabase.storage.from_(bucket).upload,
+                    unique_filename, 
+                    bytes(file_bytes),
+                    file_options=file_options
+                )
             
             if response:
                 # Get public URL
@@ -144,10 +330,14 @@ class SupabaseManager:
                 return None
                 
         except Exception as e:
-            st.error(f"Cloud storage error: {str(e)}")
+            if is_rate_limited(e):
+                st.error("⏳ Cloud storage is rate limiting uploads. Please wait a minute and try again.")
+            else:
+                st.error(f"Cloud storage error: {str(e)}")
             return None
 
-    def upload_text_to_storage(self, text_content: str, filename: str) -> Optional[str]:
+    def upload_text_to_storage(self, text_content: str, filename: str,
+                               object_name: Optional[str] = None) -> Optional[str]:
         """Upload text content to Supabase Storage as a text file"""
         if not self.is_available():
             return None
@@ -155,150 +345,419 @@ class SupabaseManager:
         try:
             # Create text file content
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = f"{timestamp}_{filename}"
+            file_name = object_name or f"{timestamp}_{filename}"
             
             # Convert text to bytes
             text_bytes = text_content.encode('utf-8')
             
+            file_options = {"content-type": "text/plain"}
+            if object_name:
+                file_options["upsert"] = "true"
+            
             # Upload to texts bucket
-            response = self.supabase.storage.from_('texts').upload(
+            response = self.limiter.call(
+                STORAGE_UPLOAD, self.supabase.storage.from_(BUCKET_MAPPING['text']).upload,
                 file_name, 
                 text_bytes,
-                file_options={"content-type": "text/plain"}
+                file_options=file_options
             )
             
             if response:
                 # Get public URL
-                public_url = self.supabase.storage.from_('texts').get_public_url(file_name)
+                public_url = self.supabase.storage.from_(BUCKET_MAPPING['text']).get_public_url(file_name)
                 return public_url
             else:
                 st.error(f"Failed to upload text to cloud storage")
                 return None
                 
         except Exception as e:
-            st.error(f"Text cloud storage error: {str(e)}")
+            if is_rate_limited(e):
+                st.error("⏳ Cloud storage is rate limiting uploads. Please wait a minute and try again.")
+            else:
+                st.error(f"Text cloud storage error: {str(e)}")
             return None
 
-    def save_data(self, data_type: str, filename: str, file_data: bytes = None, 
-                  additional_info: Dict = None, location_data: Dict = None) -> Optional[int]:
-        """Save data to Supabase"""
+    def save_data(self, data_type: str, filename: str, file_data: Union[bytes, StoredUpload] = None, 
+                  additional_info: Dict = None, location_data: Dict = None,
+                  idempotency_key: Optional[str] = None) -> Optional[int]:
+        """Save data to Supabase
+        
+        file_data is either bytes or a StoredUpload already written to disk, which is
+        uploaded by streaming the file. With an idempotency_key, saving the same entry again (double click, Streamlit
+        rerun, retry) returns the original record ID instead of uploading and inserting
+        a duplicate.
+        """
         if not self.is_available():
             st.error("❌ Supabase not available")
             return None
         
         try:
-            # Upload file to cloud storage
-            file_url = None
-            
-            # Handle text data differently
-            if data_type == 'text' and additional_info and additional_info.get('content'):
-                # For text data, upload content as text file
-                text_content = additional_info.get('content')
-                file_url = self.upload_text_to_storage(text_content, filename)
-                st.success(f"✅ Text uploaded to storage: {file_url[:50]}..." if file_url else "❌ Text upload failed")
-            
-            elif file_data:
-                # For other file types, upload the file bytes directly
-                bucket_mapping = {
-                    'image': 'images',
-                    'audio': 'audios', 
-                    'video': 'videos'
-                }
-                bucket = bucket_mapping.get(data_type, 'images')
-                file_url = self.upload_bytes_to_storage(file_data, filename, bucket, data_type)
-                st.success(f"✅ {data_type} uploaded to {bucket}: {file_url[:50]}..." if file_url else f"❌ {data_type} upload failed")
-            
-            # Prepare data for insertion
-            record = {
-                "entry_type": data_type,
-                "title": filename,
-                "content": additional_info.get("content", "") if additional_info else "",  # Store actual text content
-                "file_path": filename,  # Local filename for reference
-                "file_url": file_url,   # Cloud storage URL
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-            
-            # Add location data
-            if location_data:
-                # Handle both old structure (with coordinates dict) and new flat structure
-                if 'coordinates' in location_data:
-                    record["location_lat"] = location_data['coordinates'].get('latitude')
-                    record["location_lng"] = location_data['coordinates'].get('longitude')
-                else:
-                    # New flat structure
-                    record["location_lat"] = location_data.get('latitude')
-                    record["location_lng"] = location_data.get('longitude')
-                record["location_name"] = f"{location_data.get('city', '')}, {location_data.get('country', '')}"
+            record = self._build_record(data_type, filename, file_data, additional_info, location_data)
             
-            # Add additional metadata
-            if additional_info:
-                record["metadata"] = additional_info
+            if idempotency_key:
+                return self._save_idempotent(idempotency_key, data_type, filename, file_data, additional_info, record)
             
-            # Insert data
-            st.info(f"🔄 Inserting record into data_entries table...")
-            response = self.supabase.table("data_entries").insert(record).execute()
-            
-            if response.data:
-                record_id = response.data[0]['id']
-                st.success(f"✅ Record saved to database with ID: {record_id}")
-                return record_id
-            else:
-                st.error("❌ No data returned from database insert")
-                return None
+            record["file_url"] = self._upload_for_save(data_type, filename, file_data, additional_info)
+            return self._insert_record(record)
                 
         except Exception as e:
             st.error(f"❌ Supabase save error: {str(e)}")
             return None
+    
+    def _build_record(self, data_type: str, filename: str, file_data: Optional[Union[bytes, StoredUpload]],
+                      additional_info: Optional[Dict], location_data: Optional[Dict]) -> Dict[str, Any]:
+        """Prepare the data_entries row for a save (file_url is filled in after upload)"""
+        record = {
+            "entry_type": data_type,
+            "title": filename,
+            "content": additional_info.get("content", "") if additional_info else "",  # Store actual text content
+            "file_path": filename,  # Local filename for reference
+            "file_url": None,       # Cloud storage URL
+            "timestamp": datetime.datetime.now().isoformat()
+        }
+        
+        # Content hash for duplicate detection (only once the column exists)
+        if self.has_schema_version(CONTENT_HASH_SCHEMA_VERSION):
+            if file_data:
+                record["content_hash"] = payload_sha256(file_data)
+            elif additional_info and additional_info.get('content'):
+                record["content_hash"] = hashlib.sha256(additional_info['content'].encode('utf-8')).hexdigest()
+        
+        # Add location data
+        if location_data:
+            # Handle both old structure (with coordinates dict) and new flat structure
+            if 'coordinates' in location_data:
+                record["location_lat"] = location_data['coordinates'].get('latitude')
+                record["location_lng"] = location_data['coordinates'].get('longitude')
+            else:
+                # New flat structure
+                record["location_lat"] = location_data.get('latitude')
+                record["location_lng"] = location_data.get('longitude')
+            record["location_name"] = f"{location_data.get('city', '')}, {location_data.get('country', '')}"
+        
+        # Perceptual hashes for similar-photo search and duplicate flagging
+        if data_type == 'image' and file_data and not (additional_info or {}).get('image_hash'):
+            from image_similarity import image_hashes
+            hashes = image_hashes(file_data)
+            if hashes:
+                additional_info = dict(additional_info or {}, image_hash=hashes)
+        
+        # Add additional metadata
+        if additional_info:
+            record["metadata"] = additional_info
+        
+        return record
+    
+    def _upload_for_save(self, data_type: str, filename: str, file_data: Optional[Union[bytes, StoredUpload]],
+                         additional_info: Optional[Dict], object_name: Optional[str] = None) -> Optional[str]:
+        """Upload the payload of a save to its bucket and return the public URL"""
+        file_url = None
+        
+        # Handle text data differently
+        if data_type == 'text' and additional_info and additional_info.get('content'):
+            # For text data, upload content as text file
+            text_content = additional_info.get('content')
+            file_url = self.upload_text_to_storage(text_content, filename, object_name)
+            st.success(f"✅ Text uploaded to storage: {file_url[:50]}..." if file_url else "❌ Text upload failed")
+        
+        elif file_data:
+            # For other file types, upload the file bytes directly
+            bucket = BUCKET_MAPPING.get(data_type, 'images')
+            file_url = self.upload_bytes_to_storage(file_data, filename, bucket, data_type, object_name)
+            st.success(f"✅ {data_type} uploaded to {bucket}: {file_url[:50]}..." if file_url else f"❌ {data_type} upload failed")
+        
+        return file_url
+    
+    def _save_idempotent(self, key: str, data_type: str, filename: str, file_data: Optional[Union[bytes, StoredUpload]],
+                         additional_info: Optional[Dict], record: Dict[str, Any]) -> Optional[int]:
+        """Resume a keyed save from the outbox state instead of repeating finished steps"""
+        entry = self.outbox.get(key)
+        if entry and entry['state'] == STATE_INSERTED:
+            st.info(f"ℹ️ Already saved (ID: {entry['record_id']})")
+            return entry['record_id']
+        
+        if self.has_schema_version(IDEMPOTENCY_SCHEMA_VERSION):
+            record["idempotency_key"] = key
+        
+        if entry is None:
+            # Object name derived from the key: a re-upload overwrites instead of duplicating
+            entry = self.outbox.begin(key, data_type, BUCKET_MAPPING.get(data_type, 'images'),
+                                      f"{key[:16]}_{filename}", record)
+        else:
+            # An earlier attempt may have inserted the row before being interrupted
+            existing_id = self._find_existing_record(key, entry['record'])
+            if existing_id is not None:
+                self.outbox.mark_inserted(key, existing_id)
+                st.info(f"ℹ️ Already saved (ID: {existing_id})")
+                return existing_id
+        
+        if entry['state'] == STATE_UPLOADED:
+            file_url = entry['file_url']
+        else:
+            file_url = self._upload_for_save(data_type, filename, file_data, additional_info, entry['object_name'])
+            if file_url:
+                self.outbox.mark_uploaded(key, file_url)
+            elif file_data or (data_type == 'text' and (additional_info or {}).get('content')):
+                # Don't insert a row without its file: the entry stays started so a retry uploads again
+                return None
+
+        # Insert the record prepared on the first attempt so retries keep its timestamp
+        record_id = self._insert_record(dict(entry['record'], file_url=file_url))
+        if record_id is not None:
+            self.outbox.mark_inserted(key, record_id)
+        return record_id
+    
+    def _find_existing_record(self, key: str, record: Dict[str, Any]) -> Optional[int]:
+        """ID of the row already written for this save, if any"""
+        if self.has_schema_version(IDEMPOTENCY_SCHEMA_VERSION):
+            response = self._execute(self.supabase.table("data_entries").select("id").eq("idempotency_key", key).limit(1))
+        else:
+            # Before the idempotency column, the timestamped file_path identifies the save
+            response = self._execute(self.supabase.table("data_entries").select("id").eq("file_path", record["file_path"]).eq("timestamp", record["timestamp"]).limit(1))
+        return response.data[0]['id'] if response.data else None
+    
+    def _insert_record(self, record: Dict[str, Any], attempts: int = 3) -> Optional[int]:
+        """Insert a data_entries row; keyed records are retried since duplicates can't occur"""
+        key = record.get("idempotency_key")
+        st.info(f"🔄 Inserting record into data_entries table...")
+        for attempt in range(attempts):
+            try:
+                response = self._execute(self.supabase.table("data_entries").insert(record))
+                break
+            except Exception as e:
+                if key and _is_unique_violation(e):
+                    # A concurrent or earlier attempt already inserted this save
+                    return self._find_existing_record(key, record)
+                if not key or attempt == attempts - 1:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+        
+        if response.data:
+            record_id = response.data[0]['id']
+            self.reads.forget()
+            st.success(f"✅ Record saved to database with ID: {record_id}")
+            return record_id
+        else:
+            st.error("❌ No data returned from database insert")
+            return None
+    
+    def reconcile_saves(self, older_than: datetime.timedelta = datetime.timedelta(minutes=5)) -> Dict[str, int]:
+        """Repair saves that stopped between upload and insert
+        
+        Entries whose row exists are marked done, uploaded objects get their row inserted,
+        and saves whose upload never completed are abandoned (the bytes are gone).
+        """
+        report = {'already_saved': 0, 'repaired': 0, 'abandoned': 0, 'failed': 0}
+        if not self.is_available():
+            return report
+        
+        for entry in self.outbox.pending(older_than):
+            key = entry['idempotency_key']
+            try:
+                existing_id = self._find_existing_record(key, entry['record'])
+                if existing_id is not None:
+                    self.outbox.mark_inserted(key, existing_id)
+                    report['already_saved'] += 1
+                    continue
+                
+                file_url = entry['file_url']
+                if entry['state'] == STATE_STARTED:
+                    file_url = self._find_uploaded_object(entry['bucket'], entry['object_name'])
+                    if file_url is None:
+                        self.outbox.mark_abandoned(key)
+                        report['abandoned'] += 1
+                        continue
+                    self.outbox.mark_uploaded(key, file_url)
+                
+                record_id = self._insert_record(dict(entry['record'], file_url=file_url))
+                if record_id is not None:
+                    self.outbox.mark_inserted(key, record_id)
+                    report['repaired'] += 1
+                else:
+                    report['failed'] += 1
+            except Exception:
+                report['failed'] += 1
+        
+        return report
+    
+    def _find_uploaded_object(self, bucket: str, object_name: str) -> Optional[str]:
+        """Public URL of an object if it exists in the bucket"""
+        storage = self.supabase.storage.from_(bucket)
+        matches = self.limiter.call(STORAGE_READ, storage.list, "", {"search": object_name, "limit": 10})
+        if any(match.get('name') == object_name for match in matches or []):
+            return storage.get_public_url(object_name)
+        return None
+
+    def record_access(self, record_id: int):
+        """Note that a record's media was viewed (used by storage tiering)"""
+        if self.is_available() and self.has_schema_version(TIERING_SCHEMA_VERSION):
+            self.access_tracker.record(record_id)
+    
+    def _flush_access(self, record_ids: List[int]):
+        self._execute(self.supabase.rpc("record_entry_access", {"entry_ids": record_ids}))
+    
+    def prepare_preview(self, row) -> Optional[str]:
+        """File URL to preview a record, rehydrating it from cold storage first if needed"""
+        file_url = row.get('file_url')
+        if not self.is_available() or not isinstance(file_url, str):
+            return file_url
+        
+        record_id = row.get('id')
+        if record_id is not None:
+            self.record_access(record_id)
+        
+        if row.get('storage_tier') == 'cold':
+            from storage_tiering import rehydrate
+            try:
+                hot_url = rehydrate(self.supabase, {'id': record_id, 'file_url': file_url,
+                                                     'metadata': row.get('metadata')})
+                self.reads.forget()
+                return hot_url or file_url
+            except Exception as e:
+                st.warning(f"⚠️ Could not restore file from cold storage: {str(e)}")
+        return file_url
 
+    def find_similar_images(self, image=None, record_id: Optional[int] = None,
+                            max_distance: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Saved photos that look like an image (bytes, path, upload or its image_hash) or like a saved photo
+        
+        Each match has id, title, file_url, description and the Hamming distance of the hashes, nearest first.
+        """
+        from image_similarity import SIMILAR_DISTANCE, image_hashes, parse_hashes
+        
+        index = self._similar_image_index()
+        if index is None:
+            return []
+        max_distance = SIMILAR_DISTANCE if max_distance is None else max_distance
+        if record_id is not None:
+            return index.similar_to(record_id, max_distance, limit)
+        hashes = parse_hashes(image if isinstance(image, dict) else image_hashes(image))
+        return index.similar(hashes, max_distance, limit) if hashes else []
+    
+    def find_duplicate_images(self, image) -> List[Dict[str, Any]]:
+        """Saved photos that are near-duplicates of an image (or of its image_hash)"""
+        from image_similarity import image_hashes, parse_hashes
+        
+        index = self._similar_image_index()
+        hashes = parse_hashes(image if isinstance(image, dict) else image_hashes(image))
+        if index is None or hashes is None:
+            return []
+        return index.duplicates(hashes)
+    
+    def _similar_image_index(self):
+        """The photo hash index, brought up to date with a shared read of the image rows"""
+        from image_similarity import SimilarImageIndex
+        
+        if not self.is_available():
+            return None
+        df = self.get_all_data("id, entry_type, title, file_url, metadata", {"entry_type": "image"})
+        if self._image_index is None:
+            self._image_index = SimilarImageIndex()
+        self._image_index.refresh(df.to_dict('records'))
+        return self._image_index
+    
     def set_current_file(self, uploaded_file):
         """Set the current uploaded file for storage operations"""
         self._current_uploaded_file = uploaded_file
     
-    def get_all_data(self) -> pd.DataFrame:
-        """Get all data from Supabase"""
+    def get_all_data(self, columns: str = "*", filters: Optional[Dict[str, Any]] = None) -> "pd.DataFrame":
+        """Get all data from Supabase, optionally only some columns or rows matching equality filters"""
+        import pandas as pd
+        
         if not self.is_available():
             return pd.DataFrame()
         
         try:
-            response = self.supabase.table("data_entries").select("*").order("timestamp", desc=True).execute()
-            
-            if response.data:
-                df = pd.DataFrame(response.data)
-                return df
-            else:
-                return pd.DataFrame()
+            key = request_key("get_all_data", filters, columns)
+            df = self.reads.do(key, lambda: self._fetch_all_data(columns, filters))
+            # Callers add columns and filter in place; never hand out the shared frame
+            return df.copy()
                 
         except Exception as e:
             st.error(f"❌ Supabase fetch error: {str(e)}")
             return pd.DataFrame()
     
+    def _fetch_all_data(self, columns: str, filters: Optional[Dict[str, Any]]) -> "pd.DataFrame":
+        import pandas as pd
+        
+        query = self.supabase.table("data_entries").select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        response = self._execute(query.order("timestamp", desc=True))
+        
+        if response.data:
+            return pd.DataFrame(response.data)
+        else:
+            return pd.DataFrame()
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics"""
         if not self.is_available():
             return {'total_records': 0, 'type_counts': {}, 'db_size': 0}
         
         try:
-            # Get total count
-            total_response = self.supabase.table("data_entries").select("id", count="exact").execute()
-            total_records = total_response.count if total_response.count else 0
+            stats = self.reads.do(request_key("get_statistics"), self._fetch_statistics)
+            return dict(stats, type_counts=dict(stats['type_counts']))
             
-            # Get type counts
-            type_response = self.supabase.table("data_entries").select("entry_type").execute()
+        except Exception as e:
+            st.error(f"❌ Supabase stats error: {str(e)}")
+            return {'total_records': 0, 'type_counts': {}, 'db_size': 0}
+    
+    def _fetch_statistics(self) -> Dict[str, Any]:
+        # Summary table maintained by triggers - a handful of rows regardless of table size
+        if self.has_schema_version(STATS_SCHEMA_VERSION):
+            stats_response = self._execute(self.supabase.table("data_entries_stats").select("entry_type, entry_count, total_bytes"))
             type_counts = {}
-            if type_response.data:
-                for record in type_response.data:
-                    entry_type = record['entry_type']
-                    type_counts[entry_type] = type_counts.get(entry_type, 0) + 1
+            db_size = 0
+            for row in stats_response.data or []:
+                if row['entry_count'] > 0:
+                    type_counts[row['entry_type']] = row['entry_count']
+                    db_size += row['total_bytes']
             
             return {
-                'total_records': total_records,
+                'total_records': sum(type_counts.values()),
                 'type_counts': type_counts,
-                'db_size': total_records * 1024  # Rough estimate
+                'db_size': db_size
             }
-            
+        
+        # Get total count
+        total_response = self._execute(self.supabase.table("data_entries").select("id", count="exact"))
+        total_records = total_response.count if total_response.count else 0
+        
+        # Get type counts
+        type_response = self._execute(self.supabase.table("data_entries").select("entry_type"))
+        type_counts = {}
+        if type_response.data:
+            for record in type_response.data:
+                entry_type = record['entry_type']
+                type_counts[entry_type] = type_counts.get(entry_type, 0) + 1
+        
+        return {
+            'total_records': total_records,
+            'type_counts': type_counts,
+            'db_size': total_records * 1024  # Rough estimate
+        }
+    
+    def get_read_stats(self) -> Dict[str, Any]:
+        """Calls, executions, coalesced and cache-hit counts for shared reads"""
+        return self.reads.stats()
+    
+    def get_daily_counts(self, days: int = 30) -> Dict[str, Dict[str, int]]:
+        """Get per-day entry counts by type for the last N days ({'2025-01-29': {'image': 3}})"""
+        if not self.is_available() or not self.has_schema_version(STATS_SCHEMA_VERSION):
+            return {}
+        
+        try:
+            since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+            response = self._execute(self.supabase.table("data_entries_daily_stats").select("day, entry_type, entry_count").gte("day", since).order("day"))
+            daily_counts = {}
+            for row in response.data or []:
+                if row['entry_count'] > 0:
+                    daily_counts.setdefault(row['day'], {})[row['entry_type']] = row['entry_count']
+            return daily_counts
         except Exception as e:
             st.error(f"❌ Supabase stats error: {str(e)}")
-            return {'total_records': 0, 'type_counts': {}, 'db_size': 0}
+            return {}
     
     def delete_record(self, record_id: int) -> bool:
         """Delete a record by ID"""
@@ -306,7 +765,8 @@ class SupabaseManager:
             return False
         
         try:
-            self.supabase.table("data_entries").delete().eq("id", record_id).execute()
+            self._execute(self.supabase.table("data_entries").delete().eq("id", record_id))
+            self.reads.forget()
             return True
         except Exception as e:
             st.error(f"❌ Delete error: {str(e)}")
@@ -318,11 +778,16 @@ class SupabaseManager:
             return False
         
         try:
-            self.supabase.table("data_entries").update(updates).eq("id", record_id).execute()
+            self._execute(self.supabase.table("data_entries").update(updates).eq("id", record_id))
+            self.reads.forget()
             return True
         except Exception as e:
             st.error(f"❌ Update error: {str(e)}")
             return False
 
+def _is_unique_violation(error: Exception) -> bool:
+    """Postgres unique_violation (SQLSTATE 23505) as reported by PostgREST"""
+    return getattr(error, 'code', None) == '23505' or '23505' in str(error)
+
 # Global instance
 supabase_manager = SupabaseManager()
@@ -0,0 +1,157 @@
+"""
+Synthetic Bilingual Corpus
+Deterministic data_entries records for benchmarks and scale tests
+
+Records have the columns of the data_entries table (entry_type, title, content,
+file_path, file_url, location, timestamp, metadata) plus the descriptive fields the
+chatbot searches (description, category, tags, city, country). Species, places and
+phrases come in English and Telugu: each record is written in one language, its
+tags always carry the English name, the Telugu name and its Latin transliteration,
+and text entries' content mixes both, as collected notes do. Media entries get a
+storage URL like uploads do.
+
+The same (count, seed, shares) always give the same records, so runs at different
+sizes or on different machines are comparable.
+
+    records = synthetic_records(10_000)
+    df = synthetic_dataframe(10_000, telugu_share=0.6)
+"""
+
+import random
+import datetime
+from typing import Any, Dict, List
+
+# English name, Telugu name, transliteration, scientific name, kind
+SPECIES = [
+    ('neem', 'వేప', 'vepa', 'Azadirachta indica', 'tree'),
+    ('shami', 'జమ్మి', 'jammi', 'Prosopis cineraria', 'tree'),
+    ('banyan', 'మర్రి', 'marri', 'Ficus benghalensis', 'tree'),
+    ('peepal', 'రావి', 'raavi', 'Ficus religiosa', 'tree'),
+    ('mango', 'మామిడి', 'mamidi', 'Mangifera indica', 'tree'),
+    ('coconut', 'కొబ్బరి', 'kobbari', 'Cocos nucifera', 'tree'),
+    ('tamarind', 'చింత', 'chintha', 'Tamarindus indica', 'tree'),
+    ('teak', 'టేకు', 'teku', 'Tectona grandis', 'tree'),
+    ('palmyra', 'తాటి', 'thati', 'Borassus flabellifer', 'tree'),
+    ('holy basil', 'తులసి', 'tulasi', 'Ocimum tenuiflorum', 'plant'),
+    ('peacock', 'నెమలి', 'nemali', 'Pavo cristatus', 'bird'),
+    ('parrot', 'చిలుక', 'chiluka', 'Psittacula krameri', 'bird'),
+    ('sparrow', 'పిచ్చుక', 'pichuka', 'Passer domesticus', 'bird'),
+    ('crow', 'కాకి', 'kaki', 'Corvus splendens', 'bird'),
+    ('cobra', 'నాగుపాము', 'nagupamu', 'Naja naja', 'snake'),
+    ('bonnet macaque', 'కోతి', 'kothi', 'Macaca radiata', 'animal'),
+    ('blackbuck', 'కృష్ణజింక', 'krishna jinka', 'Antilope cervicapra', 'animal'),
+    ('palm squirrel', 'ఉడుత', 'udutha', 'Funambulus palmarum', 'animal'),
+    ('bullfrog', 'కప్ప', 'kappa', 'Hoplobatrachus tigerinus', 'frog'),
+    ('lime butterfly', 'సీతాకోకచిలుక', 'seethakokachiluka', 'Papilio demoleus', 'insect'),
+]
+KINDS = {
+    'tree': ('tree', 'చెట్టు'),
+    'plant': ('plant', 'మొక్క'),
+    'bird': ('bird', 'పక్షి'),
+    'snake': ('snake', 'పాము'),
+    'animal': ('animal', 'జంతువు'),
+    'frog': ('frog', 'కప్ప'),
+    'insect': ('insect', 'పురుగు'),
+}
+# The same observations in both languages
+PHRASES = [
+    ('new leaves after the monsoon', 'వర్షాకాలం తర్వాత కొత్త ఆకులు'),
+    ('in full flower', 'పూర్తిగా పూసింది'),
+    ('near the temple', 'గుడి దగ్గర'),
+    ('on the river bank', 'నది ఒడ్డున'),
+    ('in the village square', 'ఊరి మధ్యలో'),
+    ('seen at dawn', 'తెల్లవారుజామున కనిపించింది'),
+    ('used in traditional medicine', 'ఆయుర్వేద ఔషధంలో వాడతారు'),
+    ('shade in the summer heat', 'వేసవిలో చల్లని నీడ'),
+    ('worshipped during festivals', 'పండుగలలో పూజిస్తారు'),
+    ('nesting in the branches', 'కొమ్మలపై గూడు'),
+    ('calling loudly in the evening', 'సాయంత్రం గట్టిగా అరుస్తోంది'),
+    ('in the school garden', 'బడి తోటలో'),
+]
+# City, Telugu name, latitude, longitude
+CITIES = [
+    ('Hyderabad', 'హైదరాబాద్', 17.3850, 78.4867),
+    ('Warangal', 'వరంగల్', 17.9689, 79.5941),
+    ('Vijayawada', 'విజయవాడ', 16.5062, 80.6480),
+    ('Visakhapatnam', 'విశాఖపట్నం', 17.6868, 83.2185),
+    ('Tirupati', 'తిరుపతి', 13.6288, 79.4192),
+    ('Guntur', 'గుంటూరు', 16.3067, 80.4365),
+    ('Mumbai', 'ముంబై', 19.0760, 72.8777),
+    ('Chennai', 'చెన్నై', 13.0827, 80.2707),
+]
+# entry_type -> file extension, category
+MEDIA = {
+    'image': ('jpg', 'Photos'),
+    'video': ('mp4', 'Videos'),
+    'audio': ('mp3', 'Nature Sounds'),
+}
+TEXT_CATEGORIES = ['Research', 'Survey', 'Field Notes']
+STORAGE_URL = "https://example.supabase.co/storage/v1/object/public/flora-fauna-media"
+START_TIME = datetime.datetime(2025, 1, 1, 6, 0, 0)
+
+
+def _sentence(rng: random.Random, species, city, telugu: bool) -> str:
+    english, telugu_name, _, scientific, kind = species
+    kind_en, kind_te = KINDS[kind]
+    phrases = [PHRASES[i][1 if telugu else 0] for i in rng.sample(range(len(PHRASES)), rng.randint(1, 3))]
+    if telugu:
+        return f"{telugu_name} {kind_te} - {', '.join(phrases)} ({city[1]})."
+    return f"{english.capitalize()} {kind_en} ({scientific}) {', '.join(phrases)}, {city[0]}."
+
+
+def synthetic_record(rng: random.Random, record_id: int, telugu_share: float = 0.4,
+                     media_share: float = 0.6) -> Dict[str, Any]:
+    """One data_entries-shaped record drawn from rng"""
+    species = rng.choice(SPECIES)
+    english, telugu_name, latin, _, kind = species
+    city = rng.choice(CITIES)
+    entry_type = rng.choice(list(MEDIA)) if rng.random() < media_share else 'text'
+    telugu = rng.random() < telugu_share
+
+    description = _sentence(rng, species, city, telugu)
+    if entry_type == 'text':
+        # Notes mix both languages, leaning toward the record's own
+        sentences = [_sentence(rng, species, city, rng.random() < (0.8 if telugu else 0.2))
+                     for _ in range(rng.randint(2, 6))]
+        content, category = " ".join(sentences), rng.choice(TEXT_CATEGORIES)
+        title = f"{telugu_name} {KINDS[kind][1]}" if telugu else f"{english.capitalize()} {KINDS[kind][0]} notes"
+        file_path, file_url = None, None
+    else:
+        extension, category = MEDIA[entry_type]
+        content = ""
+        title = f"{latin.replace(' ', '_')}_{record_id}.{extension}"
+        file_path = title
+        file_url = f"{STORAGE_URL}/{entry_type}s/{title}"
+
+    tags = ", ".join([english, telugu_name, latin, KINDS[kind][0]])
+    return {
+        'id': record_id,
+        'entry_type': entry_type,
+        'title': title,
+        'description': description,
+        'content': content,
+        'category': category,
+        'tags': tags,
+        'city': city[0],
+        'country': 'India',
+        'file_path': file_path,
+        'file_url': file_url,
+        'location_lat': round(city[2] + rng.uniform(-0.05, 0.05), 6),
+        'location_lng': round(city[3] + rng.uniform(-0.05, 0.05), 6),
+        'location_name': f"{city[0]}, India",
+        'timestamp': (START_TIME + datetime.timedelta(minutes=7 * record_id)).isoformat(),
+        'metadata': {'description': description, 'tags': tags, 'category': category, 'language': 'te' if telugu else 'en'},
+    }
+
+
+def synthetic_records(count: int, seed: int = 0, telugu_share: float = 0.4,
+                      media_share: float = 0.6) -> List[Dict[str, Any]]:
+    """count records with ids 1..count; telugu_share of them written in Telugu, media_share media files"""
+    rng = random.Random(seed)
+    return [synthetic_record(rng, record_id, telugu_share, media_share) for record_id in range(1, count + 1)]
+
+
+def synthetic_dataframe(count: int, seed: int = 0, telugu_share: float = 0.4, media_share: float = 0.6):
+    """synthetic_records as the DataFrame get_all_data returns"""
+    import pandas as pd
+    return pd.DataFrame(synthetic_records(count, seed, telugu_share, media_share))
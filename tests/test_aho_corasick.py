@@ -0,0 +1,56 @@
+"""
+Tests for the Aho-Corasick multi-pattern matcher
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aho_corasick import AhoCorasick, highlight
+
+
+def brute_force(patterns, text):
+    return sorted((start, start + len(pattern), pattern) for pattern in set(patterns) if pattern
+                  for start in range(len(text) - len(pattern) + 1) if text.startswith(pattern, start))
+
+
+def test_overlapping_and_nested_patterns():
+    matcher = AhoCorasick(['he', 'she', 'his', 'hers'])
+
+    assert sorted(matcher.iter("ushers")) == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+    assert matcher.positions("ushers he") == {'she': [1], 'he': [2, 7], 'hers': [2]}
+
+
+def test_telugu_patterns():
+    matcher = AhoCorasick(['వేప', 'చెట్టు', 'neem'])
+
+    assert matcher.found("వేప చెట్టు (neem tree)") == {'వేప', 'చెట్టు', 'neem'}
+    assert not matcher.contains_any("మామిడి")
+
+
+def test_matches_substring_semantics():
+    rng = random.Random(7)
+    for _ in range(200):
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(0, 4))) for _ in range(6)]
+        text = "".join(rng.choice("abc ") for _ in range(30))
+        matcher = AhoCorasick(patterns)
+
+        assert sorted(matcher.iter(text)) == brute_force(patterns, text)
+        assert matcher.found(text) == {pattern for pattern in patterns if pattern and pattern in text}
+
+
+def test_spans_are_leftmost_longest_and_disjoint():
+    matcher = AhoCorasick(['neem', 'neem tree', 'tree', 'ee'])
+
+    assert matcher.spans("a neem tree by a tree") == [(2, 11), (17, 21)]
+
+
+
+def test_highlight_wraps_spans_ignoring_case():
+    matcher = AhoCorasick(['neem', 'వేప', 'tree'])
+
+    assert highlight("The Neem (వేప) is a tree.", matcher) == "The **Neem** (**వేప**) is a **tree**."
+    assert highlight("Neem", matcher, ignore_case=False) == "Neem"
+    assert highlight("nothing here", AhoCorasick([])) == "nothing here"
@@ -0,0 +1,111 @@
+"""
+Tests for the BM25F chatbot ranker and the search evaluation harness
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25 import BM25Ranker, keyword_weights, tokenize, EXPANSION_WEIGHTS, ORIGINAL, SYNONYM, GENERIC
+from search_index import SearchIndex
+from search_eval import load_eval_set, compare, ndcg_at_k, reciprocal_rank, recall_at_k
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'text', 'title': 'notes.txt', 'description': 'Field notes',
+     'content': 'Long walk past many trees; a neem was seen near the well among other trees and shrubs.',
+     'category': 'Survey', 'city': 'Hyderabad', 'country': 'India'},
+    {'id': 2, 'entry_type': 'image', 'title': 'neem.jpg', 'description': 'Neem leaves', 'content': '',
+     'category': 'Photos', 'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India'},
+    {'id': 3, 'entry_type': 'text', 'title': 'జమ్మి చెట్టు', 'description': None,
+     'content': 'జమ్మి చెట్టు దసరా పండుగ', 'category': 'Heritage', 'city': 'Hyderabad', 'country': 'India'},
+    {'id': 4, 'entry_type': 'text', 'title': 'prosopis.txt', 'description': 'Prosopis cineraria',
+     'content': 'Prosopis cineraria grows in dry regions.', 'category': 'Research', 'city': 'Jodhpur', 'country': 'India'},
+]
+
+
+def test_tokenize_splits_filenames_and_keeps_telugu_words():
+    assert tokenize("image_neem.jpg జమ్మి చెట్టు, Prosopis-cineraria") == \
+        ['image', 'neem', 'jpg', 'జమ్మి', 'చెట్టు', 'prosopis', 'cineraria']
+
+
+def test_keyword_weights_rank_typed_words_above_expansions():
+    weights = keyword_weights("jammi tree", ["jammi", "tree", "jammi tree", "prosopis", "plant"])
+
+    assert weights['jammi'] == EXPANSION_WEIGHTS[ORIGINAL]
+    assert weights['prosopis'] == EXPANSION_WEIGHTS[SYNONYM]
+    assert weights['plant'] == EXPANSION_WEIGHTS[GENERIC]
+    assert weights['tree'] == EXPANSION_WEIGHTS[ORIGINAL]
+
+
+def test_expansion_weights_are_tunable():
+    weights = keyword_weights("jammi", ["jammi", "prosopis"], {SYNONYM: 0.0})
+
+    assert weights == {'jammi': EXPANSION_WEIGHTS[ORIGINAL]}
+
+
+def test_short_title_match_outranks_long_content_match():
+    ranker = BM25Ranker(SearchIndex(RECORDS))
+
+    ranked = ranker.top_k("neem", ["neem"], k=2)
+
+    assert [record_id for record_id, _ in ranked] == [1, 0]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_field_weights_change_the_ranking():
+    ranker = BM25Ranker(SearchIndex(RECORDS), field_weights={'title': 0.0, 'description': 0.0, 'tags': 0.0,
+                                                             'content': 5.0})
+
+    assert ranker.top_k("neem", ["neem"], k=1)[0][0] == 0
+
+
+def test_synonym_match_scores_below_direct_match():
+    ranker = BM25Ranker(SearchIndex(RECORDS))
+
+    scores = ranker.score("జమ్మి", ["జమ్మి", "prosopis"])
+
+    assert scores[2] > scores[3] > 0
+
+
+def test_top_k_limits_and_media_boost():
+    ranker = BM25Ranker(SearchIndex(RECORDS))
+
+    ranked = ranker.top_k("show me images", ["images", "show me images"], k=1)
+
+    assert ranked == [(1, pytest.approx(ranker.media_boost))]
+
+
+def test_search_keeps_the_chatbot_result_shape():
+    ranker = BM25Ranker(SearchIndex(RECORDS))
+
+    results = ranker.search("neem", ["neem", "vepa"])
+
+    assert results['found_items'] == 2
+    assert results['total_items'] == len(RECORDS)
+    top = results['results'][0]
+    assert top['title'] == 'neem.jpg'
+    assert top['matched_fields'] == ['title', 'description', 'tags']
+    assert top['data']['city'] == 'Warangal'
+
+
+def test_metrics():
+    relevant = {'a': 2, 'b': 1}
+
+    assert reciprocal_rank(['x', 'b', 'a'], relevant) == 0.5
+    assert ndcg_at_k(['a', 'b'], relevant, 2) == pytest.approx(1.0)
+    assert ndcg_at_k(['b', 'a'], relevant, 2) < 1.0
+    assert recall_at_k(['a', 'x'], relevant, 2) == 0.5
+
+
+def test_bm25_does_not_regress_on_the_labeled_query_set():
+    eval_set = load_eval_set()
+
+    reports = compare(eval_set, k=5)
+
+    bm25, legacy = reports['bm25']['summary'], reports['legacy']['summary']
+    assert len(reports['bm25']['queries']) == len(eval_set['queries'])
+    assert bm25['ndcg@5'] >= legacy['ndcg@5']
+    assert bm25['mrr'] >= 0.9
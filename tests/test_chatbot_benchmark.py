@@ -0,0 +1,55 @@
+"""
+Tests for the synthetic corpus generator and the chatbot latency benchmark
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot_benchmark import BENCHMARK_QUESTIONS, benchmark, percentile
+from synthetic_corpus import MEDIA, SPECIES, synthetic_records
+
+TELUGU = re.compile(r'[ఀ-౿]')
+
+
+def test_records_are_deterministic_per_seed():
+    assert synthetic_records(50, seed=3) == synthetic_records(50, seed=3)
+    assert synthetic_records(50, seed=3) != synthetic_records(50, seed=4)
+    # A larger corpus starts with the smaller one
+    assert synthetic_records(100)[:50] == synthetic_records(50)
+
+
+def test_records_mix_languages_and_media():
+    records = synthetic_records(500, telugu_share=0.5, media_share=0.5)
+
+    telugu = sum(bool(TELUGU.search(record['description'])) for record in records)
+    media = [record for record in records if record['entry_type'] in MEDIA]
+    assert 150 < telugu < 350
+    assert 150 < len(media) < 350
+    assert all(record['file_url'].endswith(record['title']) for record in media)
+    assert all(record['file_url'] is None and record['content'] for record in records if record['entry_type'] == 'text')
+    assert [record['id'] for record in records] == list(range(1, 501))
+    # Tags carry both names and the transliteration, whatever the record's language
+    english, telugu_name, latin = SPECIES[0][:3]
+    assert all(telugu_name in record['tags'] and latin in record['tags']
+               for record in records if record['tags'].startswith(english + ","))
+
+
+def test_percentile_interpolates():
+    samples = [4.0, 1.0, 3.0, 2.0]
+
+    assert percentile(samples, 50) == 2.5
+    assert percentile(samples, 100) == 4.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_benchmark_reports_latency_throughput_and_memory():
+    result = benchmark(200, BENCHMARK_QUESTIONS[:3], rounds=2)
+
+    assert result['questions'] == 6 and result['answered'] == 6
+    assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+    assert result['qps'] > 0
+    assert result['peak_mb'] > 0
@@ -0,0 +1,134 @@
+"""
+Tests for the process-wide chatbot corpus
+"""
+
+import os
+import sys
+import threading
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from chatbot_corpus import SharedCorpus
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'image', 'title': 'neem.jpg', 'description': 'Neem leaves', 'content': '',
+     'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India'},
+    {'id': 2, 'entry_type': 'text', 'title': 'జమ్మి చెట్టు', 'description': '', 'content': 'జమ్మి చెట్టు దసరా',
+     'tags': '', 'city': 'Hyderabad', 'country': 'India'},
+]
+
+
+class CountingLoader:
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        frame = self.frames[min(self.calls, len(self.frames)) - 1]
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+
+def test_sessions_share_one_snapshot():
+    loader = CountingLoader([pd.DataFrame(RECORDS)])
+    corpus = SharedCorpus(loader)
+    first, second = FloraFaunaChatbot(corpus), FloraFaunaChatbot(corpus)
+
+    first_results = first.search_database("neem", ["neem"])
+    second_results = second.search_database("neem", ["neem"])
+
+    assert loader.calls == 1
+    assert first_results['results'][0]['title'] == second_results['results'][0]['title'] == 'neem.jpg'
+    assert first.db_cache is second.db_cache
+
+
+def test_concurrent_first_load_fetches_once():
+    loader = CountingLoader([pd.DataFrame(RECORDS)])
+    loader.release.clear()
+    corpus = SharedCorpus(loader)
+    snapshots = []
+    threads = [threading.Thread(target=lambda: snapshots.append(corpus.get())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    loader.started.wait(5)
+    loader.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert loader.calls == 1
+    assert len({id(snapshot) for snapshot in snapshots}) == 1
+
+
+def test_refresh_is_copy_on_write():
+    loader = CountingLoader([pd.DataFrame(RECORDS[:1]), pd.DataFrame(RECORDS)])
+    corpus = SharedCorpus(loader)
+    old = corpus.get()
+
+    corpus.invalidate()
+    loader.release.clear()
+    refresher = threading.Thread(target=corpus.get)
+    refresher.start()
+    loader.started.wait(5)
+    # While the refresher is loading, readers get the old snapshot without waiting
+    assert corpus.get() is old
+    loader.release.set()
+    refresher.join(5)
+
+    new = corpus.get()
+    assert new is not old
+    assert (old.version, len(old)) == (1, 1)
+    assert (new.version, len(new)) == (2, 2)
+    assert corpus.stats()['refreshes'] == 2
+
+
+def test_failed_refresh_keeps_serving_the_old_snapshot():
+    loader = CountingLoader([pd.DataFrame(RECORDS), RuntimeError("supabase down")])
+    corpus = SharedCorpus(loader)
+    old = corpus.get()
+
+    corpus.invalidate()
+
+    assert corpus.get() is old
+    assert corpus.stats()['failures'] == 1
+
+
+def test_empty_reload_keeps_serving_the_old_snapshot():
+    # get_all_data turns a Supabase error into an empty DataFrame
+    corpus = SharedCorpus(CountingLoader([pd.DataFrame(RECORDS), pd.DataFrame()]))
+    chatbot = FloraFaunaChatbot(corpus)
+    old = corpus.get()
+
+    corpus.invalidate()
+
+    assert corpus.get() is old
+    assert corpus.stats()['version'] == old.version
+    assert corpus.stats()['failures'] == 1
+    chatbot.process_query_with_media("show me neem images")
+    assert chatbot.conversation_history[-1]['results_found'] > 0
+
+
+def test_empty_first_load_is_published():
+    corpus = SharedCorpus(CountingLoader([pd.DataFrame()]))
+
+    assert len(corpus.get()) == 0
+    assert corpus.stats()['failures'] == 0
+
+
+def test_sessions_keep_only_conversation_state():
+    corpus = SharedCorpus(CountingLoader([pd.DataFrame(RECORDS)]))
+    chatbot = FloraFaunaChatbot(corpus)
+
+    chatbot.process_query_with_media("show me neem images")
+
+    assert set(vars(chatbot)) == {'conversation_history', 'result_sets', 'corpus', 'cache'}
+    assert len(chatbot.conversation_history) == 1
@@ -0,0 +1,98 @@
+"""
+Tests for streamed chatbot answers
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot, ResponseStream, response_chunks
+from chatbot_corpus import SharedCorpus
+from query_cache import QueryResultCache
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'image', 'title': 'neem.jpg', 'description': 'Neem leaves. Used as a toothbrush.',
+     'content': '', 'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India',
+     'file_url': 'https://example.com/neem.jpg'},
+    {'id': 2, 'entry_type': 'audio', 'title': 'neem_birds.mp3', 'description': 'Birds in a neem tree',
+     'content': '', 'tags': 'neem', 'city': 'Warangal', 'country': 'India',
+     'file_url': 'https://example.com/neem_birds.mp3'},
+    {'id': 3, 'entry_type': 'text', 'title': 'neem.txt', 'description': 'Neem tree! Bitter leaves.',
+     'content': 'Planted near temples.\nFlowers in spring.', 'tags': 'neem', 'city': 'Hyderabad',
+     'country': 'India', 'file_url': ''},
+]
+
+
+def make_chatbot():
+    return FloraFaunaChatbot(SharedCorpus(lambda: pd.DataFrame(RECORDS)), QueryResultCache())
+
+
+def test_chunks_join_back_to_the_text():
+    text = "Neem tree! Bitter leaves.\n\nPlanted near temples...\n- one\n- two"
+
+    chunks = response_chunks(text)
+
+    assert "".join(chunks) == text
+    assert chunks[:2] == ["Neem tree! ", "Bitter leaves.\n\n"]
+    assert response_chunks("") == []
+
+
+def test_text_streams_before_media_in_relevance_order():
+    items = list(make_chatbot().stream_query_with_media("neem tree photos and sounds"))
+
+    kinds = [isinstance(item, str) for item in items]
+    media = [item for item in items if isinstance(item, dict)]
+    assert kinds == sorted(kinds, reverse=True)
+    assert len(media) == 2 and sum(kinds) >= 1
+    assert [m['relevance'] for m in media] == sorted((m['relevance'] for m in media), reverse=True)
+
+
+def test_stream_matches_the_whole_response():
+    query = "neem tree photos and sounds"
+    expected = make_chatbot().process_query_with_media(query)
+
+    stream = make_chatbot().stream_query_with_media(query)
+    text, media = "".join(stream.text()), list(stream.media())
+
+    assert text == expected['text_response']
+    assert media == expected['media_files']
+    assert stream.response == expected
+
+
+def test_text_stops_at_the_first_media_file_without_losing_it():
+    def events():
+        yield "a. "
+        yield "b."
+        yield {'type': 'image'}
+        yield {'type': 'audio'}
+        return {'text_response': "a. b.", 'media_files': [{'type': 'image'}, {'type': 'audio'}]}
+
+    stream = ResponseStream(events())
+
+    assert list(stream.text()) == ["a. ", "b."]
+    assert stream.response is None
+    assert [m['type'] for m in stream.media()] == ['image', 'audio']
+    assert stream.response['text_response'] == "a. b."
+
+
+def test_cached_answer_streams_the_same_and_history_is_recorded_once_consumed():
+    chatbot = make_chatbot()
+    first = list(chatbot.stream_query_with_media("show neem images"))
+
+    stream = chatbot.stream_query_with_media("Show neem images")
+    assert len(chatbot.conversation_history) == 1
+    assert list(stream) == first
+
+    assert chatbot.cache.stats()['hits'] == 1
+    assert len(chatbot.conversation_history) == 2
+    assert chatbot.conversation_history[-1]['media_count'] == 2
+
+
+def test_short_question_streams_the_prompt():
+    stream = make_chatbot().stream_query_with_media("hi")
+
+    assert "".join(stream) == "🤖 Please ask me a question about the flora and fauna data!"
+    assert stream.response['media_files'] == []
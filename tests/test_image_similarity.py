@@ -0,0 +1,189 @@
+"""
+Tests for perceptual image hashes, the BK-tree and the hash backfill
+"""
+
+import io
+import os
+import random
+import sys
+
+import pandas as pd
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from chatbot_corpus import SharedCorpus
+from image_similarity import (BKTree, DUPLICATE_DISTANCE, SimilarImageIndex, backfill, decoded_size, hamming,
+                              image_hashes, parse_hashes)
+
+BASE_URL = "https://project.supabase.co/storage/v1/object/public"
+
+
+def photo(seed, size=(320, 240)):
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randint(0, size[0]), rng.randint(0, size[1])
+        draw.ellipse([x, y, x + rng.randint(20, 150), y + rng.randint(20, 150)],
+                     fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    return image
+
+
+def encode(image, fmt='PNG', **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def test_near_copies_hash_close_and_other_photos_far():
+    original = parse_hashes(image_hashes(encode(photo(1))))
+    resized = parse_hashes(image_hashes(encode(photo(1).resize((160, 120)), 'JPEG', quality=60)))
+    other = parse_hashes(image_hashes(encode(photo(2))))
+
+    assert max(hamming(a, b) for a, b in zip(original, resized)) <= DUPLICATE_DISTANCE
+    assert min(hamming(a, b) for a, b in zip(original, other)) > 12
+
+
+def test_undecodable_data_has_no_hashes():
+    assert image_hashes(b"not an image") is None
+
+
+def test_decoded_size_is_the_bitmap_not_the_file():
+    data = encode(photo(1), 'JPEG', quality=60)
+
+    assert decoded_size(data) == 320 * 240 * 3 > len(data)
+    assert decoded_size(b"not an image") == 0
+
+
+def test_bk_tree_matches_brute_force_and_prunes():
+    rng = random.Random(5)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    tree = BKTree()
+    for item, value in enumerate(values):
+        tree.add(value, item)
+    query = values[7] ^ 0b1011
+
+    found = tree.search(query, 8)
+
+    assert sorted(item for _, item in found) == [item for item, value in enumerate(values)
+                                                  if hamming(value, query) <= 8]
+    assert found[0] == (3, 7)
+    assert tree.last_visited < len(values)
+
+
+def hashed_record(record_id, image, **fields):
+    return dict({'id': record_id, 'entry_type': 'image', 'title': f"photo_{record_id}.png",
+                 'file_url': f"{BASE_URL}/images/photo_{record_id}.png",
+                 'metadata': {'image_hash': image_hashes(encode(image))}}, **fields)
+
+
+def test_index_finds_duplicates_and_refreshes():
+    records = [hashed_record(1, photo(1)), hashed_record(2, photo(2)), {'id': 3, 'entry_type': 'text'}]
+    index = SimilarImageIndex(records)
+    upload = parse_hashes(image_hashes(encode(photo(1).resize((200, 150)))))
+
+    assert [match['id'] for match in index.duplicates(upload)] == [1]
+    assert index.similar_to(1) == []
+
+    assert index.refresh(records + [hashed_record(4, photo(1).rotate(1))]) == {'added': 1, 'rebuilt': 0, 'photos': 3}
+    assert [match['id'] for match in index.similar_to(1)] == [4]
+    assert index.refresh(records[1:])['rebuilt'] == 1
+    assert index.duplicates(upload) == []
+
+
+def test_chatbot_similar_photo_intent():
+    records = [hashed_record(1, photo(1), description='Neem leaves'),
+               hashed_record(2, photo(1).resize((160, 120)), description='Neem again'),
+               hashed_record(3, photo(3), description='Mango')]
+    chatbot = FloraFaunaChatbot(SharedCorpus(lambda: pd.DataFrame(records)))
+
+    assert chatbot.is_similar_photo_request("photos similar to #1")
+    assert not chatbot.is_similar_photo_request("show neem photos")
+
+    by_reference = chatbot.process_query_with_media("photos similar to #1")
+    attached = chatbot.process_query_with_media("images that look like this one", image=encode(photo(3)))
+
+    assert [media['title'] for media in by_reference['media_files']] == ['photo_2.png']
+    assert 'likely a duplicate' in by_reference['text_response']
+    assert [media['title'] for media in attached['media_files']] == ['photo_3.png']
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+        self.filters = []
+        self.updates = None
+
+    def select(self, *args):
+        return self
+
+    def update(self, updates):
+        self.updates = updates
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    @property
+    def not_(self):
+        return self
+
+    def is_(self, column, value):
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def execute(self):
+        rows = [row for row in self.client.rows if all(match(row) for match in self.filters)]
+        if self.updates is not None:
+            for row in rows:
+                row.update(self.updates)
+        return type('Response', (), {'data': [dict(row) for row in rows[:getattr(self, 'n', None)]]})()
+
+
+class FakeClient:
+    def __init__(self, rows, objects):
+        self.rows = rows
+        self.objects = objects
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    @property
+    def storage(self):
+        client = self
+        return type('Storage', (), {'from_': lambda self, bucket: type('Bucket', (), {
+            'download': lambda self, path: client.objects[(bucket, path)]})()})()
+
+
+def test_backfill_hashes_unhashed_images():
+    rows = [
+        {'id': 1, 'entry_type': 'image', 'file_url': f"{BASE_URL}/images/a.png", 'metadata': {'tags': 'neem'}},
+        {'id': 2, 'entry_type': 'image', 'file_url': f"{BASE_URL}/images/b.png", 'metadata': None},
+        {'id': 3, 'entry_type': 'image', 'file_url': f"{BASE_URL}/images/c.png",
+         'metadata': {'image_hash': {'phash': '0' * 16, 'dhash': '0' * 16}}},
+        {'id': 4, 'entry_type': 'image', 'file_url': f"{BASE_URL}/images/broken.png", 'metadata': {}},
+    ]
+    objects = {('images', 'a.png'): encode(photo(1)), ('images', 'b.png'): encode(photo(2)),
+               ('images', 'broken.png'): b"truncated"}
+    client = FakeClient(rows, objects)
+
+    assert backfill(client)['candidates'] == 3
+    report = backfill(client, apply=True, batch_size=2)
+
+    assert (report['candidates'], report['hashed'], report['failed']) == (3, 2, 1)
+    assert rows[0]['metadata']['tags'] == 'neem'
+    assert parse_hashes(rows[0]['metadata']) == parse_hashes(image_hashes(objects[('images', 'a.png')]))
+    assert rows[2]['metadata']['image_hash']['phash'] == '0' * 16
@@ -0,0 +1,79 @@
+"""
+Import-time budget for the modules loaded on app startup
+
+Each module is imported in a fresh interpreter that already has streamlit loaded
+(as it is inside the running app), so the measured time is that module's own
+cold-start cost. Run with `pytest -s tests/test_import_time.py` to see the report.
+Set IMPORT_TIME_BUDGET_SCALE to loosen the budgets on slow machines.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "supabase", "httpx"]
+BUDGET_SCALE = float(os.environ.get("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+# Cold-start budget (ms) on top of streamlit, and whether heavy modules may be loaded
+MODULE_BUDGETS = {
+    "single_flight": (100, False),
+    "bm25": (100, False),
+    "token_cache": (100, False),
+    "ngram_index": (100, False),
+    "transliterate": (100, False),
+    "chatbot_corpus": (150, False),
+    "query_cache": (100, False),
+    "aho_corasick": (100, False),
+    "ranked_results": (100, False),
+    "image_similarity": (100, False),
+    "readiness": (150, False),
+    "rate_limiter": (150, False),
+    "upload_stream": (150, False),
+    "schema_migrations": (150, False),
+    "save_outbox": (200, False),
+    "analytics": (150, False),
+    "supabase_db": (250, False),
+    "chatbot": (5000, True),
+}
+
+PROBE = """
+import sys, time, json
+import streamlit
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_report = {}
+
+
+def measure_import(module):
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture(scope="module", autouse=True)
+def import_time_report():
+    yield
+    print("\nImport time (ms, on top of streamlit)")
+    for module, measured in sorted(_report.items(), key=lambda item: -item[1]['ms']):
+        heavy = ", ".join(measured['heavy']) or "-"
+        print(f"  {module:<20} {measured['ms']:8.1f}   heavy: {heavy}")
+
+
+@pytest.mark.parametrize("module", sorted(MODULE_BUDGETS))
+def test_import_time_budget(module):
+    budget_ms, heavy_allowed = MODULE_BUDGETS[module]
+    measured = measure_import(module)
+    _report[module] = measured
+
+    if not heavy_allowed:
+        assert measured['heavy'] == [], f"{module} imports {measured['heavy']} at module level"
+    assert measured['ms'] <= budget_ms * BUDGET_SCALE, f"{module} took {measured['ms']:.0f} ms (budget {budget_ms} ms)"
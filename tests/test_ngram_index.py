@@ -0,0 +1,81 @@
+"""
+Tests for transliteration and the character trigram index
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25 import BM25Ranker
+from ngram_index import DICE, TrigramIndex, trigrams
+from search_index import FUZZY_TRIGRAM, SearchIndex
+from transliterate import to_latin
+
+VOCABULARY = ['జమ్మి', 'jammi', 'jamun', 'neem', 'వేప', 'mango', 'మామిడి', 'hyderabad', 'tree']
+
+
+@pytest.mark.parametrize("telugu, latin", [
+    ("జమ్మి", "jammi"), ("చెట్టు", "chettu"), ("మామిడి", "maamidi"), ("కొబ్బరి", "kobbari"),
+    ("పండుగ", "panduga"), ("ముంబై", "mumbai"), ("tree", "tree"),
+])
+def test_to_latin(telugu, latin):
+    assert to_latin(telugu) == latin
+
+
+def test_trigrams_are_padded():
+    assert trigrams("jam") == {"  j", " ja", "jam", "am "}
+
+
+def test_similar_finds_both_scripts_and_near_spellings():
+    index = TrigramIndex(VOCABULARY)
+
+    assert dict(index.similar("jammi")) == {'jammi': 1.0, 'జమ్మి': 1.0}
+    assert [term for term, _ in index.similar("jami")] == ['jammi', 'జమ్మి']
+    assert index.similar("mamidi")[0][0] == 'మామిడి'
+    assert index.similar("hydrabad")[0][0] == 'hyderabad'
+    assert index.similar("banyan") == []
+
+
+def test_threshold_and_measure():
+    index = TrigramIndex(VOCABULARY)
+
+    jaccard = dict(index.similar("jami", threshold=0.0))['jammi']
+    dice = dict(index.similar("jami", threshold=0.0, measure=DICE))['jammi']
+
+    assert dice > jaccard
+    assert index.similar("jami", threshold=0.9) == []
+
+
+def test_containing():
+    index = TrigramIndex(VOCABULARY)
+
+    assert index.containing("amm") == {'jammi'}
+    assert index.containing("ree") == {'tree'}
+    assert index.containing("zzz") == set()
+
+
+RECORDS = [
+    {'entry_type': 'image', 'title': 'జమ్మి చెట్టు', 'content': 'జమ్మి చెట్టు దసరా', 'category': 'Photos',
+     'city': 'Hyderabad', 'country': 'India'},
+    {'entry_type': 'text', 'title': 'notes.txt', 'content': 'Mango groves by the river.', 'category': 'Survey',
+     'city': 'Vijayawada', 'country': 'India'},
+]
+
+
+def test_bm25_reaches_telugu_records_from_latin_spelling():
+    ranker = BM25Ranker(SearchIndex(RECORDS))
+
+    assert [record_id for record_id, _ in ranker.top_k("jami", ["jami"])] == [0]
+
+
+def test_search_index_trigram_mode_keeps_exact_and_partial_signals():
+    chars, trigram = SearchIndex(RECORDS), SearchIndex(RECORDS, fuzzy=FUZZY_TRIGRAM)
+
+    for keyword in ["mango", "groves", "river", "hyderabad"]:
+        exact_and_partial = {term: weight for term, weight in chars._token_weights(keyword).items() if weight > 1}
+        assert {term: weight for term, weight in trigram._token_weights(keyword).items() if weight > 1} == exact_and_partial
+
+    assert trigram.search("జమ్మి", ["జమ్మి", "jammi"])['results'][0]['title'] == 'జమ్మి చెట్టు'
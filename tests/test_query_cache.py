@@ -0,0 +1,90 @@
+"""
+Tests for the chatbot's query-result cache
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from chatbot_corpus import SharedCorpus
+from query_cache import QueryResultCache, estimate_size, query_key
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'image', 'title': 'neem.jpg', 'description': 'Neem leaves', 'content': '',
+     'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India', 'file_url': 'https://example.com/neem.jpg'},
+    {'id': 2, 'entry_type': 'text', 'title': 'jammi.txt', 'description': 'Jammi tree', 'content': 'Sacred on Dasara',
+     'tags': '', 'city': 'Hyderabad', 'country': 'India', 'file_url': ''},
+]
+
+
+def test_query_key_ignores_order_case_and_spacing():
+    assert query_key(["Neem", "vepa", "show  neem"]) == query_key(["vepa", "show neem", "neem"])
+    assert query_key(["neem"], 'bm25') != query_key(["neem"], 'legacy')
+
+
+def test_lru_eviction_by_bytes():
+    value = {'text_response': "x" * 100}
+    cache = QueryResultCache(max_bytes=estimate_size(value) * 2)
+
+    cache.put('a', 1, value)
+    cache.put('b', 1, value)
+    cache.get('a', 1)
+    cache.put('c', 1, value)
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == value
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+def test_newer_version_invalidates_and_older_is_ignored():
+    cache = QueryResultCache()
+    cache.put('a', 1, {'n': 1})
+
+    assert cache.get('a', 2) is None
+    cache.put('a', 1, {'n': 1})
+    assert len(cache) == 0
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_values_are_copied():
+    cache = QueryResultCache()
+    cache.put('a', 1, {'media_files': []})
+
+    cache.get('a', 1)['media_files'].append('mutated')
+
+    assert cache.get('a', 1) == {'media_files': []}
+
+
+def test_hit_rate():
+    cache = QueryResultCache()
+    cache.put('a', 1, {})
+    cache.get('a', 1)
+    cache.get('a', 1)
+    cache.get('b', 1)
+
+    assert cache.stats()['hit_rate'] == round(2 / 3, 3)
+
+
+def test_repeated_question_skips_search_until_corpus_refresh():
+    corpus = SharedCorpus(lambda: pd.DataFrame(RECORDS))
+    cache = QueryResultCache()
+    chatbot = FloraFaunaChatbot(corpus, cache)
+    searches = []
+    search = chatbot._search_snapshot
+    chatbot._search_snapshot = lambda *args: searches.append(args[1]) or search(*args)
+
+    first = chatbot.process_query_with_media("show neem images")
+    second = chatbot.process_query_with_media("Show neem images")
+    assert second == first
+    assert searches == ["show neem images"]
+    assert chatbot.conversation_history[-1]['results_found'] == chatbot.conversation_history[0]['results_found']
+
+    corpus.invalidate()
+    chatbot.process_query_with_media("show neem images")
+    assert len(searches) == 2
+    assert cache.stats()['hits'] == 1
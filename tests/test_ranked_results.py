@@ -0,0 +1,140 @@
+"""
+Tests for ranked, lazily materialized search results and "more results" paging
+"""
+
+import gc
+import os
+import sys
+import weakref
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import MAX_RESULT_SETS, PAGE_SIZE, FloraFaunaChatbot
+from chatbot_corpus import SharedCorpus
+from query_cache import QueryResultCache
+from ranked_results import RankedArray, RankedResults
+from search_index import SearchIndex
+
+SCORES = {0: 3, 1: 7, 2: 3, 3: 9, 4: 1, 5: 7}
+EXPECTED = [(3, 9), (1, 7), (5, 7), (0, 3), (2, 3), (4, 1)]
+
+
+def neem_records(count):
+    return [{'id': record_id, 'entry_type': 'text', 'title': f'neem note {record_id}',
+             'description': 'neem ' * (record_id % 4 + 1), 'content': '', 'tags': '',
+             'city': 'Warangal', 'country': 'India', 'file_url': ''} for record_id in range(count)]
+
+
+def test_best_first_with_ties_in_record_order():
+    ranked = RankedResults(SCORES, lambda record_id, score: {'id': record_id}, total=10)
+
+    assert ranked.top(3) == EXPECTED[:3]
+    assert ranked.top(100) == EXPECTED
+
+
+def test_array_ranking_matches_and_keeps_ties_at_the_cut():
+    ids, scores = np.array(list(SCORES)), np.array(list(SCORES.values()))
+    ranked = RankedArray(ids, scores, lambda record_id, score: {}, total=10)
+
+    for count in range(1, 7):
+        assert RankedArray(ids, scores, None, 10).top(count) == EXPECTED[:count]
+    # Deeper pages extend what was selected for the shallower ones
+    assert ranked.top(2) == EXPECTED[:2]
+    assert ranked.top(6) == EXPECTED
+
+
+def test_pages_only_materialize_their_records():
+    built = []
+    ranked = RankedResults(SCORES, lambda record_id, score: built.append(record_id) or {'id': record_id}, total=10)
+
+    first, second = ranked.page(0, 4), ranked.page(4, 4)
+
+    assert [result['id'] for result in first['results'] + second['results']] == [record_id for record_id, _ in EXPECTED]
+    assert built == [record_id for record_id, _ in EXPECTED]
+    assert (first['found_items'], first['next_offset'], second['next_offset']) == (6, 4, None)
+
+
+def test_search_is_the_first_page_of_the_ranking():
+    index = SearchIndex(neem_records(30))
+
+    pages = index.rank("neem", ["neem"])
+    paged = pages.page(0, 10)['results'] + pages.page(10, 10)['results']
+
+    assert paged == index.search("neem", ["neem"], limit=20)['results']
+    assert index.search("neem", ["neem"], offset=10)['results'] == paged[10:]
+
+
+def make_chatbot(records):
+    return FloraFaunaChatbot(SharedCorpus(lambda: pd.DataFrame(records)), QueryResultCache())
+
+
+def test_more_results_pages_without_searching_again():
+    chatbot = make_chatbot(neem_records(25))
+    rankings = []
+    rank = chatbot._rank_snapshot
+    chatbot._rank_snapshot = lambda *args: rankings.append(args[1]) or rank(*args)
+
+    answer = chatbot.process_query_with_media("neem notes")
+    second = chatbot.more_results(answer['next_cursor'])
+    third = chatbot.more_results(second['next_cursor'])
+
+    assert len(rankings) == 1
+    assert [len(second['results']), len(third['results'])] == [PAGE_SIZE, 5]
+    assert third['next_cursor'] is None
+    first = chatbot._search_snapshot(chatbot._snapshot(), "neem notes", chatbot.extract_keywords("neem notes"))
+    ids = [result['data']['id'] for page in (first, second, third) for result in page['results']]
+    assert sorted(ids) == list(range(25))
+
+
+def test_cached_answer_cursor_ranks_only_when_paged():
+    chatbot = make_chatbot(neem_records(25))
+    chatbot.process_query_with_media("neem notes")
+    rankings = []
+    rank = chatbot._rank_snapshot
+    chatbot._rank_snapshot = lambda *args: rankings.append(args[1]) or rank(*args)
+
+    cached = chatbot.process_query_with_media("Neem notes")
+    assert rankings == []
+
+    page = chatbot.more_results(cached['next_cursor'])
+    assert rankings == ["Neem notes"] and len(page['results']) == PAGE_SIZE
+    key = next(iter(chatbot.cache._entries))
+    assert 'next_cursor' not in chatbot.cache.get(key, chatbot._snapshot().version)['response']
+
+
+def test_kept_results_dont_pin_the_snapshot():
+    records = neem_records(25)
+    corpus = SharedCorpus(lambda: pd.DataFrame(records))
+    for ranking in ('bm25', 'legacy', 'vectorized', 'semantic'):
+        chatbot = FloraFaunaChatbot(corpus, QueryResultCache())
+        chatbot.ranking = ranking
+        expected = chatbot._search_snapshot(corpus.get(), "neem notes", chatbot.extract_keywords("neem notes"))
+        cursor = chatbot.process_query_with_media("neem notes")['next_cursor']
+        same_version = chatbot.more_results(cursor)
+        assert same_version['results'][0] == chatbot._rank_snapshot(
+            corpus.get(), "neem notes", chatbot.extract_keywords("neem notes")).page(PAGE_SIZE, 1)['results'][0]
+        assert expected['found_items'] == same_version['found_items']
+
+        # The snapshot's search structures are what the kept ranking used to close over
+        old = weakref.ref(chatbot._ranker(corpus.get()))
+        corpus.invalidate()
+        corpus.get()
+        gc.collect()
+        assert old() is None, ranking
+
+        # Paging after the refresh ranks again on the new snapshot
+        assert len(chatbot.more_results(cursor)['results']) == PAGE_SIZE
+
+
+def test_expired_and_unknown_cursors():
+    chatbot = make_chatbot(neem_records(25))
+    first = chatbot.process_query_with_media("neem notes")['next_cursor']
+    for number in range(MAX_RESULT_SETS):
+        chatbot.process_query_with_media(f"neem note {number}")
+
+    assert chatbot.more_results(first)['results'] == []
+    assert chatbot.more_results("not-a-cursor")['next_cursor'] is None
+    assert len(chatbot.result_sets) <= MAX_RESULT_SETS
@@ -0,0 +1,149 @@
+"""
+Tests for the client-side token-bucket rate limiter
+"""
+
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter, RateLimitExceeded, TokenBucket, is_rate_limited, retry_after
+
+
+class TooManyRequests(Exception):
+    def __init__(self, retry_after_header=None):
+        super().__init__("429 Too Many Requests")
+        headers = {'Retry-After': retry_after_header} if retry_after_header else {}
+        self.response = type("Response", (), {'status_code': 429, 'headers': headers})
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire() < 0.01
+    for _ in range(5):
+        bucket.acquire()
+    # Five tokens beyond the burst at 50/s take about 0.1s
+    assert 0.08 <= time.monotonic() - start < 1.0
+
+
+def test_waiters_are_served_in_arrival_order():
+    bucket = TokenBucket(rate=100, capacity=1)
+    bucket.acquire()
+    order = []
+    threads = []
+    for i in range(5):
+        thread = threading.Thread(target=lambda i=i: (bucket.acquire(), order.append(i)))
+        thread.start()
+        threads.append(thread)
+        # Make sure thread i has taken its ticket before the next one starts
+        while bucket.stats()['queued'] < i + 1:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3, 4]
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingCondition(type(threading.Condition())):
+    """A condition whose wait raises in threads named 'interrupted', like a stopped script run"""
+
+    def wait(self, timeout=None):
+        if threading.current_thread().name == "interrupted":
+            raise Interrupted()
+        return super().wait(timeout)
+
+
+def start_acquire(bucket, name=None):
+    def run():
+        try:
+            bucket.acquire()
+        except Interrupted:
+            pass
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_interrupted_waiters_dont_block_the_queue():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket._condition = InterruptingCondition()
+    bucket.acquire()
+
+    # Interrupted at the head of the queue, then behind a waiter that is served later
+    start_acquire(bucket, "interrupted").join(5)
+    first = start_acquire(bucket)
+    while bucket.stats()['queued'] < 1:
+        time.sleep(0.001)
+    start_acquire(bucket, "interrupted").join(5)
+    last = start_acquire(bucket)
+    for thread in (first, last):
+        thread.join(5)
+
+    assert not first.is_alive() and not last.is_alive()
+    assert bucket.stats()['queued'] == 0
+
+
+def test_bucket_rejects_requests_it_can_never_serve():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=5, capacity=0.5)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=10)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=5, capacity=2).acquire(3)
+
+
+def test_call_retries_after_429_honouring_retry_after():
+    limiter = RateLimiter({'rest': {'rate': 1000, 'capacity': 10}})
+    responses = [TooManyRequests("0.05"), "ok"]
+
+    def request():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    start = time.monotonic()
+    assert limiter.call('rest', request) == "ok"
+    assert time.monotonic() - start >= 0.05
+    assert limiter.stats()['rest']['throttled'] == 1
+
+
+def test_call_gives_up_after_max_retries():
+    limiter = RateLimiter({'rest': {'rate': 1000, 'capacity': 10}}, max_retries=1)
+
+    def request():
+        raise TooManyRequests("0")
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.call('rest', request)
+
+
+def test_other_errors_are_not_retried():
+    limiter = RateLimiter()
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call('storage_upload', request)
+    assert calls == [1]
+
+
+def test_rate_limit_detection():
+    assert is_rate_limited(TooManyRequests())
+    assert is_rate_limited(Exception({'statusCode': 429, 'message': 'Too many requests'}))
+    assert not is_rate_limited(Exception({'statusCode': 400, 'message': 'Bad request'}))
+    assert retry_after(TooManyRequests("3")) == 3.0
+    assert retry_after(TooManyRequests("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+    assert retry_after(TooManyRequests()) is None
@@ -0,0 +1,162 @@
+"""
+Tests for the readiness probe
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import readiness
+from readiness import ReadinessServer, check_readiness, publish_cache_stats
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+
+    def select(self, *args):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        if self.client.db_error:
+            raise ConnectionError("connection refused")
+        time.sleep(self.client.db_delay)
+
+
+class FakeClient:
+    def __init__(self, db_delay=0.0, storage_delay=0.0, db_error=False):
+        self.db_delay = db_delay
+        self.storage_delay = storage_delay
+        self.db_error = db_error
+        self.storage = self
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    def get_bucket(self, name):
+        time.sleep(self.storage_delay)
+        return {'id': name}
+
+
+class FakeOutbox:
+    def __init__(self, depth=0):
+        self._depth = depth
+
+    def depth(self):
+        return self._depth
+
+    def prune(self):
+        return 0
+
+
+class FakeManager:
+    def __init__(self, client, outbox_depth=0):
+        self.supabase = client
+        self.outbox = FakeOutbox(outbox_depth)
+        self.reconciled = 0
+
+    def is_available(self):
+        return True
+
+    def reconcile_saves(self, older_than):
+        self.reconciled += 1
+        return {'already_saved': 0, 'repaired': 0, 'abandoned': 0, 'failed': 0}
+
+
+def test_fast_backend_is_ok(tmp_path):
+    report = check_readiness(FakeManager(FakeClient()), str(tmp_path / "cache.json"))
+
+    assert report['status'] == 'ok'
+    assert set(report['checks']) == {'database', 'storage', 'outbox', 'cache'}
+    assert report['checks']['cache']['warm'] is False
+
+
+def test_slow_storage_is_degraded_and_failed_database_unhealthy(tmp_path, monkeypatch):
+    monkeypatch.setattr(readiness, 'STORAGE_LATENCY_MS', (20.0, 5000.0))
+    slow = check_readiness(FakeManager(FakeClient(storage_delay=0.05)), str(tmp_path / "cache.json"))
+    assert slow['status'] == 'degraded'
+    assert slow['checks']['storage']['latency_ms'] >= 50
+
+    down = check_readiness(FakeManager(FakeClient(db_error=True)), str(tmp_path / "cache.json"))
+    assert down['status'] == 'unhealthy'
+    assert 'connection refused' in down['checks']['database']['error']
+
+
+def test_outbox_depth_thresholds(tmp_path):
+    path = str(tmp_path / "cache.json")
+    assert check_readiness(FakeManager(FakeClient(), outbox_depth=12), path)['status'] == 'degraded'
+    assert check_readiness(FakeManager(FakeClient(), outbox_depth=500), path)['status'] == 'unhealthy'
+
+
+def test_outbox_is_drained_on_startup_and_periodically():
+    manager = FakeManager(FakeClient())
+    stop = threading.Event()
+
+    thread = readiness.start_outbox_maintenance(manager, interval=0.01, stop=stop)
+    deadline = time.monotonic() + 5
+    while manager.reconciled < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    thread.join(5)
+
+    assert manager.reconciled >= 3
+    assert not thread.is_alive()
+    assert readiness.maintain_outbox(manager)['pruned'] == 0
+
+
+def test_published_cache_stats_report_warm(tmp_path):
+    path = str(tmp_path / "cache.json")
+    publish_cache_stats({'executions': 4, 'shared_ratio': 0.75, 'query_cache': {'hit_rate': 0.6}}, path)
+
+    cache = check_readiness(FakeManager(FakeClient()), path)['checks']['cache']
+
+    assert cache['warm'] is True
+    assert cache['shared_ratio'] == 0.75
+    assert cache['query_hit_rate'] == 0.6
+
+
+def test_http_ready_drains_degraded_instance(monkeypatch):
+    monkeypatch.setattr(readiness, 'OUTBOX_DEPTH', (1, 100))
+    server = ReadinessServer(("127.0.0.1", 0), lambda: check_readiness(FakeManager(FakeClient(), outbox_depth=5), "missing.json"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        try:
+            urllib.request.urlopen(f"{base}/ready", timeout=5)
+            assert False, "degraded instance reported ready"
+        except urllib.error.HTTPError as e:
+            assert e.code == 503
+            assert json.loads(e.read())['status'] == 'degraded'
+        with urllib.request.urlopen(f"{base}/health", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_http_health_ignores_backend_outages():
+    server = ReadinessServer(("127.0.0.1", 0), lambda: check_readiness(FakeManager(FakeClient(db_error=True)), "missing.json"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        try:
+            urllib.request.urlopen(f"{base}/ready", timeout=5)
+            assert False, "unhealthy instance reported ready"
+        except urllib.error.HTTPError as e:
+            assert e.code == 503
+        with urllib.request.urlopen(f"{base}/health", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
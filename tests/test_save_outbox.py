@@ -0,0 +1,160 @@
+"""
+Tests for idempotent saves and outbox reconciliation
+"""
+
+import os
+import sys
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from save_outbox import SaveOutbox, generate_idempotency_key, STATE_INSERTED, STATE_STARTED
+from supabase_db import SupabaseManager, IDEMPOTENCY_SCHEMA_VERSION
+
+
+class FakeStorageBucket:
+    def __init__(self, store, bucket):
+        self.store = store
+        self.bucket = bucket
+
+    def upload(self, name, data, file_options=None):
+        self.store.uploads.append((self.bucket, name))
+        if self.store.fail_next_upload:
+            self.store.fail_next_upload = False
+            raise ConnectionError("connection reset")
+        self.store.objects[(self.bucket, name)] = bytes(data)
+        return {'Key': name}
+
+    def get_public_url(self, name):
+        return f"https://project.supabase.co/storage/v1/object/public/{self.bucket}/{name}"
+
+    def list(self, prefix, options):
+        return [{'name': name} for bucket, name in self.store.objects
+                if bucket == self.bucket and options['search'] in name]
+
+
+class FakeTable:
+    def __init__(self, store):
+        self.store = store
+        self.filters = []
+
+    def insert(self, record):
+        self.pending_insert = record
+        return self
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        if hasattr(self, 'pending_insert'):
+            if self.store.fail_next_insert:
+                self.store.fail_next_insert = False
+                raise ConnectionError("connection reset")
+            row = dict(self.pending_insert, id=len(self.store.rows) + 1)
+            self.store.rows.append(row)
+            return type("Response", (), {'data': [row]})
+        rows = [row for row in self.store.rows if all(row.get(c) == v for c, v in self.filters)]
+        return type("Response", (), {'data': rows[:1]})
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []
+        self.rows = []
+        self.fail_next_insert = False
+        self.fail_next_upload = False
+        self.storage = self
+
+    def from_(self, bucket):
+        return FakeStorageBucket(self, bucket)
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+def _manager(tmp_path):
+    manager = SupabaseManager()
+    manager.supabase = FakeSupabase()
+    manager.schema_version = IDEMPOTENCY_SCHEMA_VERSION
+    manager._outbox = SaveOutbox(str(tmp_path / "flora.db"))
+    return manager
+
+
+def test_idempotency_key_is_stable():
+    info = {'category': 'Photos', 'file_size': 3}
+    key = generate_idempotency_key("nonce", "image", b"abc", info)
+    assert key == generate_idempotency_key("nonce", "image", b"abc", dict(reversed(list(info.items()))))
+    assert key != generate_idempotency_key("other", "image", b"abc", info)
+
+
+def test_repeated_save_returns_original_id(tmp_path):
+    manager = _manager(tmp_path)
+    key = generate_idempotency_key("nonce", "image", b"neem")
+
+    first = manager.save_data("image", "image_1_neem.jpg", b"neem", {'file_size': 4}, idempotency_key=key)
+    # A rerun computes a new timestamped filename but the same key
+    second = manager.save_data("image", "image_2_neem.jpg", b"neem", {'file_size': 4}, idempotency_key=key)
+
+    assert first == second == 1
+    assert len(manager.supabase.rows) == 1
+    assert len(manager.supabase.uploads) == 1
+    assert manager.supabase.rows[0]['idempotency_key'] == key
+
+
+def test_transient_insert_failure_is_retried(tmp_path):
+    manager = _manager(tmp_path)
+    manager.supabase.fail_next_insert = True
+    key = generate_idempotency_key("nonce", "audio", b"birds")
+
+    record_id = manager.save_data("audio", "birds.mp3", b"birds", {'file_size': 5}, idempotency_key=key)
+
+    assert record_id == 1
+    assert manager.outbox.get(key)['state'] == STATE_INSERTED
+
+
+def test_failed_upload_is_retried_before_inserting(tmp_path):
+    manager = _manager(tmp_path)
+    manager.supabase.fail_next_upload = True
+    key = generate_idempotency_key("nonce", "video", b"peacock")
+
+    assert manager.save_data("video", "peacock.mp4", b"peacock", {'file_size': 7}, idempotency_key=key) is None
+    assert manager.supabase.rows == []
+    assert manager.outbox.get(key)['state'] == STATE_STARTED
+
+    record_id = manager.save_data("video", "peacock.mp4", b"peacock", {'file_size': 7}, idempotency_key=key)
+
+    assert record_id == 1
+    assert len(manager.supabase.uploads) == 2
+    assert manager.supabase.rows[0]['file_url'].endswith(f"{key[:16]}_peacock.mp4")
+    assert manager.outbox.get(key)['state'] == STATE_INSERTED
+
+
+def test_reconcile_inserts_rows_for_uploaded_objects(tmp_path):
+    manager = _manager(tmp_path)
+    outbox = manager.outbox
+    key = generate_idempotency_key("nonce", "image", b"jammi")
+    record = manager._build_record("image", "jammi.jpg", b"jammi", {'file_size': 5}, None)
+    record['idempotency_key'] = key
+
+    # Upload finished but the script stopped before the insert
+    entry = outbox.begin(key, "image", "images", f"{key[:16]}_jammi.jpg", record)
+    manager.supabase.from_("images").upload(entry['object_name'], b"jammi")
+    # Upload never finished
+    lost_key = generate_idempotency_key("nonce", "image", b"lost")
+    outbox.begin(lost_key, "image", "images", f"{lost_key[:16]}_lost.jpg", record)
+    assert outbox.depth() == 2
+
+    report = manager.reconcile_saves(datetime.timedelta(0))
+
+    assert report == {'already_saved': 0, 'repaired': 1, 'abandoned': 1, 'failed': 0}
+    assert manager.supabase.rows[0]['file_url'].endswith(entry['object_name'])
+    assert outbox.depth() == 0
+    assert manager.reconcile_saves(datetime.timedelta(0))['repaired'] == 0
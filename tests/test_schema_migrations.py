@@ -0,0 +1,167 @@
+"""
+Tests for the schema migration runner (local SQLite backend)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_migrations import LocalBackend, MigrationRunner, load_migrations, latest_version
+
+
+def _index_names(backend):
+    rows = backend.connect().execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'data_entries'"
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def test_dialects_ship_the_same_versions():
+    postgres = [m.version for m in load_migrations("postgres")]
+    sqlite = [m.version for m in load_migrations("sqlite")]
+    assert postgres == sqlite
+    assert postgres == list(range(1, len(postgres) + 1))
+    assert latest_version("postgres") == postgres[-1]
+
+
+def test_migrate_creates_indexes_and_content_hash(tmp_path):
+    backend = LocalBackend(str(tmp_path / "flora.db"))
+    runner = MigrationRunner(backend)
+
+    applied = runner.migrate()
+
+    assert [m.version for m in applied] == [m.version for m in runner.migrations]
+    assert runner.current_version() == latest_version("sqlite")
+    assert {
+        'idx_data_entries_timestamp_id',
+        'idx_data_entries_entry_type',
+        'idx_data_entries_content_hash',
+    } <= _index_names(backend)
+    columns = [row[1] for row in backend.connect().execute("PRAGMA table_info(data_entries)")]
+    assert 'content_hash' in columns
+
+
+def test_migrate_is_idempotent_and_respects_target(tmp_path):
+    backend = LocalBackend(str(tmp_path / "flora.db"))
+    runner = MigrationRunner(backend)
+
+    assert [m.version for m in runner.migrate(target=2)] == [1, 2]
+    assert runner.current_version() == 2
+    assert runner.migrate(dry_run=True) == runner.pending()
+    assert runner.current_version() == 2
+
+    runner.migrate()
+    assert runner.migrate() == []
+    assert runner.status()['pending'] == []
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    backend = LocalBackend(str(tmp_path / "flora.db"))
+    migrations_dir = tmp_path / "migrations"
+    (migrations_dir / "sqlite").mkdir(parents=True)
+    (migrations_dir / "sqlite" / "0001_ok.sql").write_text("CREATE TABLE a (id INTEGER);")
+    (migrations_dir / "sqlite" / "0002_broken.sql").write_text("CREATE TABLE b (id INTEGER);\nNOT SQL;")
+    runner = MigrationRunner(backend, str(migrations_dir))
+
+    try:
+        runner.migrate()
+    except Exception:
+        pass
+
+    assert runner.current_version() == 1
+    tables = {row[0] for row in backend.connect().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'b' not in tables
+
+
+def _recount(conn):
+    rows = conn.execute(
+        "SELECT entry_type, COUNT(*), SUM(COALESCE(json_extract(metadata, '$.file_size'), 0))"
+        " FROM data_entries GROUP BY entry_type"
+    ).fetchall()
+    return {entry_type: (count, size) for entry_type, count, size in rows}
+
+
+def _summary(conn):
+    rows = conn.execute(
+        "SELECT entry_type, entry_count, total_bytes FROM data_entries_stats WHERE entry_count > 0"
+    ).fetchall()
+    return {entry_type: (count, size) for entry_type, count, size in rows}
+
+
+def test_stats_triggers_track_insert_update_delete(tmp_path):
+    backend = LocalBackend(str(tmp_path / "flora.db"))
+    runner = MigrationRunner(backend)
+    runner.migrate(target=5)
+    conn = backend.connect()
+    insert = "INSERT INTO data_entries (entry_type, title, timestamp, metadata) VALUES (?, ?, ?, ?)"
+
+    # Rows that exist before the stats migration are backfilled
+    conn.execute(insert, ('image', 'neem.jpg', '2025-01-28T10:00:00', '{"file_size": 1000}'))
+    runner.migrate()
+    conn.execute(insert, ('image', 'jammi.jpg', '2025-01-29T10:00:00', '{"file_size": 500}'))
+    conn.execute(insert, ('audio', 'birds.mp3', '2025-01-29T11:00:00', '{"file_size": 2000}'))
+    conn.execute(insert, ('text', 'notes.txt', '2025-01-29T12:00:00', None))
+    assert _summary(conn) == {'image': (2, 1500), 'audio': (1, 2000), 'text': (1, 0)}
+
+    conn.execute("UPDATE data_entries SET entry_type = 'video', metadata = '{\"file_size\": 9000}' WHERE title = 'birds.mp3'")
+    conn.execute("DELETE FROM data_entries WHERE title = 'neem.jpg'")
+    assert _summary(conn) == _recount(conn) == {'image': (1, 500), 'video': (1, 9000), 'text': (1, 0)}
+
+    daily = dict(conn.execute(
+        "SELECT day, SUM(entry_count) FROM data_entries_daily_stats GROUP BY day"
+    ).fetchall())
+    assert daily == {'2025-01-28': 0, '2025-01-29': 3}
+
+
+class FailingVersionQuery:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    def table(self, name):
+        return self
+
+    def select(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return type("Response", (), {'data': [{'version': outcome}]})
+
+
+def _connected_manager(outcomes):
+    from supabase_db import SupabaseManager
+    manager = SupabaseManager()
+    manager.supabase = FailingVersionQuery(outcomes)
+    manager.limiter = type("NoLimit", (), {'call': staticmethod(lambda endpoint, fn, *args: fn(*args))})()
+    return manager
+
+
+def test_missing_migrations_table_is_version_zero():
+    from postgrest.exceptions import APIError
+    manager = _connected_manager([APIError({'code': '42P01', 'message': 'relation does not exist'}),
+                                  APIError({'code': 'PGRST205', 'message': 'table not in schema cache'})])
+
+    assert manager.get_schema_version() == 0
+    assert manager.get_schema_version() == 0
+
+
+def test_transient_error_is_unknown_and_rechecked():
+    import supabase_db
+    manager = _connected_manager([TimeoutError("timed out"), 9])
+
+    manager.schema_version = manager.get_schema_version()
+    assert manager.schema_version is None
+    assert not manager.has_schema_version(1)
+
+    manager._schema_checked_at -= supabase_db.SCHEMA_RECHECK_INTERVAL
+    assert manager.has_schema_version(supabase_db.IDEMPOTENCY_SCHEMA_VERSION)
+    assert manager.schema_version == 9
@@ -0,0 +1,110 @@
+"""
+Tests for the chatbot's inverted search index
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from search_index import SearchIndex
+
+RECORDS = [
+    {'entry_type': 'text', 'title': 'text_1.txt', 'content': 'The jammi tree (Prosopis cineraria) is sacred.',
+     'description': None, 'category': 'Research', 'city': 'Hyderabad', 'country': 'India'},
+    {'entry_type': 'image', 'title': 'image_neem.jpg', 'content': '', 'description': 'Neem tree leaves',
+     'category': 'Photos', 'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India'},
+    {'entry_type': 'image', 'title': 'జమ్మి చెట్టు', 'content': 'జమ్మి చెట్టు దసరా పండుగ', 'description': float('nan'),
+     'category': 'Photos', 'city': 'Hyderabad', 'country': 'India'},
+    {'entry_type': 'audio', 'title': 'birds.mp3', 'content': None, 'description': 'Bird calls near the banyan tree',
+     'category': 'Nature Sounds', 'city': 'Mumbai', 'country': 'India'},
+    {'entry_type': 'text', 'title': 'text_2.txt', 'content': 'Mango and coconut groves by the river.',
+     'description': '   ', 'category': 'Survey', 'city': 'Vijayawada', 'country': 'India'},
+]
+
+QUERIES = [
+    "jammi tree",
+    "show me neem images",
+    "జమ్మి చెట్టు చిత్రాలు",
+    "banyan tree sounds in mumbai",
+    "mango",
+    "tree india",
+]
+
+
+def legacy_scores(df, query, keywords):
+    """The row-by-row scoring search_database used before the index"""
+    scores = {}
+    search_columns = ['title', 'description', 'content', 'category', 'tags', 'city', 'country']
+    for idx, row in df.iterrows():
+        relevance_score = 0
+        all_text_fields = []
+        for col in search_columns:
+            if col in row and pd.notna(row[col]) and str(row[col]).strip():
+                all_text_fields.append(str(row[col]))
+        combined_text = " ".join(all_text_fields).lower()
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            if keyword_lower in combined_text:
+                relevance_score += 5
+            for col in search_columns:
+                if col in row and pd.notna(row[col]):
+                    if keyword_lower in str(row[col]).lower():
+                        relevance_score += 2
+            if len(keyword_lower) > 2:
+                for text_chunk in combined_text.split():
+                    if keyword_lower == text_chunk:
+                        relevance_score += 4
+                    elif keyword_lower in text_chunk or text_chunk in keyword_lower:
+                        relevance_score += 1
+                for text_word in combined_text.split():
+                    if len(text_word) > 2:
+                        common_chars = set(keyword_lower) & set(text_word)
+                        if len(common_chars) >= min(3, len(keyword_lower) - 1):
+                            relevance_score += 1
+        if len([k for k in keywords if k.lower() in combined_text]) > 1:
+            relevance_score += 2
+        if row.get('entry_type', '') in ['image', 'video', 'audio']:
+            for media_keyword in ['image', 'images', 'photo', 'picture', 'చిత్రం', 'చిత్రాలు', 'ఫోటో', 'ఫోటోలు',
+                                  'video', 'videos', 'వీడియో', 'వీడియోలు',
+                                  'audio', 'sound', 'recording', 'ఆడియో', 'శబ్దం']:
+                if media_keyword in query.lower():
+                    relevance_score += 10
+                    break
+        if relevance_score > 0:
+            scores[idx] = relevance_score
+    return scores
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_index_scores_match_row_scan(query):
+    df = pd.DataFrame(RECORDS)
+    keywords = FloraFaunaChatbot().extract_keywords(query)
+
+    index_scores = {record_id: item['relevance'] for record_id, item in SearchIndex.from_dataframe(df).score(query, keywords).items()}
+
+    assert index_scores == legacy_scores(df, query, keywords)
+
+
+def test_search_returns_ranked_results_with_record_data():
+    index = SearchIndex(RECORDS)
+
+    results = index.search("neem", ["neem", "vepa"])
+
+    assert results['found_items'] >= 1
+    assert results['total_items'] == len(RECORDS)
+    top = results['results'][0]
+    assert top['title'] == 'image_neem.jpg'
+    assert set(top['matched_fields']) >= {'title', 'description', 'tags'}
+    assert top['data']['city'] == 'Warangal'
+
+
+def test_postings_record_field_and_position():
+    index = SearchIndex(RECORDS[:1])
+
+    assert index.postings['jammi'] == {0: [(2, 2)]}
+    assert 'jammi' in index.records[0].combined_text
@@ -0,0 +1,84 @@
+"""
+Tests for the TF-IDF + LSA semantic search mode
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from chatbot_corpus import SharedCorpus
+from search_index import SearchIndex
+from semantic_search import SemanticIndex, SparseRows
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'text', 'title': 'Neem', 'description': 'neem bitter leaves', 'content': 'bitter neem'},
+    {'id': 2, 'entry_type': 'image', 'title': 'Vepa', 'description': 'neem medicinal tree vepa', 'content': ''},
+    {'id': 3, 'entry_type': 'text', 'title': 'Mango', 'description': 'mango sweet fruit', 'content': 'sweet'},
+    {'id': 4, 'entry_type': 'image', 'title': 'Mamidi', 'description': 'mango mamidi fruit summer', 'content': ''},
+]
+
+
+def test_sparse_products_match_dense():
+    rng = np.random.default_rng(3)
+    rows = [{int(column): float(rng.random()) for column in rng.choice(20, rng.integers(0, 5), replace=False)}
+            for _ in range(30)]
+    dense = np.zeros((30, 20), dtype=np.float32)
+    for row, values in enumerate(rows):
+        for column, value in values.items():
+            dense[row, column] = value
+    matrix = SparseRows.from_rows(rows, 20)
+    right, left = rng.standard_normal((20, 4)), rng.standard_normal((30, 4))
+
+    assert np.allclose(matrix.dot(right.astype(np.float32)), dense @ right, atol=1e-5)
+    assert np.allclose(matrix.transpose().dot(left.astype(np.float32)), dense.T @ left, atol=1e-5)
+
+
+def test_finds_records_that_share_no_words_with_the_query():
+    search = SemanticIndex().searcher(SearchIndex(RECORDS))
+
+    ranked = [record_id for record_id, _ in search.top_k("bitter", ["bitter"])]
+
+    # 'Vepa' never says bitter, but shares the neem topic with the record that does
+    assert ranked[:2] == [0, 1]
+    assert 2 not in ranked and 3 not in ranked
+
+
+def test_refresh_reuses_unchanged_vectors_and_refits_past_threshold():
+    index = SemanticIndex(refit_fraction=0.3)
+    index.refresh(RECORDS)
+    first = index.vectors.copy()
+
+    edited = [dict(RECORDS[0], content='bitter neem oil')] + RECORDS[1:]
+    assert index.refresh(edited) == {'reused': 3, 'projected': 1, 'removed': 0, 'refit': False}
+    assert np.array_equal(index.vectors[1:], first[1:])
+
+    assert index.refresh(edited[:2])['refit'] is True
+    assert index.folded_in == 0
+
+
+def test_saved_model_is_reused_by_a_new_process(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    saved = SemanticIndex(path)
+    saved.refresh(RECORDS)
+
+    loaded = SemanticIndex(path)
+    stats = loaded.refresh(RECORDS)
+
+    assert stats == {'reused': 4, 'projected': 0, 'removed': 0, 'refit': False}
+    assert np.array_equal(loaded.vectors, saved.vectors)
+    assert loaded.model.terms == saved.model.terms
+
+
+def test_chatbot_semantic_ranking():
+    chatbot = FloraFaunaChatbot(SharedCorpus(lambda: pd.DataFrame(RECORDS)))
+    chatbot.ranking = 'semantic'
+
+    results = chatbot.search_database("something bitter", ["bitter"])
+
+    assert [result['title'] for result in results['results']][:2] == ['Neem', 'Vepa']
+    assert results['total_items'] == 4
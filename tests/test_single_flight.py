@@ -0,0 +1,93 @@
+"""
+Tests for single-flight read coalescing
+"""
+
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight, request_key
+
+
+def test_concurrent_identical_reads_execute_once():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return {'rows': 3}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    # Let every follower reach the wait before the leader finishes
+    while flight.stats()['coalesced'] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(executions) == 1
+    assert results == [{'rows': 3}] * 8
+    stats = flight.stats()
+    assert stats['executions'] == 1 and stats['coalesced'] == 7
+    assert stats['shared_ratio'] == 7 / 8
+
+
+def test_ttl_reuse_and_forget():
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.stats()['hits'] == 1
+
+    flight.forget()
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
+
+
+def test_expired_results_are_evicted():
+    flight = SingleFlight(ttl=0.05)
+    for number in range(100):
+        flight.do(("page", number), lambda: number)
+    assert len(flight._calls) == 100
+
+    time.sleep(0.06)
+    flight.do("fresh", lambda: "ok")
+    assert list(flight._calls) == ["fresh"]
+
+    # Without a ttl nothing is reused, so nothing finished is kept either
+    uncached = SingleFlight()
+    for number in range(10):
+        uncached.do(number, lambda: number)
+    assert len(uncached._calls) == 1
+
+
+def test_errors_are_not_cached():
+    flight = SingleFlight(ttl=60)
+
+    def failing():
+        raise ConnectionError("timeout")
+
+    with pytest.raises(ConnectionError):
+        flight.do("key", failing)
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.stats()['errors'] == 1
+
+
+def test_request_key_ignores_filter_order():
+    assert request_key("get_all_data", {'a': 1, 'b': 2}, "*") == request_key("get_all_data", {'b': 2, 'a': 1}, "*")
+    assert request_key("get_all_data", {'a': 1}, "*") != request_key("get_all_data", {'a': 1}, "id")
@@ -0,0 +1,161 @@
+"""
+Tests for the orphaned storage object garbage collector
+"""
+
+import os
+import sys
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage_gc import StorageGarbageCollector
+from supabase_db import parse_storage_url
+
+BASE_URL = "https://project.supabase.co/storage/v1/object/public"
+NOW = datetime.datetime(2025, 2, 1, tzinfo=datetime.timezone.utc)
+OLD = "2025-01-01T00:00:00.000Z"
+FRESH = "2025-01-31T23:00:00.000Z"
+
+
+class FakeBucket:
+    def __init__(self, objects):
+        self.objects = objects
+        self.removed = []
+
+    def list(self, prefix, options):
+        names = sorted(name for name in self.objects if name.startswith(prefix))
+        offset, limit = options['offset'], options['limit']
+        return [{'name': name, 'id': name, 'created_at': self.objects[name][0],
+                 'metadata': {'size': self.objects[name][1]}} for name in names[offset:offset + limit]]
+
+    def remove(self, paths):
+        self.removed.append(list(paths))
+        for path in paths:
+            del self.objects[path]
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+        self.not_ = self
+        self.after = 0
+
+    def select(self, *args):
+        return self
+
+    def is_(self, *args):
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, *args):
+        return self
+
+    def limit(self, n):
+        # PostgREST's max-rows caps every response, whatever limit was asked for
+        self.count = min(n, self.client.max_rows or n)
+        return self
+
+    def execute(self):
+        rows = [row for row in self.client.rows if row['id'] > self.after][:self.count]
+        self.client.pages += 1
+        if self.client.after_page:
+            self.client.after_page(self.client.pages)
+        return type("Response", (), {'data': rows})
+
+
+class FakeClient:
+    def __init__(self, buckets, rows, max_rows=None):
+        self.buckets = buckets
+        self.rows = rows
+        self.max_rows = max_rows
+        self.pages = 0
+        self.after_page = None
+        self.storage = self
+
+    def from_(self, bucket):
+        return self.buckets[bucket]
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+def _client():
+    images = FakeBucket({
+        'kept.jpg': (OLD, 100),
+        'orphan_a.jpg': (OLD, 1000),
+        'orphan_b.jpg': (OLD, 2000),
+        'in_flight.jpg': (FRESH, 5000),
+    })
+    texts = FakeBucket({'note.txt': (OLD, 10), 'stale note.txt': (OLD, 20)})
+    rows = [{'id': 1, 'file_url': f"{BASE_URL}/images/kept.jpg"},
+            {'id': 2, 'file_url': f"{BASE_URL}/texts/note.txt?"}]
+    return FakeClient({'images': images, 'texts': texts}, rows)
+
+
+def test_parse_storage_url():
+    assert parse_storage_url(f"{BASE_URL}/images/20250101_a%20b.jpg?") == ('images', '20250101_a b.jpg')
+    assert parse_storage_url("https://example.com/a.jpg") is None
+    assert parse_storage_url(None) is None
+
+
+def test_dry_run_reports_reclaimable_bytes_without_deleting():
+    client = _client()
+    collector = StorageGarbageCollector(client, buckets=['images', 'texts'], page_size=2)
+
+    report = collector.collect(dry_run=True, now=NOW)
+
+    assert sorted(report['images']['paths']) == ['orphan_a.jpg', 'orphan_b.jpg']
+    assert report['images']['reclaimable_bytes'] == 3000
+    assert report['texts']['paths'] == ['stale note.txt']
+    assert report['images']['deleted'] == 0
+    assert client.buckets['images'].removed == []
+
+
+def test_delete_removes_orphans_in_batches():
+    client = _client()
+    collector = StorageGarbageCollector(client, buckets=['images', 'texts'], page_size=2, batch_size=1)
+
+    report = collector.collect(dry_run=False, now=NOW)
+
+    assert report['images']['deleted'] == 2
+    assert client.buckets['images'].removed == [['orphan_a.jpg'], ['orphan_b.jpg']]
+    assert sorted(client.buckets['images'].objects) == ['in_flight.jpg', 'kept.jpg']
+    assert sorted(client.buckets['texts'].objects) == ['note.txt']
+
+
+def test_responses_capped_below_page_size_still_read_every_reference():
+    client = _client()
+    client.rows = [{'id': record_id, 'file_url': f"{BASE_URL}/images/{name}"}
+                   for record_id, name in enumerate(('kept.jpg', 'orphan_a.jpg', 'orphan_b.jpg'), 1)]
+    client.max_rows = 1
+    collector = StorageGarbageCollector(client, buckets=['images'])
+
+    assert len(collector.referenced_objects()) == 3
+    report = collector.collect(dry_run=False, now=NOW)
+
+    assert report['images']['deleted'] == 0
+    assert sorted(client.buckets['images'].objects) == ['in_flight.jpg', 'kept.jpg', 'orphan_a.jpg', 'orphan_b.jpg']
+
+
+def test_rows_deleted_during_the_scan_dont_hide_later_references():
+    client = _client()
+    client.rows = [{'id': record_id, 'file_url': f"{BASE_URL}/images/{name}"}
+                   for record_id, name in enumerate(('orphan_a.jpg', 'orphan_b.jpg', 'kept.jpg'), 1)]
+    # The first page's rows are deleted before the second page is read
+    client.after_page = lambda page: page == 1 and client.rows.pop(0)
+    collector = StorageGarbageCollector(client, buckets=['images'], page_size=2)
+
+    assert ('images', 'kept.jpg') in collector.referenced_objects()
+
+
+def test_bucket_listing_follows_short_pages():
+    client = _client()
+    bucket = client.buckets['images']
+    listing = bucket.list
+    bucket.list = lambda prefix, options: listing(prefix, dict(options, limit=min(options['limit'], 1)))
+    collector = StorageGarbageCollector(client, buckets=['images'], page_size=3)
+
+    assert sorted(obj['path'] for obj in collector.list_bucket('images')) == sorted(bucket.objects)
@@ -0,0 +1,132 @@
+"""
+Tests for cold storage tiering and access tracking
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage_tiering import move_to_cold, rehydrate
+from supabase_db import AccessTracker
+
+BASE_URL = "https://project.supabase.co/storage/v1/object/public"
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def download(self, path):
+        return self.client.objects[(self.name, path)]
+
+    def upload(self, path, data, file_options=None):
+        self.client.objects[(self.name, path)] = data if isinstance(data, bytes) else data.read()
+
+    def remove(self, paths):
+        for path in paths:
+            self.client.objects.pop((self.name, path), None)
+
+    def get_public_url(self, path):
+        return f"{BASE_URL}/{self.name}/{path}"
+
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+        self.filters = {}
+
+    def update(self, updates):
+        self.updates = updates
+        return self
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        if self.client.before_update:
+            self.client.before_update()
+            self.client.before_update = None
+        rows = [row for row in self.client.rows
+                if all(row.get(column) == value for column, value in self.filters.items())]
+        if hasattr(self, 'updates'):
+            for row in rows:
+                row.update(self.updates)
+        return type("Response", (), {'data': [dict(row) for row in rows]})
+
+
+class FakeClient:
+    def __init__(self, rows, objects):
+        self.rows = rows
+        self.objects = objects
+        self.before_update = None
+        self.storage = self
+
+    def from_(self, name):
+        return FakeBucket(self, name)
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+def test_move_to_cold_and_rehydrate_round_trip():
+    row = {'id': 1, 'entry_type': 'text', 'file_url': f"{BASE_URL}/texts/note.txt", 'storage_tier': 'hot'}
+    client = FakeClient([row], {('texts', 'note.txt'): b"neem leaves " * 100})
+
+    assert move_to_cold(client, dict(row)) == 'moved'
+    assert row['storage_tier'] == 'cold'
+    assert row['file_url'] == f"{BASE_URL}/cold-media/texts/note.txt.gz"
+    assert list(client.objects) == [('cold-media', 'texts/note.txt.gz')]
+    assert len(client.objects[('cold-media', 'texts/note.txt.gz')]) < 1200
+
+    assert rehydrate(client, dict(row)) == f"{BASE_URL}/texts/note.txt"
+    assert row['storage_tier'] == 'hot'
+    assert client.objects == {('texts', 'note.txt'): b"neem leaves " * 100}
+
+
+def test_move_keeps_hot_object_when_row_changes_during_copy():
+    row = {'id': 1, 'entry_type': 'image', 'file_url': f"{BASE_URL}/images/neem.jpg", 'storage_tier': 'hot'}
+    client = FakeClient([row], {('images', 'neem.jpg'): b"jpeg"})
+    client.before_update = lambda: row.update(file_url=f"{BASE_URL}/images/neem_v2.jpg")
+
+    assert move_to_cold(client, dict(row, file_url=f"{BASE_URL}/images/neem.jpg")) == 'conflict'
+    assert row['storage_tier'] == 'hot'
+    assert list(client.objects) == [('images', 'neem.jpg')]
+
+
+def test_access_tracker_batches_and_deduplicates():
+    flushed = []
+    tracker = AccessTracker(flushed.append, flush_interval=3600, max_pending=3)
+
+    for record_id in [5, 5, 2]:
+        tracker.record(record_id)
+    assert flushed == []
+    tracker.record(9)
+    assert flushed == [[2, 5, 9]]
+    tracker.flush()
+    assert flushed == [[2, 5, 9]]
+
+
+def test_access_tracker_flushes_a_lone_access_after_the_interval():
+    flushed = []
+    tracker = AccessTracker(flushed.append, flush_interval=0.05)
+
+    tracker.record(7)
+    deadline = time.monotonic() + 5
+    while not flushed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert flushed == [[7]]
+
+    # Whatever is still pending is written on close (registered with atexit)
+    tracker.record(8)
+    tracker.close()
+    assert flushed[-1] == [8]
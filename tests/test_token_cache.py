@@ -0,0 +1,60 @@
+"""
+Tests for the per-record normalized token cache
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25 import BM25Ranker
+from search_index import SearchIndex
+from token_cache import TokenCache, normalize_tokens
+
+RECORDS = [
+    {'id': 1, 'entry_type': 'image', 'title': 'image_neem.jpg', 'description': 'Neem leaves!',
+     'tags': 'neem, vepa', 'city': 'Warangal', 'country': 'India'},
+    {'id': 2, 'entry_type': 'text', 'title': 'జమ్మి చెట్టు', 'content': 'జమ్మి చెట్టు (దసరా) పండుగ.',
+     'description': None, 'city': 'Hyderabad', 'country': 'India'},
+    {'id': 3, 'entry_type': 'text', 'title': 'notes.txt', 'content': 'Mango groves', 'description': float('nan'),
+     'city': 'Vijayawada', 'country': 'India'},
+]
+
+
+def test_normalize_matches_query_cleanup():
+    assert normalize_tokens("Image_Neem.jpg, జమ్మి చెట్టు (దసరా)!") == ['image', 'neem', 'jpg', 'జమ్మి', 'చెట్టు', 'దసరా']
+
+
+def test_columns_hold_text_and_tokens_by_record_id():
+    cache = TokenCache(RECORDS)
+
+    row = cache.row_of(2)
+    assert cache.record_ids == [1, 2, 3]
+    assert cache.field_text['content'][row] == 'జమ్మి చెట్టు (దసరా) పండుగ.'
+    assert cache.tokens(row, 'content') == ['జమ్మి', 'చెట్టు', 'దసరా', 'పండుగ']
+    assert cache.field_text['description'][row] == ''
+    # Terms are interned: both rows share the code for 'india'
+    assert cache.field_tokens['country'][0] == cache.field_tokens['country'][1]
+
+
+def test_refresh_only_tokenizes_new_and_changed_rows():
+    cache = TokenCache(RECORDS)
+    changed = dict(RECORDS[2], content='Mango and coconut groves')
+    added = {'id': 4, 'entry_type': 'audio', 'title': 'birds.mp3', 'city': 'Mumbai', 'country': 'India'}
+
+    stats = cache.refresh([added, RECORDS[0], changed])
+
+    assert stats == {'reused': 1, 'tokenized': 2, 'removed': 1}
+    assert cache.record_ids == [4, 1, 3]
+    assert cache.row_of(2) is None
+    assert cache.tokens(cache.row_of(3), 'content') == ['mango', 'and', 'coconut', 'groves']
+
+
+def test_bm25_from_cache_matches_tokenizing_directly():
+    index = SearchIndex(RECORDS)
+
+    cached = BM25Ranker(index, token_cache=TokenCache(RECORDS))
+    direct = BM25Ranker(index)
+
+    assert cached.postings == direct.postings
+    assert cached.top_k("neem", ["neem", "vepa"]) == direct.top_k("neem", ["neem", "vepa"])
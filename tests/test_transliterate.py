@@ -0,0 +1,70 @@
+"""
+Tests for Telugu transliteration schemes and the phonetic key
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25 import BM25Ranker, PHONETIC_WEIGHT
+from search_index import SearchIndex
+from token_cache import TokenCache
+from transliterate import ISO15919, ITRANS, LATIN, phonetic_key, transliterate
+
+
+@pytest.mark.parametrize("scheme, expected", [
+    (LATIN, "maamidi chettu"),
+    (ISO15919, "māmiḍi ceṭṭu"),
+    (ITRANS, "mAmiDi cheTTu"),
+])
+def test_schemes(scheme, expected):
+    assert transliterate("మామిడి చెట్టు", scheme) == expected
+
+
+def test_anusvara_per_scheme():
+    assert transliterate("పండుగ", LATIN) == "panduga"
+    assert transliterate("పండుగ", ISO15919) == "paṁḍuga"
+    assert transliterate("సంబరం", LATIN) == "sambaram"
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError):
+        transliterate("జమ్మి", "hk")
+
+
+@pytest.mark.parametrize("spellings", [
+    ["జమ్మి", "jammi", "jami", "Jammi"],
+    ["మామిడి", "mamidi", "maamidi", "māmiḍi", "mAmiDi"],
+    ["చింత", "chinta", "chintha"],
+    ["వేప", "vepa", "veepa"],
+])
+def test_phonetic_key_joins_scripts_and_spellings(spellings):
+    assert len({phonetic_key(word) for word in spellings}) == 1
+
+
+def test_phonetic_key_keeps_different_words_apart():
+    assert phonetic_key("neem") != phonetic_key("mango")
+    assert phonetic_key("జమ్మి") != phonetic_key("జామ")
+
+
+def test_token_cache_precomputes_keys():
+    cache = TokenCache([{'id': 1, 'title': 'చింత చెట్టు'}])
+
+    assert cache.keys[cache.vocabulary['చింత']] == phonetic_key("chintha")
+    assert cache.key_of('చింత') == 'cinta'
+
+
+def test_bm25_matches_unlisted_species_across_scripts():
+    records = [
+        {'entry_type': 'text', 'title': 'చింత చెట్టు', 'content': 'చింత పండు పులుపు', 'city': 'Guntur', 'country': 'India'},
+        {'entry_type': 'text', 'title': 'notes.txt', 'content': 'Mango groves', 'city': 'Guntur', 'country': 'India'},
+    ]
+    index = SearchIndex(records)
+    ranker = BM25Ranker(index, token_cache=TokenCache(records), fuzzy_weight=0.0)
+
+    # 'chintha' is in none of extract_keywords' translation tables
+    assert ranker.variants("chintha") == {'చింత': PHONETIC_WEIGHT}
+    assert [record_id for record_id, _ in ranker.top_k("chintha", ["chintha"])] == [0]
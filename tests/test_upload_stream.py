@@ -0,0 +1,172 @@
+"""
+Tests for streaming uploads from UploadedFile to disk and storage
+"""
+
+import io
+import os
+import sys
+import hashlib
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upload_stream import MemoryBudget, StoredUpload, sniff_mime, spool_chunks, write_upload
+from supabase_db import SupabaseManager, CONTENT_HASH_SCHEMA_VERSION
+
+
+class FakeUploadedFile(io.BytesIO):
+    name = "neem.jpg"
+    type = "image/jpeg"
+
+
+class FakeStorage:
+    def __init__(self):
+        self.uploads = {}
+        self.storage = self
+
+    def from_(self, bucket):
+        self.bucket = bucket
+        return self
+
+    def upload(self, name, file, file_options=None):
+        # The client is handed an open reader, not a bytes copy
+        assert isinstance(file, io.BufferedReader)
+        self.uploads[(self.bucket, name)] = file.read()
+        return {'Key': name}
+
+    def get_public_url(self, name):
+        return f"https://project.supabase.co/storage/v1/object/public/{self.bucket}/{name}"
+
+
+def test_write_upload_hashes_while_writing(tmp_path):
+    payload = os.urandom(3 * 1024 + 17)
+    uploaded = FakeUploadedFile(payload)
+
+    stored = write_upload(uploaded, str(tmp_path / "neem.jpg"), chunk_size=1024)
+
+    assert stored.size == len(payload)
+    assert stored.sha256 == hashlib.sha256(payload).hexdigest()
+    assert (tmp_path / "neem.jpg").read_bytes() == payload
+    # The view was released, so Streamlit can still reuse the buffer
+    uploaded.write(b"more")
+
+
+def test_stored_upload_is_streamed_from_disk(tmp_path):
+    path = tmp_path / "birds.mp3"
+    path.write_bytes(b"birdsong")
+    manager = SupabaseManager()
+    manager.supabase = FakeStorage()
+
+    url = manager.upload_bytes_to_storage(StoredUpload(str(path), 8, "x"), "birds.mp3", "audios", "audio")
+
+    assert url.endswith("_birds.mp3") and "/audios/" in url
+    assert list(manager.supabase.uploads.values()) == [b"birdsong"]
+
+
+def test_upload_file_to_storage_leaves_uploaded_file_open():
+    uploaded = FakeUploadedFile(b"jpeg bytes")
+    manager = SupabaseManager()
+    manager.supabase = FakeStorage()
+
+    assert manager.upload_file_to_storage(uploaded, "images")
+    assert list(manager.supabase.uploads.values()) == [b"jpeg bytes"]
+    assert uploaded.getvalue() == b"jpeg bytes"
+
+
+def test_record_uses_hash_computed_while_writing():
+    manager = SupabaseManager()
+    manager.schema_version = CONTENT_HASH_SCHEMA_VERSION
+    stored = StoredUpload("unused", 4, "ab" * 32)
+
+    record = manager._build_record("image", "neem.jpg", stored, {'file_size': 4}, None)
+
+    assert record["content_hash"] == "ab" * 32
+
+
+def test_spool_chunks_spills_to_disk_above_threshold():
+    payload = b"\x89PNG\r\n\x1a\n" + os.urandom(4096)
+
+    spooled = spool_chunks([payload[:100], payload[100:]], threshold=1024)
+
+    assert spooled.size == len(payload)
+    assert spooled.sha256 == hashlib.sha256(payload).hexdigest()
+    assert spooled.mime == "image/png"
+    assert spooled.file._rolled
+    assert spooled.file.read() == payload
+
+
+def test_sniff_mime_for_accepted_formats():
+    assert sniff_mime(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+    assert sniff_mime(b"RIFF\x00\x00\x00\x00WAVEfmt ") == "audio/wav"
+    assert sniff_mime(b"\x00\x00\x00\x18ftypmp42") == "video/mp4"
+    assert sniff_mime(b"plain text") is None
+
+
+def test_memory_budget_queues_reservations_over_the_limit():
+    budget = MemoryBudget(limit=100)
+    in_use_when_entered = []
+
+    def second_upload():
+        with budget.reserve(50):
+            in_use_when_entered.append(budget.stats()['in_use'])
+
+    with budget.reserve(80):
+        waiter = threading.Thread(target=second_upload)
+        waiter.start()
+        waiter.join(0.1)
+        assert in_use_when_entered == [] and budget.stats()['queued'] == 1
+    waiter.join(5)
+    assert in_use_when_entered == [50]
+    assert budget.stats()['in_use'] == 0
+
+
+def test_memory_budget_admits_oversized_object_alone():
+    budget = MemoryBudget(limit=100)
+    with budget.reserve(10_000):
+        assert budget.stats()['in_use'] == 100
+    assert budget.stats()['in_use'] == 0
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingCondition(type(threading.Condition())):
+    """A condition whose wait raises in threads named 'interrupted', like a stopped script run"""
+
+    def wait(self, timeout=None):
+        if threading.current_thread().name == "interrupted":
+            raise Interrupted()
+        return super().wait(timeout)
+
+
+def test_memory_budget_skips_interrupted_reservations():
+    budget = MemoryBudget(limit=100)
+    budget._condition = InterruptingCondition()
+    entered = []
+
+    def upload(label, nbytes):
+        try:
+            with budget.reserve(nbytes):
+                entered.append(label)
+        except Interrupted:
+            pass
+
+    def start(label, nbytes, name=None):
+        thread = threading.Thread(target=upload, args=(label, nbytes), name=name, daemon=True)
+        thread.start()
+        return thread
+
+    with budget.reserve(80):
+        # Interrupted at the head of the queue, then behind a reservation that waits
+        start("interrupted", 50, "interrupted").join(5)
+        first = start("first", 50)
+        while budget.stats()['queued'] < 1:
+            threading.Event().wait(0.001)
+        start("interrupted", 10, "interrupted").join(5)
+        last = start("last", 10)
+    for thread in (first, last):
+        thread.join(5)
+
+    assert sorted(entered) == ["first", "last"]
+    assert budget.stats() == {'limit': 100, 'in_use': 0, 'queued': 0}
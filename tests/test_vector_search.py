@@ -0,0 +1,59 @@
+"""
+Tests for the vectorized chatbot scoring path
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FloraFaunaChatbot
+from search_index import SearchIndex
+from vector_search import VectorizedSearch
+from search_benchmark import benchmark, synthetic_records
+# The same corpus and queries as the index's own parity tests
+from test_search_index import QUERIES, RECORDS
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_vectorized_results_match_the_index(query):
+    df = pd.DataFrame(RECORDS)
+    keywords = FloraFaunaChatbot().extract_keywords(query)
+
+    expected = SearchIndex.from_dataframe(df).search(query, keywords)
+    actual = VectorizedSearch.from_dataframe(df).search(query, keywords)
+
+    assert actual['found_items'] == expected['found_items']
+    for got, want in zip(actual['results'], expected['results']):
+        assert got['title'] == want['title']
+        assert got['relevance'] == want['relevance']
+        assert got['matched_fields'] == want['matched_fields']
+        assert got['matched_content'] == want['matched_content']
+        assert got['combined_text'] == want['combined_text']
+
+
+def test_vectorized_scores_match_on_a_synthetic_corpus():
+    df = pd.DataFrame(synthetic_records(500, seed=7))
+    index, vectorized = SearchIndex.from_dataframe(df), VectorizedSearch.from_dataframe(df)
+
+    for query in ["neem leaves", "మామిడి చెట్టు", "temple video"]:
+        keywords = FloraFaunaChatbot().extract_keywords(query)
+        expected = {record_id: item['relevance'] for record_id, item in index.score(query, keywords).items()}
+        relevance = vectorized.score(query, keywords)['relevance']
+        assert {row: int(score) for row, score in enumerate(relevance) if score > 0} == expected
+
+
+def test_empty_dataframe():
+    vectorized = VectorizedSearch.from_dataframe(pd.DataFrame())
+
+    assert vectorized.search("neem", ["neem"])['found_items'] == 0
+
+
+def test_benchmark_reports_both_paths():
+    results = benchmark(200, ["jammi tree"], repeat=1)
+
+    assert set(results) == {'index', 'vectorized'}
+    assert all(timing['query_ms'] > 0 for timing in results.values())
@@ -0,0 +1,129 @@
+"""
+Record Token Cache
+Normalized text and tokens of every data_entries record, kept across cache refreshes
+
+Text is normalized the way extract_keywords cleans a query (lowercase, everything
+but word characters, whitespace and the Telugu block replaced by a space), with
+underscores also splitting so file names like image_neem.jpg yield their words.
+Queries and records therefore meet on the same tokens.
+
+The cache is columnar: one list per search field holding each row's lowercased
+text, one holding its tokens as arrays of interned vocabulary codes, plus the row's
+record id and a signature of its raw field values. Each interned term also gets its
+phonetic key (transliterate.phonetic_key) once, when it first enters the vocabulary. refresh() takes the new snapshot
+and only tokenizes rows whose id is new or whose signature changed; unchanged rows
+reuse their columns and rows that disappeared are dropped.
+"""
+
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from search_index import SEARCH_FIELDS, _is_missing
+from transliterate import phonetic_key
+
+# Same cleanup FloraFaunaChatbot.extract_keywords applies to queries
+CLEANUP_PATTERN = re.compile(r'[^\w\s\u0C00-\u0C7F]')
+
+
+def normalize(text: str) -> str:
+    return CLEANUP_PATTERN.sub(' ', text.lower()).replace('_', ' ')
+
+
+def normalize_tokens(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def _signature(data: Dict[str, Any]) -> int:
+    return hash(tuple(repr(data.get(column)) for column in SEARCH_FIELDS))
+
+
+class TokenCache:
+    """Columnar per-record normalized text and token codes, keyed by record id"""
+
+    def __init__(self, records: Optional[Iterable[Dict[str, Any]]] = None):
+        self.record_ids: List[Any] = []
+        self.signatures: List[int] = []
+        # column -> per-row lowercased text ('' when missing)
+        self.field_text: Dict[str, List[str]] = {column: [] for column in SEARCH_FIELDS}
+        # column -> per-row token codes
+        self.field_tokens: Dict[str, List[array]] = {column: [] for column in SEARCH_FIELDS}
+        self.vocabulary: Dict[str, int] = {}
+        self.terms: List[str] = []
+        # Phonetic key of each term, by vocabulary code
+        self.keys: List[str] = []
+        self._rows: Dict[Any, int] = {}
+        self.last_refresh = {'reused': 0, 'tokenized': 0, 'removed': 0}
+        if records is not None:
+            self.refresh(records)
+
+    def __len__(self) -> int:
+        return len(self.record_ids)
+
+    def _code(self, term: str) -> int:
+        code = self.vocabulary.get(term)
+        if code is None:
+            code = self.vocabulary[term] = len(self.terms)
+            self.terms.append(term)
+            self.keys.append(phonetic_key(term))
+        return code
+
+    def _tokenize(self, data: Dict[str, Any]) -> Tuple[List[str], List[array]]:
+        texts, tokens = [], []
+        for column in SEARCH_FIELDS:
+            value = data.get(column)
+            text = "" if _is_missing(value) else str(value).lower()
+            texts.append(text)
+            tokens.append(array('I', (self._code(term) for term in normalize_tokens(text))))
+        return texts, tokens
+
+    def refresh(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Replace the snapshot, tokenizing only new or changed rows; rows follow the new order"""
+        record_ids: List[Any] = []
+        signatures: List[int] = []
+        field_text: Dict[str, List[str]] = {column: [] for column in SEARCH_FIELDS}
+        field_tokens: Dict[str, List[array]] = {column: [] for column in SEARCH_FIELDS}
+        rows: Dict[Any, int] = {}
+        reused = tokenized = 0
+
+        for position, data in enumerate(records):
+            record_id = data.get('id')
+            key = record_id if not _is_missing(record_id) else ('row', position)
+            signature = _signature(data)
+            old_row = self._rows.get(key)
+            if old_row is not None and self.signatures[old_row] == signature:
+                texts = [self.field_text[column][old_row] for column in SEARCH_FIELDS]
+                tokens = [self.field_tokens[column][old_row] for column in SEARCH_FIELDS]
+                reused += 1
+            else:
+                texts, tokens = self._tokenize(data)
+                tokenized += 1
+            rows[key] = len(record_ids)
+            record_ids.append(record_id)
+            signatures.append(signature)
+            for column, text, codes in zip(SEARCH_FIELDS, texts, tokens):
+                field_text[column].append(text)
+                field_tokens[column].append(codes)
+
+        removed = len(set(self._rows) - set(rows))
+        self.record_ids, self.signatures, self._rows = record_ids, signatures, rows
+        self.field_text, self.field_tokens = field_text, field_tokens
+        self.last_refresh = {'reused': reused, 'tokenized': tokenized, 'removed': removed}
+        return self.last_refresh
+
+    def key_of(self, term: str) -> str:
+        code = self.vocabulary.get(term)
+        return self.keys[code] if code is not None else phonetic_key(term)
+
+    def row_of(self, record_id: Any) -> Optional[int]:
+        return self._rows.get(record_id)
+
+    def tokens(self, row: int, column: str) -> List[str]:
+        return [self.terms[code] for code in self.field_tokens[column][row]]
+
+    def field_terms(self, row: int) -> Iterator[Tuple[int, List[str]]]:
+        """(SEARCH_FIELDS index, tokens) for each field of a row that has any"""
+        for column_id, column in enumerate(SEARCH_FIELDS):
+            codes = self.field_tokens[column][row]
+            if codes:
+                yield column_id, [self.terms[code] for code in codes]
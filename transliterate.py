@@ -0,0 +1,145 @@
+"""
+Telugu Transliteration
+Table-driven Telugu -> Latin transliteration and a script-independent phonetic key
+
+Telugu is an abugida: each consonant carries an inherent 'a' that a following
+vowel sign replaces and a virama (్) removes. transliterate walks the text once
+with those rules and the letter tables below, in one of three schemes:
+    latin     - the informal spelling people type: జమ్మి -> jammi, మామిడి -> maamidi
+    iso15919  - ISO 15919 with diacritics: మామిడి -> māmiḍi
+    itrans    - ITRANS ASCII: మామిడి -> mAmiDi
+Anything outside the Telugu block is passed through unchanged.
+
+phonetic_key folds a word in either script onto one key: Telugu is transliterated,
+diacritics are stripped, aspiration and vowel length are dropped and doubled
+letters collapse, so జమ్మి, jammi and jami all key to "jami". Index builders apply
+it once per vocabulary term and queries once per keyword, which turns cross-script
+matching into a dictionary lookup.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Tuple
+
+TELUGU_START = '\u0C00'
+TELUGU_END = '\u0C7F'
+VIRAMA = '\u0C4D'
+ANUSVARA = '\u0C02'
+
+LATIN = 'latin'
+ISO15919 = 'iso15919'
+ITRANS = 'itrans'
+SCHEMES = (LATIN, ISO15919, ITRANS)
+
+# Letter -> (latin, iso15919, itrans)
+VOWELS: Dict[str, Tuple[str, str, str]] = {
+    'అ': ('a', 'a', 'a'), 'ఆ': ('aa', 'ā', 'A'), 'ఇ': ('i', 'i', 'i'), 'ఈ': ('ii', 'ī', 'I'),
+    'ఉ': ('u', 'u', 'u'), 'ఊ': ('uu', 'ū', 'U'), 'ఋ': ('ru', 'r̥', 'RRi'), 'ౠ': ('ruu', 'r̥̄', 'RRI'),
+    'ఎ': ('e', 'e', 'e'), 'ఏ': ('ee', 'ē', 'E'), 'ఐ': ('ai', 'ai', 'ai'),
+    'ఒ': ('o', 'o', 'o'), 'ఓ': ('oo', 'ō', 'O'), 'ఔ': ('au', 'au', 'au'),
+}
+VOWEL_SIGNS: Dict[str, Tuple[str, str, str]] = {
+    'ా': ('aa', 'ā', 'A'), 'ి': ('i', 'i', 'i'), 'ీ': ('ii', 'ī', 'I'), 'ు': ('u', 'u', 'u'),
+    'ూ': ('uu', 'ū', 'U'), 'ృ': ('ru', 'r̥', 'RRi'), 'ౄ': ('ruu', 'r̥̄', 'RRI'),
+    'ె': ('e', 'e', 'e'), 'ే': ('ee', 'ē', 'E'), 'ై': ('ai', 'ai', 'ai'),
+    'ొ': ('o', 'o', 'o'), 'ో': ('oo', 'ō', 'O'), 'ౌ': ('au', 'au', 'au'),
+}
+CONSONANTS: Dict[str, Tuple[str, str, str]] = {
+    'క': ('k', 'k', 'k'), 'ఖ': ('kh', 'kh', 'kh'), 'గ': ('g', 'g', 'g'), 'ఘ': ('gh', 'gh', 'gh'),
+    'ఙ': ('ng', 'ṅ', '~N'),
+    'చ': ('ch', 'c', 'ch'), 'ఛ': ('chh', 'ch', 'Ch'), 'జ': ('j', 'j', 'j'), 'ఝ': ('jh', 'jh', 'jh'),
+    'ఞ': ('ny', 'ñ', '~n'),
+    'ట': ('t', 'ṭ', 'T'), 'ఠ': ('th', 'ṭh', 'Th'), 'డ': ('d', 'ḍ', 'D'), 'ఢ': ('dh', 'ḍh', 'Dh'),
+    'ణ': ('n', 'ṇ', 'N'),
+    'త': ('t', 't', 't'), 'థ': ('th', 'th', 'th'), 'ద': ('d', 'd', 'd'), 'ధ': ('dh', 'dh', 'dh'),
+    'న': ('n', 'n', 'n'),
+    'ప': ('p', 'p', 'p'), 'ఫ': ('ph', 'ph', 'ph'), 'బ': ('b', 'b', 'b'), 'భ': ('bh', 'bh', 'bh'),
+    'మ': ('m', 'm', 'm'),
+    'య': ('y', 'y', 'y'), 'ర': ('r', 'r', 'r'), 'ఱ': ('r', 'ṟ', 'R'), 'ల': ('l', 'l', 'l'),
+    'ళ': ('l', 'ḷ', 'L'), 'వ': ('v', 'v', 'v'),
+    'శ': ('sh', 'ś', 'sh'), 'ష': ('sh', 'ṣ', 'Sh'), 'స': ('s', 's', 's'), 'హ': ('h', 'h', 'h'),
+}
+OTHER_SIGNS: Dict[str, Tuple[str, str, str]] = {
+    'ః': ('h', 'ḥ', 'H'),     # visarga
+    'ఁ': ('n', 'm̐', '.N'),    # chandrabindu
+    '౦': ('0',) * 3, '౧': ('1',) * 3, '౨': ('2',) * 3, '౩': ('3',) * 3, '౪': ('4',) * 3,
+    '౫': ('5',) * 3, '౬': ('6',) * 3, '౭': ('7',) * 3, '౮': ('8',) * 3, '౯': ('9',) * 3,
+}
+# Informal spelling writes the anusvara (ం) as the nasal of the consonant that follows it
+LABIALS = {'ప', 'ఫ', 'బ', 'భ', 'మ'}
+ANUSVARA_FORMS = {ISO15919: 'ṁ', ITRANS: 'M'}
+
+# Phonetic folding, applied in order to the transliterated, diacritic-free word
+PHONETIC_RULES = [
+    (re.compile(r'chh|ch'), 'c'),
+    (re.compile(r'([kgcjtdpbs])h'), r'\1'),   # aspiration
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'z'), 'j'),
+    (re.compile(r'q'), 'k'),
+    (re.compile(r'(.)\1+'), r'\1'),           # long vowels and doubled consonants
+]
+
+
+def has_telugu(text: str) -> bool:
+    return any(TELUGU_START <= char <= TELUGU_END for char in text)
+
+
+def transliterate(text: str, scheme: str = LATIN) -> str:
+    """Text with its Telugu written in the given Latin scheme"""
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown transliteration scheme: {scheme}")
+    if not has_telugu(text):
+        return text
+    column = SCHEMES.index(scheme)
+    out = []
+    # A consonant's inherent 'a' is only written once we know no vowel sign or virama follows
+    pending_a = False
+    for position, char in enumerate(text):
+        if char in VOWEL_SIGNS:
+            out.append(VOWEL_SIGNS[char][column])
+            pending_a = False
+            continue
+        if char == VIRAMA:
+            pending_a = False
+            continue
+        if pending_a:
+            out.append('a')
+            pending_a = False
+        if char in CONSONANTS:
+            out.append(CONSONANTS[char][column])
+            pending_a = True
+        elif char in VOWELS:
+            out.append(VOWELS[char][column])
+        elif char == ANUSVARA:
+            if scheme in ANUSVARA_FORMS:
+                out.append(ANUSVARA_FORMS[scheme])
+            else:
+                following = text[position + 1:position + 2]
+                out.append('n' if following in CONSONANTS and following not in LABIALS else 'm')
+        elif char in OTHER_SIGNS:
+            out.append(OTHER_SIGNS[char][column])
+        elif TELUGU_START <= char <= TELUGU_END:
+            # Nukta, length marks and other signs with no Latin counterpart
+            continue
+        else:
+            out.append(char)
+    if pending_a:
+        out.append('a')
+    return "".join(out)
+
+
+def to_latin(text: str) -> str:
+    """Informal Latin spelling of the Telugu in text"""
+    return transliterate(text, LATIN)
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(word: str) -> str:
+    """Script-independent key: words that sound alike in Telugu or Latin spelling share it"""
+    latin = to_latin(word.lower())
+    # Strip ISO 15919 diacritics (ā -> a, ṭ -> t, ṁ -> m)
+    key = "".join(char for char in unicodedata.normalize('NFKD', latin) if not unicodedata.combining(char))
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
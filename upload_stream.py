@@ -0,0 +1,213 @@
+"""
+Upload Streaming
+Move Streamlit uploads to disk and storage without extra in-memory copies
+
+An UploadedFile already holds the whole upload in a BytesIO. Instead of copying it
+with bytes()/getvalue() at every step, the buffer is written to disk, hashed and
+MIME-sniffed through one memoryview, and the storage client then streams the file
+from disk. Payloads produced on the server (e.g. compressed copies) go through a
+SpooledTemporaryFile that spills to disk above SPOOL_THRESHOLD.
+
+Work that needs a whole object in memory (decoding a photo for its hashes,
+downloading and recompressing an object for storage tiering) reserves its size from
+a per-process MemoryBudget first, so a burst of it queues instead of exhausting RAM.
+Writing an upload to disk streams it and takes nothing from the budget. The budget
+can't bound Streamlit's own buffering either: an upload is already fully in memory
+before the script sees it, limited only by server.maxUploadSize in
+.streamlit/config.toml. The budget can be set in .streamlit/secrets.toml with
+MEMORY_BUDGET_MB.
+"""
+
+import io
+import os
+import hashlib
+import tempfile
+import threading
+import contextlib
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+# Bytes written and hashed per step
+CHUNK_SIZE = 1024 * 1024
+# Spooled payloads larger than this move from memory to a temp file
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+# Default per-process budget for whole objects held in memory
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Leading bytes of the formats the app accepts
+MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'\xff\xf3', 'audio/mpeg'),
+    (b'OggS', 'audio/ogg'),
+    (b'\x1f\x8b', 'application/gzip'),
+]
+
+
+class StoredUpload(NamedTuple):
+    """An upload written to local disk, with its size, SHA-256 and MIME type computed on the way"""
+    path: str
+    size: int
+    sha256: str
+    mime: Optional[str] = None
+
+
+class SpooledUpload(NamedTuple):
+    """A payload in a SpooledTemporaryFile (in memory when small, on disk when large)"""
+    file: tempfile.SpooledTemporaryFile
+    size: int
+    sha256: str
+    mime: Optional[str] = None
+
+
+class MemoryBudget:
+    """Per-process byte budget; reservations beyond it wait in arrival order"""
+
+    def __init__(self, limit: int = DEFAULT_MEMORY_BUDGET):
+        self.limit = limit
+        self.in_use = 0
+        self._condition = threading.Condition()
+        self._issued = 0
+        self._serving = 0
+        # Tickets whose callers gave up while waiting; skipped when their turn comes
+        self._abandoned = set()
+
+    @classmethod
+    def from_secrets(cls) -> "MemoryBudget":
+        try:
+            import streamlit as st
+            limit_mb = st.secrets.get("MEMORY_BUDGET_MB")
+        except Exception:
+            limit_mb = None
+        limit_mb = limit_mb or os.environ.get("MEMORY_BUDGET_MB")
+        return cls(int(float(limit_mb) * 1024 * 1024) if limit_mb else DEFAULT_MEMORY_BUDGET)
+
+    def _advance(self):
+        """Hand the turn to the next waiting ticket; the caller holds the condition"""
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+        self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """Hold nbytes of the budget for the duration of the block"""
+        # An object larger than the whole budget runs once nothing else holds any
+        nbytes = min(max(int(nbytes or 0), 0), self.limit)
+        with self._condition:
+            ticket = self._issued
+            self._issued += 1
+            try:
+                while ticket != self._serving or self.in_use + nbytes > self.limit:
+                    self._condition.wait()
+            except BaseException:
+                # Interrupted while waiting: give up the turn so the reservations behind aren't stuck
+                if ticket == self._serving:
+                    self._advance()
+                else:
+                    self._abandoned.add(ticket)
+                raise
+            self.in_use += nbytes
+            self._advance()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_use -= nbytes
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {'limit': self.limit, 'in_use': self.in_use, 'queued': self._issued - self._serving - len(self._abandoned)}
+
+
+def sniff_mime(head: bytes) -> Optional[str]:
+    """MIME type from a file's leading bytes, for the formats the app accepts"""
+    head = bytes(head[:16])
+    for magic, mime in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime
+    if head[4:8] == b'ftyp':
+        return 'video/quicktime' if head[8:10] == b'qt' else 'video/mp4'
+    if head[:4] == b'RIFF':
+        return {b'WAVE': 'audio/wav', b'AVI ': 'video/avi', b'WEBP': 'image/webp'}.get(head[8:12])
+    return None
+
+
+def write_upload(uploaded_file, filepath: str, chunk_size: int = CHUNK_SIZE) -> StoredUpload:
+    """Write an uploaded file to filepath, hashing and sniffing it in the same pass"""
+    digest = hashlib.sha256()
+    size = 0
+    mime = None
+    with open(filepath, 'wb') as f:
+        if hasattr(uploaded_file, 'getbuffer'):
+            # A view of the BytesIO's own buffer - slicing a memoryview doesn't copy
+            with uploaded_file.getbuffer() as view:
+                mime = sniff_mime(view[:16])
+                for start in range(0, len(view), chunk_size):
+                    chunk = view[start:start + chunk_size]
+                    f.write(chunk)
+                    digest.update(chunk)
+                size = len(view)
+        else:
+            uploaded_file.seek(0)
+            for chunk in iter(lambda: uploaded_file.read(chunk_size), b''):
+                if size == 0:
+                    mime = sniff_mime(chunk)
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    return StoredUpload(filepath, size, digest.hexdigest(), mime)
+
+
+def spool_chunks(chunks: Iterable[bytes], threshold: int = SPOOL_THRESHOLD) -> SpooledUpload:
+    """Collect a stream of chunks into a spooled temp file, hashing and sniffing as it's written"""
+    spool = tempfile.SpooledTemporaryFile(max_size=threshold)
+    digest = hashlib.sha256()
+    size = 0
+    mime = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if size == 0:
+            mime = sniff_mime(chunk)
+        spool.write(chunk)
+        digest.update(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    return SpooledUpload(spool, size, digest.hexdigest(), mime)
+
+
+def iter_chunks(fileobj, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file object in chunks"""
+    return iter(lambda: fileobj.read(chunk_size), b'')
+
+
+def open_for_upload(source) -> io.BufferedReader:
+    """Binary reader the storage client streams from (it only streams BufferedReader/FileIO)
+    
+    Readers over a SpooledUpload or UploadedFile must be detach()ed rather than closed,
+    or closing them closes the underlying file.
+    """
+    if isinstance(source, StoredUpload):
+        return open(source.path, 'rb')
+    if isinstance(source, SpooledUpload):
+        source = source.file
+    # UploadedFile/BytesIO/spool: wrap without copying the underlying buffer
+    source.seek(0)
+    return io.BufferedReader(source)
+
+
+def payload_sha256(file_data: Union[bytes, memoryview, StoredUpload, SpooledUpload]) -> str:
+    """SHA-256 of an in-memory payload, or the hash recorded while writing it out"""
+    if isinstance(file_data, (StoredUpload, SpooledUpload)):
+        return file_data.sha256
+    return hashlib.sha256(file_data).hexdigest()
+
+
+# Global instance shared by all sessions
+memory_budget = MemoryBudget.from_secrets()
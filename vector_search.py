@@ -0,0 +1,179 @@
+"""
+Vectorized Chatbot Search
+The chatbot's relevance scoring as NumPy/pandas column operations
+
+On each cache refresh the records are turned into columns once: the lowercased
+text of every search field, the lowercased combined text, every token as flat
+arrays of (vocabulary code, record, field), and a term x character matrix of the
+vocabulary. A query then scores every record at once:
+    substring signals  - a single-word keyword can only occur inside a token, so the
+                         vocabulary terms containing it are found once and their
+                         token hits counted per record and field with np.bincount;
+                         phrases fall back to Series.str.contains
+    token signals      - a weight per vocabulary term (exact, partial, fuzzy), gathered
+                         onto the token array and summed per record with np.bincount
+so the per-query string work is proportional to the vocabulary, not to the text of
+every record. Scores are the same as SearchIndex.score.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from ranked_results import Materialize, RankedArray
+from search_index import MEDIA_REQUEST_KEYWORDS, MEDIA_TYPES, SEARCH_FIELDS, result_item
+
+
+class VectorizedSearch:
+    """Column-oriented scorer for a snapshot of data_entries"""
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True) if df is not None else pd.DataFrame()
+        self.df = df
+        self.fields: Dict[str, pd.Series] = {}
+        for column in SEARCH_FIELDS:
+            if column in df.columns:
+                values = df[column]
+                # Lowercased text where the value is present, NaN where it isn't
+                self.fields[column] = values.astype(str).str.lower().where(values.notna())
+
+        parts = []
+        for column, lowered in self.fields.items():
+            present = lowered.notna() & (lowered.str.strip() != "")
+            parts.append(lowered.where(present, ""))
+        if parts:
+            joined = [" ".join(part for part in row if part) for row in zip(*parts)]
+        else:
+            joined = [""] * len(df)
+        self.combined_text = pd.Series(joined, index=df.index, dtype=object)
+
+        # Every token of every field as parallel arrays: vocabulary code, record row, field
+        field_tokens = [lowered.str.split().explode().dropna() for lowered in self.fields.values()]
+        tokens = pd.concat(field_tokens) if field_tokens else pd.Series([], dtype=object)
+        codes, vocabulary = pd.factorize(tokens.to_numpy(), sort=False)
+        self.token_codes = codes.astype(np.int64)
+        self.token_records = tokens.index.to_numpy(dtype=np.int64)
+        self.token_fields = np.repeat(np.arange(len(field_tokens), dtype=np.int64),
+                                      [len(part) for part in field_tokens])
+        self.vocabulary = pd.Series(vocabulary, dtype=object)
+        self.vocabulary_lengths = self.vocabulary.str.len().to_numpy()
+        self._build_char_matrix()
+
+        entry_types = df['entry_type'] if 'entry_type' in df.columns else pd.Series("", index=df.index)
+        self.is_media = entry_types.isin(MEDIA_TYPES).to_numpy()
+
+    @classmethod
+    def from_dataframe(cls, df) -> "VectorizedSearch":
+        return cls(df)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _build_char_matrix(self):
+        """Boolean (term x character) matrix of which characters each vocabulary term contains"""
+        terms = self.vocabulary.tolist()
+        codepoints = np.frombuffer("".join(terms).encode('utf-32-le'), dtype=np.uint32)
+        self.alphabet, char_ids = np.unique(codepoints, return_inverse=True)
+        term_ids = np.repeat(np.arange(len(terms)), self.vocabulary_lengths.astype(np.int64))
+        self.term_chars = np.zeros((len(terms), len(self.alphabet)), dtype=bool)
+        self.term_chars[term_ids, char_ids] = True
+
+    def _term_weights(self, keyword: str, containing: np.ndarray) -> np.ndarray:
+        """Per-occurrence score of every vocabulary term for a keyword (exact, partial, fuzzy)"""
+        vocabulary = self.vocabulary
+        exact = (vocabulary == keyword).to_numpy()
+        substrings = {keyword[i:j] for i in range(len(keyword)) for j in range(i + 1, len(keyword) + 1)}
+        partial = (containing | vocabulary.isin(substrings).to_numpy()) & ~exact
+
+        # Shared characters: sum the keyword's columns of the character matrix
+        keyword_chars = np.array([ord(char) for char in set(keyword)], dtype=np.uint32)
+        columns = np.searchsorted(self.alphabet, keyword_chars)
+        known = columns < len(self.alphabet)
+        columns = columns[known][self.alphabet[columns[known]] == keyword_chars[known]]
+        common = self.term_chars[:, columns].sum(axis=1)
+        fuzzy = (self.vocabulary_lengths > 2) & (common >= min(3, len(keyword) - 1))
+
+        return 4 * exact + partial + fuzzy
+
+    def score(self, query: str, keywords: List[str]) -> Dict[str, Any]:
+        """Relevance of every record plus the per-keyword hit masks used to explain it"""
+        count = len(self.df)
+        relevance = np.zeros(count, dtype=np.int64)
+        keyword_hits = np.zeros(count, dtype=np.int64)
+        combined_hits: List[np.ndarray] = []
+        field_hits: List[Dict[str, np.ndarray]] = []
+
+        columns = list(self.fields)
+        for keyword in keywords:
+            keyword_lower = keyword.lower()
+            containing = self.vocabulary.str.contains(keyword_lower, regex=False).to_numpy(dtype=bool)
+
+            if keyword_lower.split() == [keyword_lower]:
+                # No whitespace: the keyword can only occur inside a token, so the substring
+                # signals come from the vocabulary instead of rescanning every record's text
+                hit_tokens = containing[self.token_codes]
+                per_field = np.bincount(self.token_records[hit_tokens] * len(columns) + self.token_fields[hit_tokens],
+                                        minlength=count * len(columns)).reshape(count, len(columns)) > 0
+                in_fields = {column: per_field[:, field_id] for field_id, column in enumerate(columns)}
+                in_combined = per_field.any(axis=1)
+            else:
+                in_combined = self.combined_text.str.contains(keyword_lower, regex=False).to_numpy(dtype=bool)
+                in_fields = {column: lowered.str.contains(keyword_lower, regex=False, na=False).to_numpy(dtype=bool)
+                             for column, lowered in self.fields.items()}
+            relevance += 5 * in_combined
+            for hits in in_fields.values():
+                relevance += 2 * hits
+            keyword_hits += in_combined
+            combined_hits.append(in_combined)
+            field_hits.append(in_fields)
+
+            if len(keyword_lower) > 2 and len(self.token_codes):
+                weights = self._term_weights(keyword_lower, containing)
+                relevance += np.bincount(self.token_records, weights=weights[self.token_codes],
+                                         minlength=count).astype(np.int64)
+
+        relevance += 2 * (keyword_hits > 1)
+        query_lower = query.lower()
+        if any(media_keyword in query_lower for media_keyword in MEDIA_REQUEST_KEYWORDS):
+            relevance += 10 * self.is_media
+
+        return {'relevance': relevance, 'combined_hits': combined_hits, 'field_hits': field_hits}
+
+    def materializer(self, query: str, keywords: List[str]) -> Materialize:
+        """Builds the result items of a ranking of this query from this snapshot's rows
+
+        A row's matches are checked on its own text, which gives what score()'s hit
+        masks say for that row without scoring the whole snapshot again.
+        """
+        def materialize(row: int, score: int) -> Dict[str, Any]:
+            matched_fields: List[str] = []
+            matched_content: List[str] = []
+            combined = self.combined_text.iat[row]
+            for keyword in keywords:
+                keyword_lower = keyword.lower()
+                if keyword_lower not in combined:
+                    continue
+                matched_content.append(f"Found '{keyword}' in record")
+                for column, lowered in self.fields.items():
+                    text = lowered.iat[row]
+                    if isinstance(text, str) and keyword_lower in text and column not in matched_fields:
+                        matched_fields.append(column)
+            data = self.df.iloc[row].to_dict()
+            return result_item(data, combined, {
+                'relevance': int(score),
+                'matched_fields': matched_fields,
+                'matched_content': matched_content,
+            })
+        return materialize
+
+    def rank(self, query: str, keywords: List[str]) -> RankedArray:
+        """Every match ranked by relevance; result items are only built for the pages asked for"""
+        relevance = self.score(query, keywords)['relevance']
+        matching = np.flatnonzero(relevance > 0)
+        # Ties keep record order
+        return RankedArray(matching, relevance[matching], self.materializer(query, keywords), len(self.df), keywords)
+
+    def search(self, query: str, keywords: List[str], limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """Ranked results in the shape FloraFaunaChatbot.search_database returns"""
+        return self.rank(query, keywords).page(offset, limit)